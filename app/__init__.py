@@ -3,23 +3,39 @@ Facial Recognition and Servo Tracking Application
 
 This package contains modules for facial recognition, servo tracking,
 and database operations for a facial profiling system.
+
+Submodules are imported on first attribute access, so importing the package
+(or a light submodule such as `app.utils`) does not load DeepFace, MediaPipe
+or connect to any database.
 """
 
-from .config import FacialRecognitionConfiguration
-from .vector import get_feature_vector, analyze_features
-from .utils import save_face_image, extract_ltrb_from_track
-from .database import insert_vector, search_vector
-from .servo_tracking import move_servo, open_port
+import importlib
+from typing import Any
+
+_EXPORTS = {
+    'FacialRecognitionConfiguration': 'config',
+    'get_feature_vector': 'vector',
+    'analyze_features': 'vector',
+    'TrackEmbedding': 'vector',
+    'save_face_image': 'utils',
+    'extract_ltrb_from_track': 'utils',
+    'insert_vector': 'database',
+    'search_vector': 'database',
+    'insert_vectors': 'database',
+    'search_vectors': 'database',
+    'RecognitionWorker': 'recognition',
+    'move_servo': 'servo_tracking',
+    'open_port': 'servo_tracking'
+}
+
+__all__ = list(_EXPORTS)
 
-__all__ = [
-    'FacialRecognitionConfiguration',
-    'get_feature_vector',
-    'analyze_features',
-    'save_face_image',
-    'extract_ltrb_from_track',
-    'insert_vector',
-    'search_vector',
-    'move_servo',
-    'open_port'
-]
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
 
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
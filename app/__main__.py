@@ -1,27 +1,43 @@
 """Main module for facial recognition and servo tracking application."""
 
 import os
-import cv2
 import logging
 import shutil
 import asyncio
+import argparse
+import functools
 import numpy as np
-import mediapipe as mp
-from deep_sort_realtime.deepsort_tracker import DeepSort
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Union
 
 from .config import FacialRecognitionConfiguration as Config
 from .utils import save_face_image, extract_ltrb_from_track
-from .servo_tracking import open_port, move_servo, setup_and_process_video
-from .vector import get_feature_vector, analyze_features
+from .servo_tracking import open_port, close_port, setup_and_process_video
+from .vector import TrackEmbedding
 from .database import insert_vector, search_vector
+from .recognition import RecognitionWorker
+from .identity_cache import IdentityCache
+from .quality import CropBuffer, face_quality
+from .metrics import metrics
+from .sinks import create_sink
+from .multicam import run_cameras, parse_source
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def handle_track(frame: np.ndarray, track: Any, img_width: int, img_height: int, frame_count: int) -> None:
+recognition_worker = RecognitionWorker()
+identity_cache = IdentityCache()
+
+async def handle_track(frame: np.ndarray, track: Any, img_width: int, img_height: int, frame_count: int,
+                       insert_unknown: bool = True) -> None:
     """
-    Handle a single track, saving face images and processing feature vectors.
+    Handle a single track, keeping its best face crops and processing feature vectors.
+
+    Each detected face is scored by `face_quality` and offered to the track's
+    top-K `CropBuffer`; recognition starts once the buffer's quality plateaus.
+    After that, new crops that make it into the top K are embedded in small
+    batches and folded into the track's running-mean `TrackEmbedding`.
+
+    Overlays for the track are drawn by `process_frame`; the frame passed here is left untouched.
 
     Args:
     - frame (np.ndarray): The current frame.
@@ -29,69 +45,276 @@ async def handle_track(frame: np.ndarray, track: Any, img_width: int, img_height
     - img_width (int): Width of the frame.
     - img_height (int): Height of the frame.
     - frame_count (int): Current frame count.
+    - insert_unknown (bool): Insert faces not found in the vector store as new identities; if False, they stay unresolved.
     """
-    logger.info(f"Processing track ID {track.track_id}")
-    track_id = track.track_id
-    x, y, w, h = extract_ltrb_from_track(track)
+    with metrics.timer('handle_track'):
+        logger.info(f"Processing track ID {track.track_id}")
+        track_id = track.track_id
+        x, y, w, h = extract_ltrb_from_track(track)
+
+        if not hasattr(track, 'track_info'):
+            track.track_info = {'images_saved': 0, 'crop_buffer': CropBuffer(), 'embedding': TrackEmbedding(),
+                                'dir_path': f"{Config.IMAGE_SAVE_DIR}/{track_id}"}
 
-    if not hasattr(track, 'track_info'):
-        track.track_info = {'images_saved': 0, 'dir_path': f"{Config.IMAGE_SAVE_DIR}/{track_id}"}
-        os.makedirs(track.track_info['dir_path'], exist_ok=True)
+        track_info = track.track_info
+        crop_buffer = track_info['crop_buffer']
+        embedding = track_info['embedding']
+        if embedding.count >= Config.EMBEDDING_MAX_COUNT:
+            return
 
-    track_info = track.track_info
+        # Only score faces on frames where the track was matched to a detection, not on Kalman-predicted boxes.
+        detection = getattr(track, 'others', None)
+        if detection is not None:
+            with metrics.timer('face_quality'):
+                quality = face_quality(frame, detection)
+            with metrics.timer('save_face_image'):
+                save_face_image(frame, x, y, w, h, track_info, track_id, img_width, img_height, quality)
 
-    if track_info['images_saved'] < Config.FACE_IMG_SAVE_LIMIT and frame_count % Config.FRAME_SKIP == 0:
-        save_face_image(frame, x, y, w, h, track_info, track_id, img_width, img_height)
+        recognition_task = track_info.get('recognition_task')
+        if recognition_task is not None and not recognition_task.done():
+            return
 
-    if track_info['images_saved'] == Config.FACE_IMG_SAVE_LIMIT and 'feature_vector' not in track_info:
-        await process_feature_vector(track_info, track_id)
+        if embedding.count == 0:
+            # A failed recognition is only retried once better crops have arrived.
+            if not crop_buffer.ready or (recognition_task is not None and not crop_buffer.fresh):
+                return
+            crops = crop_buffer.crops
+        elif len(crop_buffer.fresh) >= Config.EMBEDDING_REFRESH_CROPS:
+            crops = crop_buffer.fresh
+        else:
+            return
 
-    cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-    cv2.putText(frame, f'ID: {track_id}', (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+        future = recognition_worker.submit(track_id, crops)
+        if future is not None:
+            crop_buffer.clear_fresh()
+            track_info['recognition_task'] = asyncio.create_task(process_feature_vector(track_info, track_id, future, insert_unknown))
+        metrics.set_gauge('recognition_queue_depth', recognition_worker.pending)
 
-async def process_feature_vector(track_info: Dict[str, Any], track_id: int) -> None:
+async def process_feature_vector(track_info: Dict[str, Any], track_id: int, recognition: asyncio.Future,
+                                 insert_unknown: bool = True) -> None:
     """
-    Process the feature vector for a track.
+    Fold a track's new feature vectors into its embedding and resolve its identity.
+
+    The identity is looked up the first time and then only again when the
+    track's embedding has drifted past `Config.EMBEDDING_DRIFT_THRESHOLD`
+    from the vector it was last looked up with. The identity cache is checked
+    first; only cache misses are searched in the vector store, and only new
+    identities (never re-queries of a known track) are analyzed and inserted.
 
     Args:
     - track_info (Dict[str, Any]): Information about the track.
     - track_id (int): ID of the track.
+    - recognition (asyncio.Future): Recognition job resolving to the feature vectors of the submitted crops.
+    - insert_unknown (bool): Analyze and insert a new identity when the lookup finds no match.
     """
-    async def generate_feature_vector():
-        return get_feature_vector(track_info['dir_path'])
-    
-    async def facial_analysis():
-        analysis = analyze_features(track_info['dir_path'])
-        logger.info(f"Analysis for track ID {track_id}: {analysis}")
-        return analysis
-    
-    feature_vector, analysis = await asyncio.gather(generate_feature_vector(), facial_analysis())
-
-    if feature_vector is not None:
-        feature_vector = feature_vector.tolist() if not isinstance(feature_vector, list) else feature_vector
-        track_info['feature_vector'] = feature_vector
-        logger.info(f"Feature vector for track ID {track_id}: {feature_vector}")
-        match = search_vector(feature_vector)
-        if match is None:
-            name = "Temp"
-            insert_vector(feature_vector, name, analysis)
-    else:
+    try:
+        with metrics.timer('recognition'):
+            vectors = await recognition
+    except asyncio.CancelledError:
+        logger.info(f"Recognition for track ID {track_id} was cancelled")
+        return
+    except Exception as e:
+        logger.error(f"Recognition failed for track ID {track_id}: {e}")
+        return
+
+    embedding = track_info['embedding']
+    if vectors is None or not embedding.update(vectors):
         logger.warning(f"No feature vector generated for track ID {track_id}")
+        return
 
-async def main() -> None:
-    """Main function to run the facial recognition and servo tracking application."""
-    if os.path.exists(Config.IMAGE_SAVE_DIR):
-        shutil.rmtree(Config.IMAGE_SAVE_DIR)
-    os.makedirs(Config.IMAGE_SAVE_DIR, exist_ok=True)
+    track_info['feature_vector'] = embedding.vector.tolist()
+    if not embedding.needs_query:
+        logger.info(f"Refined feature vector for track ID {track_id} ({embedding.count} crops, drift {embedding.drift:.3f})")
+        return
+
+    requery = embedding.queries > 0
+    feature_vector = embedding.mark_queried().tolist()
+    logger.info(f"Feature vector for track ID {track_id} from {embedding.count} crops"
+                + (" drifted, looking up identity again" if requery else ""))
+
+    with metrics.timer('identity_cache'):
+        match = identity_cache.match(feature_vector)
+    if match is None:
+        with metrics.timer('search_vector'):
+            match = await asyncio.to_thread(search_vector, feature_vector)
+        if match is None and not requery and insert_unknown:
+            try:
+                with metrics.timer('analyze_features'):
+                    analysis = await recognition_worker.analyze(track_info['crop_buffer'].crops)
+                logger.info(f"Analysis for track ID {track_id}: {analysis}")
+            except asyncio.CancelledError:
+                logger.info(f"Analysis for track ID {track_id} was cancelled")
+                return
+            except Exception as e:
+                # The identity is still stored; only its age/gender/race analysis is missing.
+                logger.error(f"Analysis failed for track ID {track_id}: {e}")
+                analysis = None
+            name = "Temp"
+            with metrics.timer('insert_vector'):
+                match = await asyncio.to_thread(insert_vector, feature_vector, name, analysis)
 
-    # if not open_port():
-    #     logger.error("Failed to open serial port. Exiting.")
-    #     return
+    if match is not None:
+        identity_cache.put(match, feature_vector)
+        if track_info.get('identity') not in (None, match):
+            logger.info(f"Track ID {track_id} changed identity from {track_info['identity']} to {match}")
+        track_info['identity'] = match
+        logger.info(f"Track ID {track_id} resolved to identity {match}")
 
+async def main(sink: str = Config.FRAME_SINK, sources: Optional[List[Union[int, str]]] = None) -> None:
+    """
+    Main function to run the facial recognition and servo tracking application.
+
+    Args:
+    - sink (str): Frame sink spec for annotated frames (see `create_sink`); "none" runs headless.
+    - sources (Optional[List[Union[int, str]]]): Video sources; several are processed together by `run_cameras`.
+      Defaults to camera 2.
+    """
+    if Config.PERSIST_FACE_IMAGES:
+        if os.path.exists(Config.IMAGE_SAVE_DIR):
+            shutil.rmtree(Config.IMAGE_SAVE_DIR)
+        os.makedirs(Config.IMAGE_SAVE_DIR, exist_ok=True)
+
+    if Config.SERVO_ENABLED and not open_port():
+        logger.error("Failed to open serial port. Exiting.")
+        return
+
+    recognition_worker.start()
     try:
-        await setup_and_process_video(video_source=2)
+        if metrics.enabled:
+            if Config.METRICS_PORT:
+                metrics.start_http_server(Config.METRICS_PORT)
+            metrics.start_json_dump(Config.METRICS_JSON_PATH)
+
+        sources = sources or [2]
+        if len(sources) == 1:
+            await setup_and_process_video(video_source=sources[0], track_handler=handle_track,
+                                          track_deleted_handler=recognition_worker.cancel, sink=create_sink(sink))
+        else:
+            await run_cameras(sources, track_handler=handle_track, track_deleted_handler=recognition_worker.cancel,
+                              sink=sink)
     except Exception as e:
         logger.error(f"An error occurred in the main loop: {e}")
+    finally:
+        recognition_worker.shutdown()
+        close_port()
+        metrics.stop()
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Args:
+    - argv (Optional[List[str]]): Arguments to parse (default is sys.argv).
+
+    Returns:
+    - argparse.Namespace: Parsed arguments. `command` is "run" unless another subcommand was given.
+    """
+    parser = argparse.ArgumentParser(prog="python -m app", description="Facial profiling pipeline")
+    subparsers = parser.add_subparsers(dest="command")
+    run_parser = subparsers.add_parser("run", help="Run live recognition and tracking (default)")
+    run_parser.add_argument("--sink", default=Config.FRAME_SINK,
+                            help='Where annotated frames go: "none", "window", "file:<path>", "shm:<name>" or "mjpeg[:<port>]"')
+    run_parser.add_argument("--headless", action="store_const", const="none", dest="sink", help='Same as --sink none')
+    run_parser.add_argument("--source", action="append", dest="sources", type=parse_source,
+                            help="Camera index, video file or stream URL; repeat for multiple cameras (default: 2)")
+
+    enroll_parser = subparsers.add_parser("enroll", help="Enroll a gallery from a person_name/*.png directory tree")
+    enroll_parser.add_argument("directory", help="Root directory with one subdirectory of face images per person")
+    enroll_parser.add_argument("--workers", type=int, default=Config.ENROLL_WORKERS, help="Number of worker processes")
+    enroll_parser.add_argument("--analyze", action="store_true", help="Store DeepFace age/gender/race analysis")
+
+    benchmark_parser = subparsers.add_parser("benchmark", help="Benchmark the pipeline hot paths and print JSON")
+    benchmark_parser.add_argument("--video", help="Recorded video to replay (default: synthetic frames)")
+    benchmark_parser.add_argument("--frames", type=int, default=300, help="Number of frames to process")
+    benchmark_parser.add_argument("--track-iterations", type=int, default=20, help="Iterations of each per-track stage")
+    benchmark_parser.add_argument("--gallery-size", type=int, default=1000, help="Identities seeded in the local index")
+    benchmark_parser.add_argument("--face-image", help="Face image moved across the synthetic frames so tracks are confirmed")
+    benchmark_parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+
+    replay_parser = subparsers.add_parser("replay", help="Process a recorded video and write per-frame results as JSONL")
+    replay_parser.add_argument("video", help="Video file to replay")
+    replay_parser.add_argument("--output", default=Config.REPLAY_OUTPUT, help="JSONL output path")
+    replay_parser.add_argument("--fps", type=float, help="Simulated frame rate (default: as fast as possible)")
+    replay_parser.add_argument("--start", type=float, help="Skip to this timestamp in seconds")
+    replay_parser.add_argument("--start-frame", type=int, default=0, help="Skip to this frame index")
+    replay_parser.add_argument("--end", type=float, help="Stop at this timestamp in seconds")
+    replay_parser.add_argument("--end-frame", type=int, help="Stop before this frame index")
+    replay_parser.add_argument("--segments", type=int, default=1, help="Number of segments decoded and processed in parallel")
+    replay_parser.add_argument("--adaptive-detection", action="store_true",
+                               help="Skip detection on some frames (faster, but results depend on timing)")
+    replay_parser.add_argument("--no-recognition", action="store_true", help="Only track faces, do not resolve identities")
+    replay_parser.add_argument("--insert-unknown", action="store_true",
+                               help="Insert faces missing from the vector store as new identities (default: lookup only)")
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        args = parser.parse_args(["run"])
+    return args
+
+async def benchmark(args: argparse.Namespace) -> None:
+    """
+    Run the benchmark harness with `handle_track` as the per-track handler.
+
+    Args:
+    - args (argparse.Namespace): Parsed `benchmark` subcommand arguments.
+    """
+    import cv2
+    from .benchmark import run_benchmark, write_report, video_frames, synthetic_frames, peak_rss_mb
+
+    if args.video:
+        frames, source = video_frames(args.video, args.frames), args.video
+    elif args.face_image:
+        face = cv2.imread(args.face_image)
+        if face is None:
+            logger.error(f"Could not read face image {args.face_image}")
+            return
+        frames, source = synthetic_frames(args.frames, face=face), f"synthetic:{args.face_image}"
+    else:
+        frames, source = synthetic_frames(args.frames), "synthetic"
+
+    try:
+        report = await run_benchmark(frames, source, track_handler=handle_track,
+                                     track_iterations=args.track_iterations, gallery_size=args.gallery_size)
+    finally:
+        recognition_worker.shutdown(wait=True)
+    # The workers have exited, so their peak RSS is in the children's rusage.
+    report['peak_rss_children_mb'] = peak_rss_mb(children=True)
+    write_report(report, args.output)
+
+def replay(args: argparse.Namespace) -> None:
+    """
+    Run replay mode with `handle_track` as the per-track handler unless recognition is disabled.
+
+    Identities are only looked up, so replaying archived video (possibly in
+    several segments at once) does not add identities to the vector store and
+    MongoDB, unless `--insert-unknown` is given.
+
+    Args:
+    - args (argparse.Namespace): Parsed `replay` subcommand arguments.
+    """
+    from .replay import replay_video, video_info
+
+    video_fps, _ = video_info(args.video)
+    start = round(args.start * video_fps) if args.start is not None else args.start_frame
+    end = round(args.end * video_fps) if args.end is not None else args.end_frame
+
+    # A partial of the module-level function stays picklable for segment processes.
+    track_handler = None if args.no_recognition else functools.partial(handle_track, insert_unknown=args.insert_unknown)
+    try:
+        report = replay_video(args.video, args.output, start, end, track_handler=track_handler,
+                              fps=args.fps, adaptive=args.adaptive_detection, segments=args.segments)
+    finally:
+        recognition_worker.shutdown()
+    logger.info(f"Replay report: {report}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    if args.command == "enroll":
+        from .enroll import enroll_directory
+        enroll_directory(args.directory, workers=args.workers, analyze=args.analyze)
+    elif args.command == "benchmark":
+        asyncio.run(benchmark(args))
+    elif args.command == "replay":
+        replay(args)
+    else:
+        asyncio.run(main(args.sink, args.sources))
@@ -0,0 +1,255 @@
+"""Reproducible benchmark of the per-frame and per-track hot paths."""
+
+import sys
+import cv2
+import json
+import time
+import logging
+import numpy as np
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from .config import FacialRecognitionConfiguration as Config
+from .utils import save_face_image
+from .quality import CropBuffer, face_quality
+from .vector import get_feature_vector, analyze_features
+from .database import StorageBackend, set_backend, insert_vectors, search_vector
+from .local_store import LocalVectorIndex, InMemoryCollection
+from .servo_tracking import process_frame, TrackHandler
+from .scheduler import DetectionScheduler
+from .detection import InlineDetector
+from .trackers import create_tracker
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class StageTimer:
+    """Collect wall-clock durations per named stage."""
+
+    def __init__(self, warmup: int = 0):
+        """
+        Args:
+        - warmup (int): Number of initial samples per stage excluded from the summary (model loading, caches).
+        """
+        self.warmup = warmup
+        self.samples: Dict[str, List[float]] = {}
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.samples.setdefault(stage, []).append((time.perf_counter_ns() - start) / 1e6)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize latencies per stage.
+
+        Returns:
+        - Dict[str, Dict[str, float]]: Count, mean, p50, p95, p99 and max in milliseconds per stage.
+        """
+        summary = {}
+        for stage, samples in self.samples.items():
+            measured = np.asarray(samples[self.warmup:] if len(samples) > self.warmup else samples)
+            p50, p95, p99 = np.percentile(measured, [50, 95, 99])
+            summary[stage] = {
+                'count': int(len(measured)),
+                'mean_ms': float(measured.mean()),
+                'p50_ms': float(p50),
+                'p95_ms': float(p95),
+                'p99_ms': float(p99),
+                'max_ms': float(measured.max()),
+            }
+        return summary
+
+def video_frames(path: str, limit: Optional[int] = None) -> Iterator[np.ndarray]:
+    """
+    Yield frames from a recorded video file as fast as they can be decoded.
+
+    Args:
+    - path (str): Path to the video file.
+    - limit (Optional[int]): Maximum number of frames to yield.
+
+    Yields:
+    - np.ndarray: BGR frames.
+    """
+    cap = cv2.VideoCapture(path)
+    try:
+        count = 0
+        while cap.isOpened() and (limit is None or count < limit):
+            success, frame = cap.read()
+            if not success:
+                break
+            count += 1
+            yield frame
+    finally:
+        cap.release()
+
+def synthetic_frames(count: int, width: int = 1280, height: int = 720, seed: int = 0,
+                     face: Optional[np.ndarray] = None) -> Iterator[np.ndarray]:
+    """
+    Yield deterministic synthetic frames with a moving face-sized patch over noise.
+
+    Without a `face` image the patch is a flat ellipse, which the face detector
+    does not detect, so no tracks are confirmed and `handle_track` is never
+    called; the per-track stages are then only measured by the isolated loop.
+
+    Args:
+    - count (int): Number of frames.
+    - width (int): Frame width.
+    - height (int): Frame height.
+    - seed (int): Random seed.
+    - face (Optional[np.ndarray]): BGR image of a real face to move across the frames instead of the ellipse.
+
+    Yields:
+    - np.ndarray: BGR frames.
+    """
+    rng = np.random.default_rng(seed)
+    background = rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    if face is not None:
+        scale = min(height / 2 / face.shape[0], width / 4 / face.shape[1])
+        face = cv2.resize(face, (max(1, int(face.shape[1] * scale)), max(1, int(face.shape[0] * scale))),
+                          interpolation=cv2.INTER_AREA)
+    for i in range(count):
+        frame = background.copy()
+        cx = int(width / 2 + width / 4 * np.sin(i / 30))
+        if face is None:
+            cv2.ellipse(frame, (cx, height // 2), (width // 16, height // 8), 0, 0, 360, (150, 180, 220), -1)
+        else:
+            face_height, face_width = face.shape[:2]
+            x, y = cx - face_width // 2, (height - face_height) // 2
+            frame[y:y + face_height, x:x + face_width] = face
+        yield frame
+
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    """
+    Return the peak resident set size in megabytes.
+
+    Args:
+    - children (bool): Report the largest terminated and waited-for child process (e.g. recognition
+      workers after their pool shut down) instead of this process.
+
+    Returns:
+    - Optional[float]: Peak RSS in megabytes, or None where it cannot be measured.
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    if children:
+        return None
+    try:
+        import psutil
+    except ImportError:
+        return None
+    memory = psutil.Process().memory_info()
+    return getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024)
+
+def _use_local_backend(gallery_size: int, seed: int = 0) -> None:
+    set_backend(StorageBackend(LocalVectorIndex(None, Config.FEATURE_VECTOR_DIMENSION), InMemoryCollection()))
+    if gallery_size > 0:
+        vectors = np.random.default_rng(seed).standard_normal((gallery_size, Config.FEATURE_VECTOR_DIMENSION))
+        insert_vectors(vectors, [f"person_{i}" for i in range(gallery_size)], [None] * gallery_size)
+
+async def run_benchmark(frames: Iterator[np.ndarray], source: str, track_handler: Optional[TrackHandler] = None,
+                        track_iterations: int = 20, gallery_size: int = 1000, warmup: int = 3) -> Dict[str, Any]:
+    """
+    Replay frames through the pipeline with local stand-ins for Pinecone and MongoDB.
+
+    Args:
+    - frames (Iterator[np.ndarray]): Frames to replay.
+    - source (str): Description of the frame source for the report.
+    - track_handler (Optional[TrackHandler]): Per-track handler to run and time (e.g. `handle_track`).
+    - track_iterations (int): Number of times to run each per-track stage.
+    - gallery_size (int): Number of random identities to seed the local vector index with.
+    - warmup (int): Number of initial samples per stage excluded from the statistics.
+
+    Returns:
+    - Dict[str, Any]: Machine-readable report with per-stage latency percentiles, frames/second and the
+      peak RSS of this process. Processes the track handler starts (recognition workers) are not included.
+    """
+    timer = StageTimer(warmup=warmup)
+    _use_local_backend(gallery_size)
+
+    face_detector = InlineDetector()
+    tracker = create_tracker()
+    scheduler = DetectionScheduler()
+    current_pan, current_tilt = Config.PAN_START, Config.TILT_START
+
+    async def timed_track_handler(frame: np.ndarray, track: Any, img_width: int, img_height: int, frame_count: int) -> None:
+        with timer.measure('handle_track'):
+            await track_handler(frame, track, img_width, img_height, frame_count)
+
+    frame_count = 0
+    last_frame = None
+    start_time = time.perf_counter()
+    for frame in frames:
+        frame_count += 1
+        last_frame = frame
+        with timer.measure('process_frame'):
+            _, current_pan, current_tilt = await process_frame(
+                frame, face_detector, tracker, current_pan, current_tilt, frame_count,
+                timed_track_handler if track_handler is not None else None, scheduler=scheduler
+            )
+    frame_time = time.perf_counter() - start_time
+
+    if last_frame is not None and track_iterations > 0:
+        img_height, img_width = last_frame.shape[:2]
+        w, h = img_width // 6, img_height // 4
+        x, y = (img_width - w) // 2, (img_height - h) // 2
+        track_info = {'images_saved': 0, 'crop_buffer': CropBuffer(), 'dir_path': f"{Config.IMAGE_SAVE_DIR}/benchmark"}
+        detection = np.array([x, y, w, h, 1.0], dtype=np.float32)
+        for i in range(track_iterations):
+            with timer.measure('face_quality'):
+                quality = face_quality(last_frame, detection)
+            with timer.measure('save_face_image'):
+                # Perturb the score so every offer is kept and the crop copy is measured too.
+                save_face_image(last_frame, x, y, w, h, track_info, i, img_width, img_height, quality + i)
+
+        crops = track_info['crop_buffer'].crops
+        for _ in range(track_iterations):
+            with timer.measure('get_feature_vector'):
+                feature_vector = get_feature_vector(crops)
+            with timer.measure('analyze_features'):
+                analyze_features(crops)
+            if feature_vector is not None:
+                with timer.measure('search_vector'):
+                    search_vector(feature_vector.tolist())
+
+    notes = []
+    if track_handler is not None and 'handle_track' not in timer.samples:
+        notes.append("No track was confirmed in the replayed frames, so handle_track was not measured; "
+                     "the per-track stages come only from the isolated loop.")
+
+    return {
+        'source': source,
+        'frames': frame_count,
+        'frame_wall_time_s': frame_time,
+        'fps': frame_count / frame_time if frame_time > 0 else 0.0,
+        'gallery_size': gallery_size,
+        'peak_rss_mb': peak_rss_mb(),
+        'detection': scheduler.stats(),
+        'stages': timer.summary(),
+        'notes': notes,
+    }
+
+def write_report(report: Dict[str, Any], output: Optional[str] = None) -> None:
+    """
+    Write a benchmark report as JSON to a file or stdout.
+
+    Args:
+    - report (Dict[str, Any]): The report from `run_benchmark`.
+    - output (Optional[str]): Output path, or None for stdout.
+    """
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if output is None:
+        print(text)
+    else:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        logger.info(f"Wrote benchmark report to {output}")
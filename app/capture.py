@@ -0,0 +1,231 @@
+"""Threaded video capture feeding a bounded ring buffer of preallocated frames."""
+
+import cv2
+import logging
+import threading
+import time
+import numpy as np
+from typing import List, Optional, Tuple, Union
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class FrameRingBuffer:
+    """
+    Bounded ring of reusable frame slots with a "latest frame only" read policy.
+
+    The writer fills a free slot and publishes it; the reader always receives the
+    newest published frame and every older unread frame is counted as dropped.
+    The slot handed to the reader is never overwritten until the next read.
+    """
+
+    def __init__(self, capacity: int = 4):
+        """
+        Args:
+        - capacity (int): Number of frame slots (at least 3: writing, latest, reading).
+        """
+        self.capacity = max(3, capacity)
+        self._slots: List[Optional[np.ndarray]] = [None] * self.capacity
+        self._cond = threading.Condition()
+        self._write_slot = 0
+        self._latest_slot = -1
+        self._reading_slot = -1
+        self._latest_seq = 0
+        self._read_seq = 0
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.frames_read = 0
+
+    def acquire_slot(self, shape: Tuple[int, ...], dtype: np.dtype = np.uint8) -> np.ndarray:
+        """
+        Get a writable slot that is neither the latest published frame nor the one being read.
+
+        Args:
+        - shape (Tuple[int, ...]): Frame shape; the slot is reallocated only if it changes.
+        - dtype (np.dtype): Frame dtype.
+
+        Returns:
+        - np.ndarray: Preallocated buffer to write the next frame into.
+        """
+        with self._cond:
+            slot = self._write_slot
+            while slot == self._latest_slot or slot == self._reading_slot:
+                slot = (slot + 1) % self.capacity
+            self._write_slot = slot
+
+        buffer = self._slots[slot]
+        if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self._slots[slot] = buffer
+        return buffer
+
+    def publish(self, buffer: np.ndarray) -> None:
+        """
+        Publish the slot returned by the last `acquire_slot` call as the latest frame.
+
+        Args:
+        - buffer (np.ndarray): The filled frame. If the capture backend returned a new
+          array instead of writing in place, it replaces the slot.
+        """
+        with self._cond:
+            slot = self._write_slot
+            self._slots[slot] = buffer
+            self._latest_seq += 1
+            self._latest_slot = slot
+            self._write_slot = (slot + 1) % self.capacity
+            self.frames_written += 1
+            self._cond.notify()
+
+    def get_latest(self, timeout: Optional[float] = None) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Wait for and return the newest unread frame, dropping any older unread frames.
+
+        Args:
+        - timeout (Optional[float]): Maximum time to wait in seconds (None waits forever).
+
+        Returns:
+        - Tuple[int, Optional[np.ndarray]]: Frame sequence number and frame, or (-1, None) on timeout.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._latest_seq > self._read_seq, timeout):
+                return -1, None
+
+            seq = self._latest_seq
+            self.frames_dropped += seq - self._read_seq - 1
+            self.frames_read += 1
+            self._read_seq = seq
+            self._reading_slot = self._latest_slot
+            return seq, self._slots[self._reading_slot]
+
+    def wake(self) -> None:
+        """Wake any reader blocked in `get_latest`."""
+        with self._cond:
+            self._cond.notify_all()
+
+class FrameCapture:
+    """Capture frames on a dedicated thread into a `FrameRingBuffer`."""
+
+    def __init__(self, video_source: Union[int, str], buffer_size: int = 4, max_read_failures: int = 50):
+        """
+        Args:
+        - video_source (Union[int, str]): Camera index, file path or stream URL.
+        - buffer_size (int): Number of preallocated frame slots.
+        - max_read_failures (int): Consecutive failed reads after which a file or stream source
+          counts as ended. Camera indices are retried forever.
+        """
+        self.video_source = video_source
+        self.buffer = FrameRingBuffer(buffer_size)
+        self.max_read_failures = max_read_failures
+        self._cap: Optional[cv2.VideoCapture] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = threading.Event()
+
+    @property
+    def frames_captured(self) -> int:
+        return self.buffer.frames_written
+
+    @property
+    def frames_dropped(self) -> int:
+        return self.buffer.frames_dropped
+
+    @property
+    def frames_processed(self) -> int:
+        return self.buffer.frames_read
+
+    def start(self) -> bool:
+        """
+        Open the video source and start the capture thread.
+
+        Returns:
+        - bool: True if the source opened successfully, False otherwise.
+        """
+        self._cap = cv2.VideoCapture(self.video_source)
+        if not self._cap.isOpened():
+            logger.error(f"Failed to open video source {self.video_source}")
+            return False
+
+        self._running.set()
+        self._thread = threading.Thread(target=self._capture_loop, name=f"capture-{self.video_source}", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        """Stop the capture thread and release the video source."""
+        self._running.clear()
+        self.buffer.wake()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+    def is_running(self) -> bool:
+        return self._running.is_set()
+
+    def read_latest(self, timeout: Optional[float] = None) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Return the newest captured frame. The frame stays valid until the next call.
+
+        Args:
+        - timeout (Optional[float]): Maximum time to wait for a new frame in seconds.
+
+        Returns:
+        - Tuple[int, Optional[np.ndarray]]: Frame sequence number and frame, or (-1, None) if none arrived.
+        """
+        return self.buffer.get_latest(timeout)
+
+    def stats(self) -> dict:
+        """Return the capture, drop and processing counters."""
+        return {
+            'captured': self.frames_captured,
+            'dropped': self.frames_dropped,
+            'processed': self.frames_processed,
+        }
+
+    def _source_ended(self, failures: int) -> bool:
+        """
+        Decide whether a failed read means the source has no more frames.
+
+        Args:
+        - failures (int): Consecutive failed reads so far.
+
+        Returns:
+        - bool: True at the end of a file, or after `max_read_failures` failures of a file or stream.
+        """
+        if isinstance(self.video_source, int):
+            return False
+        frame_count = self._cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        if frame_count > 0 and self._cap.get(cv2.CAP_PROP_POS_FRAMES) >= frame_count:
+            return True
+        return failures >= self.max_read_failures
+
+    def _capture_loop(self) -> None:
+        shape, dtype = None, None
+        failures = 0
+        while self._running.is_set() and self._cap.isOpened():
+            if shape is None:
+                success, frame = self._cap.read()
+            else:
+                # Decode straight into a preallocated slot; OpenCV reallocates only if the size changed.
+                success, frame = self._cap.read(self.buffer.acquire_slot(shape, dtype))
+
+            if not success:
+                failures += 1
+                if self._source_ended(failures):
+                    logger.info(f"Video source {self.video_source} ended after {self.frames_captured} frames")
+                    break
+                logger.warning(f"Failed to read frame from {self.video_source}. Retrying...")
+                time.sleep(0.01)
+                continue
+
+            failures = 0
+            if shape is None:
+                slot = self.buffer.acquire_slot(frame.shape, frame.dtype)
+                np.copyto(slot, frame)
+                frame = slot
+            shape, dtype = frame.shape, frame.dtype
+            self.buffer.publish(frame)
+
+        self._running.clear()
+        self.buffer.wake()
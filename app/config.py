@@ -9,10 +9,22 @@ class FacialRecognitionConfiguration:
     PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
     MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
     INDEX_NAME = "facial-profiling"
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")  # "pinecone" or "local"
+    LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "gallery/facial-profiling")
+    LOCAL_INDEX_MODE = "exact"  # "exact" or "ivf"
+    LOCAL_INDEX_NPROBE = 8
+    LOCAL_INDEX_IVF_MIN_SIZE = 10000
     MONGO_DB_NAME = "facial_profiling"
     MONGO_DB_COLLECTION_NAME = "users"
+    MONGO_MAX_POOL_SIZE = 10
+    PINECONE_POOL_THREADS = 4
+    UPSERT_BATCH_SIZE = 100
     FEATURE_VECTOR_DIMENSION = 512
     FACIAL_SIMILARITY_THRESHOLD = 0.5
+    IDENTITY_CACHE_SIZE = 256
+    IDENTITY_CACHE_TTL = 300.0
+    EMBEDDING_BATCH_SIZE = 32
+    EMBEDDING_DETECTOR_BACKEND = "opencv"
 
     # Servo tracking constants
     SERIAL_PORT = 'COM7'
@@ -25,13 +37,77 @@ class FacialRecognitionConfiguration:
     TILT_MIN = 2250
     PAN_START = 2560
     TILT_START = 2625
-    STEP_SIZE = 15
-    X_THRESHOLD = 100
-    Y_THRESHOLD = 50
+    PAN_SERVO_ID = 2
+    TILT_SERVO_ID = 1
+    SERVO_MAX_WRITE_RATE = 50.0  # Sync writes per second; also limited by the bus time of one packet
+    SERVO_REOPEN_INTERVAL = 5.0  # Seconds between attempts to open the servo port after a failure
+    SERVO_MAX_RETRIES = 5  # Consecutive failed writes after which a failed setpoint is no longer retried
+    SERVO_RETRY_MAX_DELAY = 0.5  # Upper bound in seconds of the exponential back-off between writes after failures
+    SERVO_ERROR_LOG_INTERVAL = 5.0  # Minimum seconds between logged servo write failures
+    SERVO_ENABLED = os.getenv("SERVO_ENABLED", "0") == "1"  # Follow the first confirmed face with the pan/tilt servos
+    PAN_ANGLE_MIN = -47.5  # Azimuth in degrees at PAN_MIN (see the pan mapping in the README)
+    PAN_ANGLE_MAX = 97.5
+    TILT_ANGLE_MIN = -10.0  # Elevation in degrees at TILT_MIN (see the tilt mapping in the README)
+    TILT_ANGLE_MAX = 50.0
+    PAN_DIRECTION = 1  # 1 if the pan position increases as the face moves right in the image, else -1
+    TILT_DIRECTION = 1  # 1 if the tilt position increases as the face moves down in the image, else -1
+    CAMERA_HFOV = 70.0  # Horizontal field of view in degrees
+    CAMERA_VFOV = 43.0
+    PAN_TILT_KP = 0.5  # Fraction of the distance to the target commanded per frame
+    PAN_TILT_KI = 0.2
+    PAN_TILT_KFF = 0.5
+    PAN_TILT_LATENCY = 0.12  # Seconds from frame capture until a command has moved the servos
+    PAN_TILT_DEADBAND = 12  # Servo units (about 1 degree)
+    PAN_TILT_MIN_STEP = 20  # Servo units; smaller corrections are not sent
+    PAN_TILT_INTEGRAL_LIMIT = 100.0  # Servo units x seconds
 
     # Recognition constants
     MIN_DETECTION_CONFIDENCE = 0.5
+    DETECTION_PYRAMID = (640,)  # Detection widths, coarse to fine; 0 is native resolution
+    DETECTION_WORKERS = min(4, os.cpu_count() or 1)  # Shared by all cameras in multi-camera mode
     MAX_AGE = 10
+    TRACKER_BACKEND = os.getenv("TRACKER_BACKEND", "deepsort")  # "deepsort", "deepsort_lite" or "sort"
+    TRACKER_N_INIT = 3
+    SORT_IOU_THRESHOLD = 0.3
+    SORT_HIGH_SCORE = 0.7
+    PATCH_EMBEDDING_SIZE = 8
     IMAGE_SAVE_DIR = "recognition"
+    PERSIST_FACE_IMAGES = False
     FACE_IMG_SAVE_LIMIT = 5
-    FRAME_SKIP = 2
+    QUALITY_PATIENCE = 5  # Offers without a top-K improvement before crops are embedded
+    QUALITY_MAX_OFFERS = 30
+    QUALITY_MIN_SCORE = 0.05
+    QUALITY_SHARPNESS_REFERENCE = 100.0  # Laplacian variance scored as 0.5
+    QUALITY_FACE_SIZE = 112  # Face box side scored as full size
+    TARGET_FRAME_TIME = 1 / 30
+    DETECTION_MAX_STRIDE = 5  # Also capped at MAX_AGE // 2
+    DETECTION_UNCERTAINTY_THRESHOLD = 0.2
+    EMBEDDING_REFRESH_CROPS = 3  # New top-K crops that are embedded and folded into a recognized track's vector
+    EMBEDDING_MAX_COUNT = 30  # Feature vectors after which a track's vector is no longer refined
+    EMBEDDING_DRIFT_THRESHOLD = 0.05  # Cosine distance from the last queried vector that triggers a new lookup
+    RECOGNITION_WORKERS = 2
+    RECOGNITION_QUEUE_SIZE = 8
+    ENROLL_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+    # Capture constants
+    CAPTURE_BUFFER_SIZE = 4
+    CAPTURE_READ_TIMEOUT = 1.0
+    CAMERA_STATS_INTERVAL = 10.0
+
+    # Replay constants
+    REPLAY_DECODE_AHEAD = 8  # Decoded frames buffered ahead of processing
+    REPLAY_OUTPUT = "replay.jsonl"
+
+    # Frame sink constants
+    FRAME_SINK = os.getenv("FRAME_SINK", "window")  # "none", "window", "file:<path>", "shm:<name>" or "mjpeg[:<port>]"
+    SINK_FPS = 30.0
+    SHM_SLOTS = 4
+    MJPEG_PORT = 8080
+    MJPEG_QUALITY = 80
+
+    # Metrics constants
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))  # 0 disables the HTTP endpoint
+    METRICS_JSON_PATH = os.getenv("METRICS_JSON_PATH")
+    METRICS_JSON_INTERVAL = 10.0
+    METRICS_WINDOW = 1024
@@ -0,0 +1,224 @@
+"""Predictive PID pan/tilt controller mapping tracked face positions to servo setpoints."""
+
+import math
+import time
+import logging
+from collections import deque
+from typing import Any, Deque, Optional, Tuple
+
+from .config import FacialRecognitionConfiguration as Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def units_per_degree(position_min: int, position_max: int, angle_min: float, angle_max: float) -> float:
+    """
+    Servo position units per degree from a servo's position range and the angle range it covers.
+
+    Args:
+    - position_min (int): Servo position at `angle_min`.
+    - position_max (int): Servo position at `angle_max`.
+    - angle_min (float): Lower end of the angle range in degrees.
+    - angle_max (float): Upper end of the angle range in degrees.
+
+    Returns:
+    - float: Position units per degree.
+    """
+    return (position_max - position_min) / (angle_max - angle_min)
+
+def focal_length(size: int, fov: float) -> float:
+    """
+    Focal length in pixels of a pinhole camera.
+
+    Args:
+    - size (int): Image width (or height) in pixels.
+    - fov (float): Horizontal (or vertical) field of view in degrees.
+
+    Returns:
+    - float: Focal length in pixels.
+    """
+    return size / 2 / math.tan(math.radians(fov) / 2)
+
+class AxisController:
+    """
+    PI control of one servo towards the predicted target position, in servo units.
+
+    Each update moves the command a fraction `kp` of the way to the target, so
+    steps shrink as the servo converges and a slightly wrong latency estimate
+    does not make it oscillate. The integral of the observed error (target
+    minus the pose the target was seen from) removes steady offsets such as a
+    miscalibrated field of view; it is clamped and frozen while the output
+    saturates (anti-windup). Observed errors inside the deadband hold the
+    current command and do not accumulate.
+    """
+
+    def __init__(self, position_min: int, position_max: int, kp: float = Config.PAN_TILT_KP,
+                 ki: float = Config.PAN_TILT_KI, deadband: float = Config.PAN_TILT_DEADBAND,
+                 integral_limit: float = Config.PAN_TILT_INTEGRAL_LIMIT):
+        """
+        Args:
+        - position_min (int): Lowest servo position.
+        - position_max (int): Highest servo position.
+        - kp (float): Fraction of the remaining distance to the target commanded per update.
+        - ki (float): Integral gain in 1/s.
+        - deadband (float): Observed errors smaller than this (in servo units) are ignored.
+        - integral_limit (float): Bound on the integral of the error (servo units x seconds).
+        """
+        self.position_min = position_min
+        self.position_max = position_max
+        self.kp = kp
+        self.ki = ki
+        self.deadband = deadband
+        self.integral_limit = integral_limit
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear the integral."""
+        self._integral = 0.0
+
+    def update(self, target: float, pose: float, position: float, dt: float) -> float:
+        """
+        Compute the next position command.
+
+        Args:
+        - target (float): Predicted target position in servo units.
+        - pose (float): Servo position when the target was observed.
+        - position (float): Currently commanded position.
+        - dt (float): Seconds since the last update.
+
+        Returns:
+        - float: The new commanded position, within the servo's range.
+        """
+        observed_error = target - pose
+        if abs(observed_error) < self.deadband:
+            return position
+
+        integral = max(-self.integral_limit, min(self.integral_limit, self._integral + observed_error * dt))
+        command = position + self.kp * (target - position) + self.ki * integral
+        clamped = max(self.position_min, min(self.position_max, command))
+        if clamped == command:
+            self._integral = integral
+        return clamped
+
+class PanTiltController:
+    """
+    Keep a tracked face centred by commanding the pan and tilt servos.
+
+    Pixel offsets from the image centre are turned into angles with a pinhole
+    model of the camera (`CAMERA_HFOV`/`CAMERA_VFOV`) and into servo units with
+    the angle ranges of the pan and tilt mappings. Since the camera moves with
+    the servos, the offset seen in a frame is relative to where the camera
+    pointed when the frame was captured, `latency` seconds ago; adding it to
+    the position commanded at that time gives the target's absolute position,
+    so moves already under way are not commanded twice.
+
+    The target is led by the tracker's Kalman velocity x `latency` (velocity
+    feed-forward) before the per-axis PI control. Commands smaller than
+    `min_step` units are not sent, so the bus only sees moves that matter.
+    """
+
+    def __init__(self, hfov: float = Config.CAMERA_HFOV, vfov: float = Config.CAMERA_VFOV,
+                 latency: float = Config.PAN_TILT_LATENCY, feed_forward: float = Config.PAN_TILT_KFF,
+                 min_step: int = Config.PAN_TILT_MIN_STEP, velocity_smoothing: float = 0.5):
+        """
+        Args:
+        - hfov (float): Horizontal field of view of the camera in degrees.
+        - vfov (float): Vertical field of view of the camera in degrees.
+        - latency (float): Seconds from frame capture until a command has moved the servos.
+        - feed_forward (float): Gain of the velocity feed-forward.
+        - min_step (int): Smallest change in servo units worth a command.
+        - velocity_smoothing (float): Weight of the newest sample in the moving average of the target velocity.
+        """
+        self.hfov = hfov
+        self.vfov = vfov
+        self.latency = latency
+        self.feed_forward = feed_forward
+        self.min_step = min_step
+        self.velocity_smoothing = velocity_smoothing
+        self.pan_units = Config.PAN_DIRECTION * units_per_degree(Config.PAN_MIN, Config.PAN_MAX,
+                                                                  Config.PAN_ANGLE_MIN, Config.PAN_ANGLE_MAX)
+        self.tilt_units = Config.TILT_DIRECTION * units_per_degree(Config.TILT_MIN, Config.TILT_MAX,
+                                                                    Config.TILT_ANGLE_MIN, Config.TILT_ANGLE_MAX)
+        self.pan = AxisController(Config.PAN_MIN, Config.PAN_MAX)
+        self.tilt = AxisController(Config.TILT_MIN, Config.TILT_MAX)
+        self.commands = 0
+
+        self._history: Deque[Tuple[float, int, int]] = deque()
+        self._target_id: Optional[Any] = None
+        self._last_time: Optional[float] = None
+        self._velocity = (0.0, 0.0)
+
+    def reset(self) -> None:
+        """Forget the target, e.g. when no face is tracked."""
+        self.pan.reset()
+        self.tilt.reset()
+        self._target_id = None
+        self._last_time = None
+        self._velocity = (0.0, 0.0)
+
+    def update(self, track: Any, img_width: int, img_height: int, current_pan: int, current_tilt: int,
+               now: Optional[float] = None) -> Optional[Tuple[int, int]]:
+        """
+        Compute the pan/tilt command that centres a track.
+
+        Args:
+        - track (Any): Track to follow, with a DeepSort-style Kalman `mean` ([cx, cy, a, h] and their velocities per frame).
+        - img_width (int): Width of the frame.
+        - img_height (int): Height of the frame.
+        - current_pan (int): Currently commanded pan position.
+        - current_tilt (int): Currently commanded tilt position.
+        - now (Optional[float]): Capture time of the frame (`time.perf_counter()` if None).
+
+        Returns:
+        - Optional[Tuple[int, int]]: New (pan, tilt) positions, or None if the servos should stay where they are.
+        """
+        now = time.perf_counter() if now is None else now
+        if not self._history or self._history[-1][1:] != (current_pan, current_tilt):
+            self._history.append((now, current_pan, current_tilt))
+        if track.track_id != self._target_id:
+            self.reset()
+            self._target_id = track.track_id
+
+        dt = now - self._last_time if self._last_time is not None else Config.TARGET_FRAME_TIME
+        dt = max(dt, 1e-3)
+        self._last_time = now
+
+        # Angular offset of the face from the optical axis, and degrees per pixel at that offset.
+        cx, cy, _, _, vx, vy = (float(value) for value in track.mean[:6])
+        fx, fy = focal_length(img_width, self.hfov), focal_length(img_height, self.vfov)
+        u, v = cx - img_width / 2, cy - img_height / 2
+        pan_error = math.degrees(math.atan2(u, fx))
+        tilt_error = math.degrees(math.atan2(v, fy))
+
+        # Where the camera pointed when the frame was captured, and the target's absolute position in servo units.
+        pose_pan, pose_tilt = self._pose_at(now - self.latency)
+        target_pan = pose_pan + pan_error * self.pan_units
+        target_tilt = pose_tilt + tilt_error * self.tilt_units
+
+        # Kalman image velocity (pixels per frame) in servo units per second. It is relative to the moving
+        # camera, so the lead corrects the motion the camera has not caught up with yet.
+        pan_rate = vx * math.degrees(fx / (fx * fx + u * u)) * self.pan_units / dt
+        tilt_rate = vy * math.degrees(fy / (fy * fy + v * v)) * self.tilt_units / dt
+        alpha = self.velocity_smoothing
+        self._velocity = (
+            (1 - alpha) * self._velocity[0] + alpha * pan_rate,
+            (1 - alpha) * self._velocity[1] + alpha * tilt_rate,
+        )
+
+        lead = self.feed_forward * self.latency
+        pan = self.pan.update(target_pan + self._velocity[0] * lead, pose_pan, current_pan, dt)
+        tilt = self.tilt.update(target_tilt + self._velocity[1] * lead, pose_tilt, current_tilt, dt)
+        pan, tilt = int(round(pan)), int(round(tilt))
+        if abs(pan - current_pan) < self.min_step and abs(tilt - current_tilt) < self.min_step:
+            return None
+
+        self._history.append((now, pan, tilt))
+        self.commands += 1
+        return pan, tilt
+
+    def _pose_at(self, timestamp: float) -> Tuple[int, int]:
+        # Drop history older than the last command issued before `timestamp`; it is the pose at that time.
+        while len(self._history) > 1 and self._history[1][0] <= timestamp:
+            self._history.popleft()
+        _, pan, tilt = self._history[0]
+        return pan, tilt
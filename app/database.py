@@ -1,37 +1,141 @@
 """Database operations for facial recognition system."""
 
 import logging
-from pinecone import Pinecone, ServerlessSpec
+import threading
 import numpy as np
-from pymongo import MongoClient
 from bson.objectid import ObjectId
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Sequence, Union
 from .config import FacialRecognitionConfiguration as Config
+from .local_store import LocalVectorIndex
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-pc = Pinecone(api_key=Config.PINECONE_API_KEY)
-client = MongoClient(Config.MONGO_URI)
-db = client[Config.MONGO_DB_NAME]
-collection = db[Config.MONGO_DB_COLLECTION_NAME]
-
-if Config.INDEX_NAME not in pc.list_indexes().names():
-    pc.create_index(
-        name=Config.INDEX_NAME,
-        dimension=Config.FEATURE_VECTOR_DIMENSION,
-        metric="cosine",
-        spec=ServerlessSpec(
-            cloud="aws",
-            region="us-east-1"
-        )
-    )
+class StorageBackend:
+    """
+    Vector index and MongoDB collection used by the database operations.
+
+    Connections are made on first use rather than at import time, and either
+    side can be injected (e.g. a `LocalVectorIndex` or `InMemoryCollection`)
+    to run without network services.
+    """
+
+    def __init__(self, index: Optional[Any] = None, collection: Optional[Any] = None):
+        """
+        Args:
+        - index (Optional[Any]): Object with Pinecone-style `upsert` and `query`; connected from config if None.
+        - collection (Optional[Any]): pymongo-style collection; connected from config if None.
+        """
+        self._index = index
+        self._collection = collection
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> Any:
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._connect_index()
+        return self._index
+
+    @property
+    def collection(self) -> Any:
+        if self._collection is None:
+            with self._lock:
+                if self._collection is None:
+                    from pymongo import MongoClient
+
+                    self._client = MongoClient(Config.MONGO_URI, maxPoolSize=Config.MONGO_MAX_POOL_SIZE)
+                    self._collection = self._client[Config.MONGO_DB_NAME][Config.MONGO_DB_COLLECTION_NAME]
+                    logger.info(f"Connected to MongoDB collection {Config.MONGO_DB_NAME}.{Config.MONGO_DB_COLLECTION_NAME}")
+        return self._collection
+
+    def query_many(self, vectors: List[List[float]], top_k: int = 1) -> List[Dict[str, Any]]:
+        """
+        Query the vector index for many vectors with as few round trips as the index allows.
+
+        Local indexes answer with one matrix product; Pinecone queries are issued
+        concurrently on the index's connection pool.
+
+        Args:
+        - vectors (List[List[float]]): Query vectors.
+        - top_k (int): Number of matches to return per query.
+
+        Returns:
+        - List[Dict[str, Any]]: One query result per input vector, in input order.
+        """
+        index = self.index
+        if hasattr(index, 'query_batch'):
+            return index.query_batch(vectors, top_k=top_k)
+
+        pending = [index.query(vector=vector, top_k=top_k, async_req=True) for vector in vectors]
+        return [request.get() for request in pending]
+
+    def close(self) -> None:
+        """Close the MongoDB connection pool if this backend opened one."""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+            self._collection = None
+
+    @staticmethod
+    def _connect_index() -> Any:
+        if Config.VECTOR_BACKEND == "local":
+            return LocalVectorIndex(
+                Config.LOCAL_INDEX_PATH,
+                Config.FEATURE_VECTOR_DIMENSION,
+                mode=Config.LOCAL_INDEX_MODE,
+                nprobe=Config.LOCAL_INDEX_NPROBE,
+                ivf_min_size=Config.LOCAL_INDEX_IVF_MIN_SIZE
+            )
 
-index = pc.Index(Config.INDEX_NAME)
+        from pinecone import Pinecone, ServerlessSpec
+
+        pc = Pinecone(api_key=Config.PINECONE_API_KEY)
+        if Config.INDEX_NAME not in pc.list_indexes().names():
+            pc.create_index(
+                name=Config.INDEX_NAME,
+                dimension=Config.FEATURE_VECTOR_DIMENSION,
+                metric="cosine",
+                spec=ServerlessSpec(
+                    cloud="aws",
+                    region="us-east-1"
+                )
+            )
+
+        logger.info(f"Connected to Pinecone index {Config.INDEX_NAME}")
+        return pc.Index(Config.INDEX_NAME, pool_threads=Config.PINECONE_POOL_THREADS)
+
+_backend: Optional[StorageBackend] = None
+
+def get_backend() -> StorageBackend:
+    """
+    Get the storage backend, creating the default one on first use.
+
+    Returns:
+    - StorageBackend: The active storage backend.
+    """
+    global _backend
+    if _backend is None:
+        _backend = StorageBackend()
+    return _backend
+
+def set_backend(backend: Optional[StorageBackend]) -> None:
+    """
+    Replace the storage backend, e.g. with local stand-ins in tests or benchmarks.
+
+    Args:
+    - backend (Optional[StorageBackend]): The new backend, or None to go back to the configured default.
+    """
+    global _backend
+    if _backend is not None and _backend is not backend:
+        _backend.close()
+    _backend = backend
 
 def insert_vector(vector: List[float], name: str, analysis: Dict[str, Any]) -> Optional[str]:
     """
-    Insert the vector into the Pinecone index and the name into the MongoDB collection.
+    Insert the vector into the vector index and the name into the MongoDB collection.
     
     Args:
     - vector (List[float]): The feature vector to insert.
@@ -46,13 +150,14 @@ def insert_vector(vector: List[float], name: str, analysis: Dict[str, Any]) -> O
         return None
 
     try:
-        mongo_record = collection.insert_one({
+        backend = get_backend()
+        mongo_record = backend.collection.insert_one({
             'name': name,
             "analysis": analysis
         })
         mongo_id = str(mongo_record.inserted_id)
 
-        index.upsert(vectors=[{"id": mongo_id, "values": vector}])
+        backend.index.upsert(vectors=[{"id": mongo_id, "values": vector}])
         logger.info(f"Inserted vector for name: {name} [Mongo ID: {mongo_id}]")
         return mongo_id
     
@@ -62,7 +167,7 @@ def insert_vector(vector: List[float], name: str, analysis: Dict[str, Any]) -> O
 
 def search_vector(vector: List[float]) -> Optional[str]:
     """
-    Search for a matching vector in the Pinecone index and return the MongoDB ID if found.
+    Search for a matching vector in the vector index and return the MongoDB ID if found.
     
     Args:
     - vector (List[float]): The feature vector to search.
@@ -75,7 +180,8 @@ def search_vector(vector: List[float]) -> Optional[str]:
         return None
 
     try:
-        results = index.query(vector=vector, top_k=1)
+        backend = get_backend()
+        results = backend.index.query(vector=vector, top_k=1)
         if not results['matches']:
             logger.info("No vectors or records exist.")
             return None
@@ -83,9 +189,9 @@ def search_vector(vector: List[float]) -> Optional[str]:
         top_match = results['matches'][0]
         if top_match['score'] > Config.FACIAL_SIMILARITY_THRESHOLD:
             match_id = top_match['id']
-            logger.info(f"Match found in Pinecone, ID: {match_id}")
+            logger.info(f"Match found in vector index, ID: {match_id}")
 
-            user_record = collection.find_one({'_id': ObjectId(match_id)})
+            user_record = backend.collection.find_one({'_id': ObjectId(match_id)})
             if user_record:
                 logger.info(f"Match found in DB, MongoDB ID: {match_id}, Name: {user_record['name']}")
                 return match_id
@@ -93,8 +199,101 @@ def search_vector(vector: List[float]) -> Optional[str]:
                 logger.info("No match found in MongoDB.")
                 return None
         else:
-            logger.info("No suitable match found in Pinecone.")
+            logger.info("No suitable match found in vector index.")
             return None
     except Exception as e:
         logger.error(f"Error searching vector: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def _as_vector_list(vectors: Union[np.ndarray, Sequence[List[float]]]) -> Optional[List[List[float]]]:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim != 2 or matrix.shape[1] != Config.FEATURE_VECTOR_DIMENSION:
+        logger.error(f"Invalid vector matrix shape: {matrix.shape}")
+        return None
+    return matrix.tolist()
+
+def insert_vectors(vectors: Union[np.ndarray, Sequence[List[float]]], names: Sequence[str],
+                   analyses: Sequence[Optional[Dict[str, Any]]]) -> List[Optional[str]]:
+    """
+    Insert many vectors with one `insert_many` into MongoDB and batched upserts into the vector index.
+
+    Args:
+    - vectors (Union[np.ndarray, Sequence[List[float]]]): Matrix of feature vectors, one row per person.
+    - names (Sequence[str]): The name of each person.
+    - analyses (Sequence[Optional[Dict[str, Any]]]): The DeepFace analysis of each person.
+
+    Returns:
+    - List[Optional[str]]: The MongoDB ID of each inserted record, aligned with the input, or None for all rows if insertion failed.
+    """
+    vector_list = _as_vector_list(vectors)
+    if vector_list is None or not (len(vector_list) == len(names) == len(analyses)):
+        logger.error("Vectors, names and analyses must be the same length.")
+        return [None] * len(names)
+    if not vector_list:
+        return []
+
+    try:
+        backend = get_backend()
+        mongo_result = backend.collection.insert_many(
+            [{'name': name, 'analysis': analysis} for name, analysis in zip(names, analyses)],
+            ordered=True
+        )
+        mongo_ids = [str(inserted_id) for inserted_id in mongo_result.inserted_ids]
+
+        for start in range(0, len(mongo_ids), Config.UPSERT_BATCH_SIZE):
+            end = start + Config.UPSERT_BATCH_SIZE
+            backend.index.upsert(vectors=[
+                {"id": mongo_id, "values": vector} for mongo_id, vector in zip(mongo_ids[start:end], vector_list[start:end])
+            ])
+
+        logger.info(f"Inserted {len(mongo_ids)} vectors")
+        return mongo_ids
+
+    except Exception as e:
+        logger.error(f"Error inserting vectors: {e}")
+        return [None] * len(names)
+
+def search_vectors(vectors: Union[np.ndarray, Sequence[List[float]]]) -> List[Optional[str]]:
+    """
+    Search for many vectors at once and return the MongoDB ID of each match.
+
+    Matched IDs are verified against MongoDB with a single `$in` lookup.
+
+    Args:
+    - vectors (Union[np.ndarray, Sequence[List[float]]]): Matrix of feature vectors to search.
+
+    Returns:
+    - List[Optional[str]]: The MongoDB ID of the matching record for each input row, or None where there is no match.
+    """
+    vector_list = _as_vector_list(vectors)
+    if vector_list is None:
+        return [None] * len(vectors)
+    if not vector_list:
+        return []
+
+    try:
+        backend = get_backend()
+        results = backend.query_many(vector_list, top_k=1)
+        candidates = [
+            result['matches'][0]['id']
+            if result['matches'] and result['matches'][0]['score'] > Config.FACIAL_SIMILARITY_THRESHOLD else None
+            for result in results
+        ]
+
+        matched_ids = {match_id for match_id in candidates if match_id is not None}
+        if not matched_ids:
+            logger.info(f"No suitable matches found for {len(vector_list)} vectors.")
+            return [None] * len(vector_list)
+
+        records = backend.collection.find(
+            {'_id': {'$in': [ObjectId(match_id) for match_id in matched_ids]}},
+            {'_id': 1}
+        )
+        existing_ids = {str(record['_id']) for record in records}
+        matches = [match_id if match_id in existing_ids else None for match_id in candidates]
+        logger.info(f"Matched {sum(match is not None for match in matches)} of {len(vector_list)} vectors")
+        return matches
+
+    except Exception as e:
+        logger.error(f"Error searching vectors: {e}")
+        return [None] * len(vector_list)
@@ -0,0 +1,63 @@
+"""DeepSort tracker backends, imported by `create_tracker` only when a DeepSort backend is selected."""
+
+import numpy as np
+from deep_sort_realtime.deepsort_tracker import DeepSort
+from deep_sort_realtime.deep_sort.track import Track
+from typing import Any, List, Optional, Sequence, Union
+
+from .config import FacialRecognitionConfiguration as Config
+from .trackers import patch_embeddings, to_raw_detections, valid_boxes
+
+def camera_track_class(camera: str) -> type:
+    """
+    Make a DeepSort track class whose IDs are prefixed with the camera name.
+
+    Every tracker numbers its tracks from 1, so IDs are made unique across
+    cameras before they key recognition jobs, caches and crop directories.
+
+    Args:
+    - camera (str): Camera name, e.g. "cam0".
+
+    Returns:
+    - type: Track subclass to pass as DeepSort's `override_track_class`.
+    """
+    class CameraTrack(Track):
+        def __init__(self, mean: np.ndarray, covariance: np.ndarray, track_id: str, *args: Any, **kwargs: Any):
+            super().__init__(mean, covariance, f"{camera}-{track_id}", *args, **kwargs)
+
+    return CameraTrack
+
+class DeepSortTracker(DeepSort):
+    """
+    DeepSort that accepts the detection arrays produced by `FaceDetector`.
+
+    Each matched track's `others` holds its detection row (box, score and keypoints).
+
+    With `supplied_embeddings`, DeepSort's CNN embedder is not loaded and
+    `patch_embeddings` are passed in instead.
+    """
+
+    def __init__(self, max_age: int = Config.MAX_AGE, supplied_embeddings: bool = False, camera: Optional[str] = None):
+        """
+        Args:
+        - max_age (int): Frames a track survives without a matching detection.
+        - supplied_embeddings (bool): Use `patch_embeddings` instead of DeepSort's default CNN embedder.
+        - camera (Optional[str]): Camera name to prefix track IDs with.
+        """
+        super().__init__(
+            max_age=max_age,
+            n_init=Config.TRACKER_N_INIT,
+            embedder=None if supplied_embeddings else "mobilenet",
+            override_track_class=camera_track_class(camera) if camera else None
+        )
+        self.supplied_embeddings = supplied_embeddings
+
+    def update_tracks(self, raw_detections: Union[np.ndarray, Sequence], embeds: Optional[Sequence] = None,
+                      frame: Optional[np.ndarray] = None, **kwargs: Any) -> List[Track]:
+        if isinstance(raw_detections, np.ndarray):
+            boxes = valid_boxes(raw_detections)
+            if embeds is None and self.supplied_embeddings:
+                embeds = patch_embeddings(frame, boxes)
+            raw_detections = to_raw_detections(boxes)
+            kwargs.setdefault('others', list(boxes))
+        return super().update_tracks(raw_detections, embeds=embeds, frame=frame, **kwargs)
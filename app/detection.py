@@ -0,0 +1,178 @@
+"""Face detection on downscaled frames with boxes mapped back to native resolution."""
+
+import cv2
+import asyncio
+import logging
+import threading
+import numpy as np
+import mediapipe as mp
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Sequence, Tuple
+
+from .config import FacialRecognitionConfiguration as Config
+from .metrics import metrics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Detection rows are [x, y, w, h, score, right_eye_x, right_eye_y, left_eye_x, left_eye_y, nose_x, nose_y].
+DETECTION_COLUMNS = 11
+_KEYPOINTS = (0, 1, 2)  # MediaPipe keypoint indexes of the right eye, left eye and nose tip
+
+class FaceDetector:
+    """
+    Run MediaPipe face detection at a fixed, configurable resolution.
+
+    Each frame is resized once into a preallocated buffer and converted to RGB
+    in place, so detection cost does not depend on the camera resolution.
+    MediaPipe returns boxes relative to the image, which are scaled by the
+    native frame size to give boxes for tracking and full-resolution crops.
+    With several pyramid widths, the coarsest level runs first and finer
+    levels only run while nothing has been found.
+    """
+
+    def __init__(self, face_detection: Optional[mp.solutions.face_detection.FaceDetection] = None,
+                 pyramid: Sequence[int] = Config.DETECTION_PYRAMID):
+        """
+        Args:
+        - face_detection (Optional[mp.solutions.face_detection.FaceDetection]): MediaPipe model; created from config if None.
+        - pyramid (Sequence[int]): Detection widths in pixels, coarse to fine. 0 means native resolution.
+        """
+        if face_detection is None:
+            face_detection = mp.solutions.face_detection.FaceDetection(min_detection_confidence=Config.MIN_DETECTION_CONFIDENCE)
+        self.face_detection = face_detection
+        self.pyramid = tuple(pyramid) or (0,)
+        self._buffers: Dict[Tuple[int, int, int], Tuple[Optional[np.ndarray], np.ndarray]] = {}
+        self._boxes = np.empty((16, DETECTION_COLUMNS), dtype=np.float32)
+
+    def detect(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Detect faces in a BGR frame.
+
+        Args:
+        - frame (np.ndarray): Input frame at native resolution.
+
+        Returns:
+        - np.ndarray: (N, DETECTION_COLUMNS) float32 array of [x, y, w, h, score, eye and nose keypoints] rows
+          in native-resolution pixels. It is a view of a reused buffer and is only valid until the next call.
+        """
+        img_height, img_width = frame.shape[:2]
+        for width in self.pyramid:
+            with metrics.timer('detection_preprocess'):
+                frame_rgb = self._prepare(frame, width)
+            with metrics.timer('face_detection'):
+                results = self.face_detection.process(frame_rgb)
+            if results.detections:
+                return self._to_boxes(results.detections, img_width, img_height)
+        return self._boxes[:0]
+
+    def _prepare(self, frame: np.ndarray, width: int) -> np.ndarray:
+        img_height, img_width = frame.shape[:2]
+        if width <= 0 or width >= img_width:
+            width, height = img_width, img_height
+        else:
+            height = max(1, round(img_height * width / img_width))
+
+        key = (width, img_width, img_height)
+        buffers = self._buffers.get(key)
+        if buffers is None:
+            resized = np.empty((height, width, 3), dtype=np.uint8) if width != img_width else None
+            buffers = (resized, np.empty((height, width, 3), dtype=np.uint8))
+            self._buffers[key] = buffers
+            logger.info(f"Detecting faces at {width}x{height} for {img_width}x{img_height} frames")
+
+        resized, frame_rgb = buffers
+        if resized is not None:
+            cv2.resize(frame, (width, height), dst=resized, interpolation=cv2.INTER_AREA)
+            frame = resized
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame_rgb)
+        return frame_rgb
+
+    def _to_boxes(self, detections: Sequence, img_width: int, img_height: int) -> np.ndarray:
+        if len(detections) > len(self._boxes):
+            self._boxes = np.empty((2 * len(detections), DETECTION_COLUMNS), dtype=np.float32)
+        boxes = self._boxes[:len(detections)]
+        for i, detection in enumerate(detections):
+            bboxC = detection.location_data.relative_bounding_box
+            boxes[i, :5] = (bboxC.xmin * img_width, bboxC.ymin * img_height, bboxC.width * img_width,
+                            bboxC.height * img_height, detection.score[0])
+            keypoints = detection.location_data.relative_keypoints
+            for column, keypoint in zip(range(5, DETECTION_COLUMNS, 2), _KEYPOINTS):
+                boxes[i, column] = keypoints[keypoint].x * img_width
+                boxes[i, column + 1] = keypoints[keypoint].y * img_height
+        np.trunc(boxes[:, :4], out=boxes[:, :4])
+        return boxes
+
+class InlineDetector:
+    """
+    Awaitable face detection on the calling thread, for a single video source.
+
+    It has the same `detect` coroutine as `DetectionPool`, so `process_frame`
+    awaits either one; detection blocks the event loop while it runs.
+    """
+
+    def __init__(self, detector: Optional[FaceDetector] = None):
+        """
+        Args:
+        - detector (Optional[FaceDetector]): Detector to run; created from config if None.
+        """
+        self.detector = detector if detector is not None else FaceDetector()
+
+    async def detect(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Detect faces in a BGR frame.
+
+        Args:
+        - frame (np.ndarray): Input frame at native resolution.
+
+        Returns:
+        - np.ndarray: (N, DETECTION_COLUMNS) float32 detection rows in native-resolution pixels,
+          valid until the next call (see `FaceDetector.detect`).
+        """
+        return self.detector.detect(frame)
+
+    def shutdown(self) -> None:
+        """Nothing to stop; present for symmetry with `DetectionPool`."""
+
+class DetectionPool:
+    """
+    Face detection shared by several cameras on a pool of worker threads.
+
+    Each worker thread owns a `FaceDetector` (MediaPipe graphs are not
+    thread-safe), and MediaPipe releases the GIL while it runs, so detection
+    for different cameras proceeds in parallel on separate cores. Requests
+    are served first-come first-served; with each camera waiting for its own
+    result before submitting its next frame, cameras are served round-robin.
+    """
+
+    def __init__(self, workers: int = Config.DETECTION_WORKERS):
+        """
+        Args:
+        - workers (int): Number of detection threads.
+        """
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="face-detection")
+        self._local = threading.local()
+
+    async def detect(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Detect faces in a BGR frame on one of the worker threads.
+
+        Args:
+        - frame (np.ndarray): Input frame at native resolution. It must not be modified until this returns.
+
+        Returns:
+        - np.ndarray: (N, DETECTION_COLUMNS) float32 detection rows in native-resolution pixels.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._detect, frame)
+
+    def shutdown(self) -> None:
+        """Wait for pending detections and stop the worker threads."""
+        self._executor.shutdown(wait=True)
+
+    def _detect(self, frame: np.ndarray) -> np.ndarray:
+        detector = getattr(self._local, 'detector', None)
+        if detector is None:
+            detector = self._local.detector = FaceDetector()
+        # The detector reuses its output buffer for the next camera's frame.
+        return detector.detect(frame).copy()
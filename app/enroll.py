@@ -0,0 +1,129 @@
+"""Offline enrollment of a gallery from a directory tree of face images."""
+
+import os
+import cv2
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import FacialRecognitionConfiguration as Config
+from .vector import get_feature_vector, analyze_features
+from .database import insert_vectors
+from .recognition import warm_models
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+def find_people(root: str) -> Dict[str, List[str]]:
+    """
+    Collect image paths per person from a `person_name/*.png` directory tree.
+
+    Args:
+    - root (str): Root directory with one subdirectory per person.
+
+    Returns:
+    - Dict[str, List[str]]: Sorted image paths for each person name.
+    """
+    people = {}
+    for name in sorted(os.listdir(root)):
+        person_dir = os.path.join(root, name)
+        if not os.path.isdir(person_dir):
+            continue
+        paths = [os.path.join(person_dir, filename) for filename in sorted(os.listdir(person_dir))
+                 if filename.lower().endswith(IMAGE_EXTENSIONS)]
+        if paths:
+            people[name] = paths
+    return people
+
+def _embed_person(name: str, paths: List[str], analyze: bool) -> Tuple[str, Optional[List[float]], Optional[Dict[str, Any]], int]:
+    """
+    Detect, align and embed all images of one person inside a worker process.
+
+    Args:
+    - name (str): The person's name.
+    - paths (List[str]): Paths to the person's images.
+    - analyze (bool): Whether to run facial analysis on the first image.
+
+    Returns:
+    - Tuple[str, Optional[List[float]], Optional[Dict[str, Any]], int]: Name, average feature vector,
+      analysis and number of images processed.
+    """
+    images = []
+    for path in paths:
+        image = cv2.imread(path)
+        if image is not None:
+            images.append(image)
+        else:
+            logger.error(f"Failed to read image {path}")
+
+    feature_vector = get_feature_vector(images) if images else None
+    analysis = analyze_features(images) if analyze and images else None
+    return name, feature_vector.tolist() if feature_vector is not None else None, analysis, len(images)
+
+def enroll_directory(root: str, workers: int = Config.ENROLL_WORKERS, analyze: bool = False) -> Dict[str, Optional[str]]:
+    """
+    Enroll everyone under `root` into the configured vector store and MongoDB.
+
+    Each person's images are embedded in a process pool and averaged like
+    `get_feature_vector` does; the results are written with bulk inserts.
+
+    Args:
+    - root (str): Root directory with one subdirectory of images per person.
+    - workers (int): Number of worker processes.
+    - analyze (bool): Whether to store DeepFace analysis for each person.
+
+    Returns:
+    - Dict[str, Optional[str]]: MongoDB ID of each enrolled person, or None if enrollment failed.
+    """
+    people = find_people(root)
+    total_images = sum(len(paths) for paths in people.values())
+    logger.info(f"Enrolling {len(people)} people from {total_images} images with {workers} workers")
+
+    enrolled: Dict[str, Optional[str]] = {}
+    pending_names, pending_vectors, pending_analyses = [], [], []
+    images_done = 0
+    start_time = time.perf_counter()
+
+    def flush() -> None:
+        if pending_names:
+            for name, mongo_id in zip(pending_names, insert_vectors(pending_vectors, pending_names, pending_analyses)):
+                enrolled[name] = mongo_id
+            pending_names.clear()
+            pending_vectors.clear()
+            pending_analyses.clear()
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=warm_models, initargs=(analyze,)) as pool:
+        futures = [pool.submit(_embed_person, name, paths, analyze) for name, paths in people.items()]
+        for future in as_completed(futures):
+            try:
+                name, feature_vector, analysis, image_count = future.result()
+            except Exception as e:
+                logger.error(f"Failed to enroll a person: {e}")
+                continue
+
+            images_done += image_count
+            if feature_vector is None:
+                logger.warning(f"No feature vector generated for {name}")
+                enrolled[name] = None
+            else:
+                pending_names.append(name)
+                pending_vectors.append(feature_vector)
+                pending_analyses.append(analysis)
+                if len(pending_names) >= Config.UPSERT_BATCH_SIZE:
+                    flush()
+
+            elapsed = time.perf_counter() - start_time
+            logger.info(f"[{len(enrolled) + len(pending_names)}/{len(people)}] {name}: "
+                        f"{images_done / elapsed:.1f} images/s")
+
+    flush()
+    elapsed = time.perf_counter() - start_time
+    succeeded = sum(mongo_id is not None for mongo_id in enrolled.values())
+    logger.info(f"Enrolled {succeeded} of {len(people)} people from {images_done} images in {elapsed:.1f}s "
+                f"({images_done / max(elapsed, 1e-9):.1f} images/s)")
+    return enrolled
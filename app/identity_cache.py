@@ -0,0 +1,109 @@
+"""In-process cache of recently recognized identities."""
+
+import time
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from .config import FacialRecognitionConfiguration as Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class IdentityCache:
+    """
+    TTL/LRU cache of recent embeddings and the identities they resolved to.
+
+    New tracks are matched against the cached embeddings by cosine similarity
+    before going to the vector store, so a person who was recognized seconds
+    ago under another track ID (e.g. after a brief occlusion) is re-identified
+    without a remote query.
+    """
+
+    def __init__(self, max_size: int = Config.IDENTITY_CACHE_SIZE, ttl: float = Config.IDENTITY_CACHE_TTL,
+                 threshold: float = Config.FACIAL_SIMILARITY_THRESHOLD):
+        """
+        Args:
+        - max_size (int): Maximum number of identities kept; the least recently used is evicted.
+        - ttl (float): Seconds an identity stays cached after it was last seen.
+        - threshold (float): Minimum cosine similarity for a cache hit.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def match(self, vector: List[float]) -> Optional[str]:
+        """
+        Find a cached identity similar to the given feature vector.
+
+        Args:
+        - vector (List[float]): The feature vector to match.
+
+        Returns:
+        - Optional[str]: The cached identity ID, or None on a miss.
+        """
+        query = self._normalize(vector)
+        with self._lock:
+            self._expire()
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            if self._matrix is None:
+                self._matrix_ids = list(self._entries)
+                self._matrix = np.stack([self._entries[identity_id][0] for identity_id in self._matrix_ids])
+
+            scores = self._matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] <= self.threshold:
+                self.misses += 1
+                return None
+
+            identity_id = self._matrix_ids[best]
+            self._entries[identity_id] = (self._entries[identity_id][0], time.monotonic() + self.ttl)
+            self._entries.move_to_end(identity_id)
+            self.hits += 1
+            logger.info(f"Identity cache hit: {identity_id} (similarity {scores[best]:.3f})")
+            return identity_id
+
+    def put(self, identity_id: str, vector: List[float]) -> None:
+        """
+        Cache the embedding of a resolved identity.
+
+        Args:
+        - identity_id (str): The identity (MongoDB) ID.
+        - vector (List[float]): The feature vector it was resolved from.
+        """
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[identity_id] = (self._normalize(vector), expires_at)
+            self._entries.move_to_end(identity_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        while self._entries:
+            identity_id, (_, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            del self._entries[identity_id]
+            self._matrix = None
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
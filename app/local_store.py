@@ -0,0 +1,334 @@
+"""In-process stand-ins for the remote vector index and record store."""
+
+import os
+import logging
+import threading
+import numpy as np
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class LocalVectorIndex:
+    """
+    In-process cosine similarity index exposing the subset of the Pinecone `Index` API used here.
+
+    Vectors are stored L2-normalized in a float32 matrix backed by a memory-mapped
+    `.npy` file, with IDs in an append-only text file next to it. Two search modes
+    are supported:
+
+    - "exact": brute-force cosine similarity over the whole matrix.
+    - "ivf": inverted file index; vectors are clustered with k-means and only the
+      `nprobe` closest clusters are scanned. Small galleries fall back to exact search.
+    """
+
+    def __init__(self, path: Optional[str], dimension: int, mode: str = "exact",
+                 nprobe: int = 8, ivf_min_size: int = 10000):
+        """
+        Args:
+        - path (Optional[str]): File prefix for persistence, or None to keep the index in memory.
+        - dimension (int): Vector dimension.
+        - mode (str): "exact" or "ivf".
+        - nprobe (int): Number of clusters scanned per query in "ivf" mode.
+        - ivf_min_size (int): Gallery size below which "ivf" mode searches exhaustively.
+        """
+        if mode not in ("exact", "ivf"):
+            raise ValueError(f"Unknown local index mode: {mode}")
+
+        self.path = path
+        self.dimension = dimension
+        self.mode = mode
+        self.nprobe = nprobe
+        self.ivf_min_size = ivf_min_size
+
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._vectors = np.empty((0, dimension), dtype=np.float32)
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._trained_size = 0
+        self._indexed_size = 0
+        self._stale: Set[int] = set()
+
+        if path is not None:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def upsert(self, vectors: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Insert or overwrite vectors.
+
+        Args:
+        - vectors (List[Dict[str, Any]]): Records of the form {"id": str, "values": List[float]}.
+
+        Returns:
+        - Dict[str, int]: {"upserted_count": number of vectors written}.
+        """
+        with self._lock:
+            new_ids = []
+            for record in vectors:
+                vector = self._normalize(np.asarray(record["values"], dtype=np.float32))
+                vector_id = str(record["id"])
+                row = self._rows.get(vector_id)
+                if row is None:
+                    row = len(self._ids)
+                    self._reserve(row + 1)
+                    self._ids.append(vector_id)
+                    self._rows[vector_id] = row
+                    new_ids.append(vector_id)
+                elif row < self._indexed_size:
+                    # The row sits in the IVF list of its old vector; move it on the next query.
+                    self._stale.add(row)
+                self._vectors[row] = vector
+
+            self._persist(new_ids)
+            return {"upserted_count": len(vectors)}
+
+    def query(self, vector: List[float], top_k: int = 1, **kwargs: Any) -> Dict[str, Any]:
+        """
+        Find the most similar stored vectors.
+
+        Args:
+        - vector (List[float]): Query vector.
+        - top_k (int): Number of matches to return.
+
+        Returns:
+        - Dict[str, Any]: {"matches": [{"id": str, "score": float}, ...]} sorted by descending cosine similarity.
+        """
+        query = self._normalize(np.asarray(vector, dtype=np.float32))
+        with self._lock:
+            count = len(self._ids)
+            if count == 0:
+                return {"matches": []}
+
+            candidates = self._candidates(query) if self.mode == "ivf" and count >= self.ivf_min_size else None
+            matrix = self._vectors[:count] if candidates is None else self._vectors[candidates]
+            scores = matrix @ query
+
+            k = min(top_k, len(scores))
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            rows = best if candidates is None else candidates[best]
+            return {"matches": [{"id": self._ids[row], "score": float(scores[i])} for i, row in zip(best, rows)]}
+
+    def query_batch(self, vectors: Sequence[List[float]], top_k: int = 1) -> List[Dict[str, Any]]:
+        """
+        Find the most similar stored vectors for many queries at once.
+
+        Args:
+        - vectors (Sequence[List[float]]): Query vectors.
+        - top_k (int): Number of matches to return per query.
+
+        Returns:
+        - List[Dict[str, Any]]: One `query`-style result per input vector, in input order.
+        """
+        if self.mode == "ivf" and len(self._ids) >= self.ivf_min_size:
+            return [self.query(vector, top_k) for vector in vectors]
+
+        queries = np.stack([self._normalize(np.asarray(vector, dtype=np.float32)) for vector in vectors]) \
+            if len(vectors) else np.empty((0, self.dimension), dtype=np.float32)
+        with self._lock:
+            count = len(self._ids)
+            if count == 0:
+                return [{"matches": []} for _ in range(len(queries))]
+
+            scores = queries @ self._vectors[:count].T
+            k = min(top_k, count)
+            best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(scores, best, axis=1)
+            order = np.argsort(-best_scores, axis=1)
+            best = np.take_along_axis(best, order, axis=1)
+            best_scores = np.take_along_axis(best_scores, order, axis=1)
+            return [
+                {"matches": [{"id": self._ids[row], "score": float(score)} for row, score in zip(rows, row_scores)]}
+                for rows, row_scores in zip(best, best_scores)
+            ]
+
+    def _candidates(self, query: np.ndarray) -> np.ndarray:
+        if self._centroids is None or len(self._ids) >= 2 * self._trained_size:
+            self._train()
+        else:
+            if self._stale:
+                self._reassign(np.fromiter(self._stale, dtype=np.int64, count=len(self._stale)))
+            if len(self._ids) > self._indexed_size:
+                self._assign(self._indexed_size, len(self._ids))
+
+        probe = np.argsort(-(self._centroids @ query))[:self.nprobe]
+        return np.concatenate([self._lists[c] for c in probe])
+
+    def _train(self, iterations: int = 8, sample_per_list: int = 32) -> None:
+        count = len(self._ids)
+        nlist = max(1, int(np.sqrt(count)))
+        rng = np.random.default_rng(0)
+        sample = self._vectors[rng.choice(count, size=min(count, nlist * sample_per_list), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            members = np.zeros((len(sample), nlist), dtype=np.float32)
+            members[np.arange(len(sample)), assignments] = 1.0
+            sums = members.T @ sample
+            filled = members.any(axis=0)
+            centroids[filled] = sums[filled]
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+        self._centroids = centroids
+        self._lists = [np.empty(0, dtype=np.int64) for _ in range(nlist)]
+        self._indexed_size = 0
+        self._trained_size = count
+        self._stale.clear()
+        self._assign(0, count)
+        logger.info(f"Trained IVF index with {nlist} lists over {count} vectors")
+
+    def _assign(self, start: int, end: int, chunk: int = 8192) -> None:
+        for chunk_start in range(start, end, chunk):
+            chunk_end = min(end, chunk_start + chunk)
+            assignments = np.argmax(self._vectors[chunk_start:chunk_end] @ self._centroids.T, axis=1)
+            order = np.argsort(assignments, kind="stable")
+            lists, bounds = np.unique(assignments[order], return_index=True)
+            for c, rows in zip(lists, np.split(order + chunk_start, bounds[1:])):
+                self._lists[c] = np.concatenate([self._lists[c], rows])
+        self._indexed_size = end
+
+    def _reassign(self, rows: np.ndarray) -> None:
+        self._lists = [members[~np.isin(members, rows)] for members in self._lists]
+        assignments = np.argmax(self._vectors[rows] @ self._centroids.T, axis=1)
+        for c in np.unique(assignments):
+            self._lists[c] = np.concatenate([self._lists[c], rows[assignments == c]])
+        self._stale.clear()
+
+    def _normalize(self, vector: np.ndarray) -> np.ndarray:
+        if vector.shape != (self.dimension,):
+            raise ValueError(f"Expected vector of dimension {self.dimension}, got shape {vector.shape}")
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._vectors)
+        if size <= capacity:
+            return
+
+        capacity = max(size, 2 * capacity, 1024)
+        if self.path is None:
+            vectors = np.empty((capacity, self.dimension), dtype=np.float32)
+        else:
+            tmp_path = f"{self.path}.vectors.tmp.npy"
+            vectors = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32,
+                                                shape=(capacity, self.dimension))
+        vectors[:len(self._ids)] = self._vectors[:len(self._ids)]
+
+        if self.path is not None:
+            vectors.flush()
+            del vectors
+            self._vectors = None
+            os.replace(tmp_path, f"{self.path}.vectors.npy")
+            vectors = np.load(f"{self.path}.vectors.npy", mmap_mode="r+")
+        self._vectors = vectors
+
+    def _persist(self, new_ids: List[str]) -> None:
+        if self.path is None:
+            return
+        self._vectors.flush()
+        if new_ids:
+            with open(f"{self.path}.ids", "a", encoding="utf-8") as f:
+                f.writelines(f"{vector_id}\n" for vector_id in new_ids)
+
+    def _load(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        vectors_path = f"{self.path}.vectors.npy"
+        ids_path = f"{self.path}.ids"
+        if not os.path.exists(vectors_path) or not os.path.exists(ids_path):
+            return
+
+        with open(ids_path, encoding="utf-8") as f:
+            self._ids = [line.rstrip("\n") for line in f if line.strip()]
+        self._vectors = np.load(vectors_path, mmap_mode="r+")
+        if self._vectors.shape[1] != self.dimension or len(self._vectors) < len(self._ids):
+            raise ValueError(f"Local index at {self.path} does not match dimension {self.dimension}")
+        self._rows = {vector_id: row for row, vector_id in enumerate(self._ids)}
+        logger.info(f"Loaded local index with {len(self._ids)} vectors from {self.path}")
+
+class InMemoryCollection:
+    """Dict-backed stand-in for the subset of a pymongo collection used here."""
+
+    def __init__(self):
+        self._documents: Dict[Any, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def insert_one(self, document: Dict[str, Any]) -> SimpleNamespace:
+        """
+        Insert a document, assigning an `ObjectId` if it has no `_id`.
+
+        Args:
+        - document (Dict[str, Any]): The document to insert.
+
+        Returns:
+        - SimpleNamespace: Result with an `inserted_id` attribute, like pymongo's `InsertOneResult`.
+        """
+        from bson.objectid import ObjectId
+
+        document = dict(document)
+        document.setdefault('_id', ObjectId())
+        with self._lock:
+            self._documents[document['_id']] = document
+        return SimpleNamespace(inserted_id=document['_id'])
+
+    def insert_many(self, documents: List[Dict[str, Any]], ordered: bool = True) -> SimpleNamespace:
+        """
+        Insert several documents, assigning an `ObjectId` to those without an `_id`.
+
+        Args:
+        - documents (List[Dict[str, Any]]): The documents to insert.
+        - ordered (bool): Accepted for pymongo compatibility; inserts are always ordered.
+
+        Returns:
+        - SimpleNamespace: Result with an `inserted_ids` attribute, like pymongo's `InsertManyResult`.
+        """
+        return SimpleNamespace(inserted_ids=[self.insert_one(document).inserted_id for document in documents])
+
+    def find_one(self, filter: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find the first document matching an equality filter.
+
+        Args:
+        - filter (Optional[Dict[str, Any]]): Field values to match; values may use `{"$in": [...]}`.
+
+        Returns:
+        - Optional[Dict[str, Any]]: The matching document or None.
+        """
+        return next(iter(self.find(filter)), None)
+
+    def find(self, filter: Optional[Dict[str, Any]] = None, projection: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """
+        Find all documents matching an equality filter.
+
+        Args:
+        - filter (Optional[Dict[str, Any]]): Field values to match; values may use `{"$in": [...]}`.
+        - projection (Optional[Any]): Accepted for pymongo compatibility; whole documents are returned.
+
+        Returns:
+        - List[Dict[str, Any]]: The matching documents.
+        """
+        filter = filter or {}
+        with self._lock:
+            if set(filter) == {'_id'} and not isinstance(filter['_id'], dict):
+                document = self._documents.get(filter['_id'])
+                return [document] if document is not None else []
+            return [document for document in self._documents.values() if self._matches(document, filter)]
+
+    @staticmethod
+    def _matches(document: Dict[str, Any], filter: Dict[str, Any]) -> bool:
+        for field, condition in filter.items():
+            value = document.get(field)
+            if isinstance(condition, dict) and '$in' in condition:
+                if value not in condition['$in']:
+                    return False
+            elif value != condition:
+                return False
+        return True
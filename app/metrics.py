@@ -0,0 +1,242 @@
+"""Low-overhead latency and queue depth metrics for the live pipeline."""
+
+import json
+import time
+import bisect
+import logging
+import threading
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from .config import FacialRecognitionConfiguration as Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds.
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """Cumulative bucketed histogram plus a rolling window of recent samples."""
+
+    __slots__ = ('counts', 'sum', 'count', 'window', 'window_index', '_lock')
+
+    def __init__(self, window: int):
+        """
+        Args:
+        - window (int): Number of most recent samples kept for rolling percentiles.
+        """
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.window = np.zeros(window, dtype=np.float64)
+        self.window_index = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+            self.sum += seconds
+            self.count += 1
+            self.window[self.window_index % len(self.window)] = seconds
+            self.window_index += 1
+
+    def recent(self) -> np.ndarray:
+        with self._lock:
+            return self.window[:min(self.window_index, len(self.window))].copy()
+
+class _Timer:
+    __slots__ = ('_histogram', '_start')
+
+    def __init__(self, histogram: Histogram):
+        self._histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._histogram.observe((time.perf_counter_ns() - self._start) / 1e9)
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+_NULL_TIMER = _NullTimer()
+
+class MetricsRegistry:
+    """
+    Registry of per-stage latency histograms and gauges.
+
+    When disabled, `timer` returns a shared no-op context manager and `set_gauge`
+    returns immediately, so instrumentation costs a single attribute check.
+    """
+
+    def __init__(self, enabled: bool = Config.METRICS_ENABLED, window: int = Config.METRICS_WINDOW):
+        """
+        Args:
+        - enabled (bool): Whether to record anything.
+        - window (int): Number of recent samples per stage kept for rolling percentiles.
+        """
+        self.enabled = enabled
+        self.window = window
+        self._histograms: Dict[str, Histogram] = {}
+        self._gauges: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._dump_stop = threading.Event()
+
+    def timer(self, stage: str) -> Any:
+        """
+        Time a block with a monotonic clock.
+
+        Args:
+        - stage (str): Stage name, e.g. "face_detection".
+
+        Returns:
+        - Any: Context manager recording the elapsed time of the block.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self._histogram(stage))
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """
+        Record a duration measured elsewhere.
+
+        Args:
+        - stage (str): Stage name.
+        - seconds (float): Duration in seconds.
+        """
+        if self.enabled:
+            self._histogram(stage).observe(seconds)
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """
+        Set a gauge such as a queue depth.
+
+        Args:
+        - name (str): Gauge name.
+        - value (float): Current value.
+        """
+        if self.enabled:
+            self._gauges[name] = value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Summarize all metrics.
+
+        Returns:
+        - Dict[str, Any]: Per-stage totals and rolling p50/p95/p99 in milliseconds, and gauge values.
+        """
+        stages = {}
+        for stage, histogram in list(self._histograms.items()):
+            recent = histogram.recent()
+            stage_summary = {'count': histogram.count, 'mean_ms': 1000 * histogram.sum / max(histogram.count, 1)}
+            if len(recent):
+                p50, p95, p99 = np.percentile(recent, [50, 95, 99]) * 1000
+                stage_summary.update({'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)})
+            stages[stage] = stage_summary
+        return {'timestamp': time.time(), 'stages': stages, 'gauges': dict(self._gauges)}
+
+    def render_prometheus(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+        - str: Metrics text.
+        """
+        lines = ["# TYPE facial_profiling_stage_seconds histogram"]
+        for stage, histogram in sorted(self._histograms.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'facial_profiling_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'facial_profiling_stage_seconds_sum{{stage="{stage}"}} {histogram.sum}')
+            lines.append(f'facial_profiling_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        lines.append("# TYPE facial_profiling_gauge gauge")
+        for name, value in sorted(self._gauges.items()):
+            lines.append(f'facial_profiling_gauge{{name="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port: int = Config.METRICS_PORT) -> None:
+        """
+        Serve `render_prometheus()` at http://0.0.0.0:<port>/metrics from a background thread.
+        If the port cannot be bound, the error is logged and metrics are not served.
+
+        Args:
+        - port (int): Port to listen on.
+        """
+        if not self.enabled or self._server is not None:
+            return
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+        except OSError as e:
+            logger.error(f"Failed to serve metrics on port {port}: {e}")
+            return
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info(f"Serving metrics at http://0.0.0.0:{port}/metrics")
+
+    def start_json_dump(self, path: str = Config.METRICS_JSON_PATH, interval: float = Config.METRICS_JSON_INTERVAL) -> None:
+        """
+        Periodically write `snapshot()` as JSON to a file from a background thread.
+
+        Args:
+        - path (str): Output file path, rewritten on every dump.
+        - interval (float): Seconds between dumps.
+        """
+        if not self.enabled or not path:
+            return
+
+        def dump_loop() -> None:
+            while not self._dump_stop.wait(interval):
+                try:
+                    with open(path, "w", encoding="utf-8") as f:
+                        json.dump(self.snapshot(), f)
+                except OSError as e:
+                    logger.error(f"Failed to write metrics to {path}: {e}")
+
+        threading.Thread(target=dump_loop, name="metrics-json", daemon=True).start()
+        logger.info(f"Writing metrics to {path} every {interval}s")
+
+    def stop(self) -> None:
+        """Stop the HTTP server and the JSON dump thread."""
+        self._dump_stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+    def _histogram(self, stage: str) -> Histogram:
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram(self.window))
+        return histogram
+
+metrics = MetricsRegistry()
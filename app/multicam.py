@@ -0,0 +1,197 @@
+"""Run several video sources in one process with shared detection and recognition workers."""
+
+import time
+import asyncio
+import logging
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from .config import FacialRecognitionConfiguration as Config
+from .capture import FrameCapture
+from .detection import DetectionPool
+from .scheduler import DetectionScheduler
+from .trackers import create_tracker
+from .sinks import FrameSink, NullSink, WindowSink, create_sink
+from .servo_tracking import process_frame, TrackHandler, TrackDeletedHandler
+from .metrics import metrics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def parse_source(source: str) -> Union[int, str]:
+    """
+    Parse a video source given on the command line.
+
+    Args:
+    - source (str): Camera index, file path or stream URL.
+
+    Returns:
+    - Union[int, str]: The camera index as an int, otherwise the string unchanged.
+    """
+    return int(source) if source.isdigit() else source
+
+def camera_sink(spec: str, index: int, camera_count: int) -> FrameSink:
+    """
+    Create the frame sink of one camera from a sink spec shared by all cameras.
+
+    File paths and shared memory names get the camera index appended and MJPEG
+    ports are offset by it; each camera gets its own window.
+
+    Args:
+    - spec (str): Sink spec as accepted by `create_sink`.
+    - index (int): Camera index.
+    - camera_count (int): Number of cameras.
+
+    Returns:
+    - FrameSink: The camera's sink.
+    """
+    if camera_count == 1:
+        return create_sink(spec)
+
+    kind, _, arg = spec.partition(":")
+    kind = kind.strip().lower()
+    if kind == "window":
+        return WindowSink(f"Camera {index}")
+    if kind == "file" and arg:
+        root, dot, extension = arg.rpartition(".")
+        return create_sink(f"file:{root}-cam{index}.{extension}" if dot else f"file:{arg}-cam{index}")
+    if kind == "shm" and arg:
+        return create_sink(f"shm:{arg}-cam{index}")
+    if kind == "mjpeg":
+        return create_sink(f"mjpeg:{(int(arg) if arg else Config.MJPEG_PORT) + index}")
+    return create_sink(spec)
+
+class CameraPipeline:
+    """Capture thread, tracker, detection scheduler and sink of one video source."""
+
+    def __init__(self, index: int, source: Union[int, str], sink: Optional[FrameSink] = None):
+        """
+        Args:
+        - index (int): Camera index, used to name the camera ("cam0", "cam1", ...).
+        - source (Union[int, str]): Camera index, file path or stream URL.
+        - sink (Optional[FrameSink]): Destination for annotated frames (default: headless).
+        """
+        self.name = f"cam{index}"
+        self.source = source
+        self.capture = FrameCapture(source, buffer_size=Config.CAPTURE_BUFFER_SIZE)
+        self.tracker = create_tracker(camera=self.name)
+        self.scheduler = DetectionScheduler()
+        self.sink = sink if sink is not None else NullSink()
+        self.frame_count = 0
+        self.fps = 0.0
+
+        self._fps_frames = 0
+        self._fps_start = time.perf_counter()
+
+    async def run(self, face_detector: DetectionPool, stop: asyncio.Event, track_handler: Optional[TrackHandler] = None,
+                  track_deleted_handler: Optional[TrackDeletedHandler] = None) -> None:
+        """
+        Process the newest frame of this camera until it ends or `stop` is set.
+
+        Args:
+        - face_detector (DetectionPool): Detection workers shared by all cameras.
+        - stop (asyncio.Event): Set to stop all cameras; this camera sets it when its sink asks to stop.
+        - track_handler (Optional[TrackHandler]): Coroutine called for each confirmed track.
+        - track_deleted_handler (Optional[TrackDeletedHandler]): Called with the ID of each deleted track.
+        """
+        if not self.capture.start():
+            logger.error(f"{self.name}: failed to open video source {self.source}")
+            self.sink.close()
+            return
+
+        current_pan, current_tilt = Config.PAN_START, Config.TILT_START
+        display = None
+        logger.info(f"{self.name}: processing video source {self.source}")
+        try:
+            while self.capture.is_running() and not stop.is_set():
+                _, frame = await asyncio.to_thread(self.capture.read_latest, Config.CAPTURE_READ_TIMEOUT)
+                if frame is None:
+                    continue
+
+                self.frame_count += 1
+                if self.sink.wants_frames and (display is None or display.shape != frame.shape):
+                    display = np.empty_like(frame)
+                # Wall time: it includes waiting for the shared detection pool and recognition batches
+                # behind other cameras, so it is recorded per camera and not as 'process_frame'.
+                with metrics.timer(f'{self.name}_process_frame_wall'):
+                    frame, current_pan, current_tilt = await process_frame(
+                        frame, face_detector, self.tracker, current_pan, current_tilt, self.frame_count,
+                        track_handler, track_deleted_handler, self.scheduler, display
+                    )
+                self._update_fps()
+                if self.sink.wants_frames and not self.sink.write(frame):
+                    stop.set()
+        except Exception as e:
+            logger.error(f"{self.name}: error during video processing: {e}")
+        finally:
+            self.capture.stop()
+            self.sink.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get this camera's statistics.
+
+        Returns:
+        - Dict[str, Any]: Source, FPS over the last interval, and capture, detection and sink counters.
+        """
+        return {
+            'source': self.source,
+            'fps': self.fps,
+            'capture': self.capture.stats(),
+            'detection': self.scheduler.stats(),
+            'sink': self.sink.stats(),
+        }
+
+    def _update_fps(self) -> None:
+        self._fps_frames += 1
+        elapsed = time.perf_counter() - self._fps_start
+        if elapsed >= 1.0:
+            self.fps = self._fps_frames / elapsed
+            self._fps_frames = 0
+            self._fps_start += elapsed
+            metrics.set_gauge(f'{self.name}_fps', self.fps)
+
+async def run_cameras(sources: Sequence[Union[int, str]], track_handler: Optional[TrackHandler] = None,
+                      track_deleted_handler: Optional[TrackDeletedHandler] = None, sink: str = "none",
+                      detection_workers: int = Config.DETECTION_WORKERS) -> List[Dict[str, Any]]:
+    """
+    Process several video sources concurrently in this process.
+
+    Each source gets its own capture thread, tracker and detection scheduler.
+    Face detection runs on a `DetectionPool` shared by all cameras, and the
+    track handler's recognition jobs go to the shared recognition worker,
+    which batches embeddings across cameras.
+
+    Args:
+    - sources (Sequence[Union[int, str]]): Camera indexes, file paths or stream URLs.
+    - track_handler (Optional[TrackHandler]): Coroutine called for each confirmed track of any camera.
+    - track_deleted_handler (Optional[TrackDeletedHandler]): Called with the ID of each deleted track.
+    - sink (str): Sink spec applied per camera (see `camera_sink`).
+    - detection_workers (int): Number of shared detection threads.
+
+    Returns:
+    - List[Dict[str, Any]]: Final statistics of each camera.
+    """
+    face_detector = DetectionPool(detection_workers)
+    cameras = [CameraPipeline(i, source, camera_sink(sink, i, len(sources))) for i, source in enumerate(sources)]
+    stop = asyncio.Event()
+
+    async def report_stats() -> None:
+        while not stop.is_set():
+            await asyncio.sleep(Config.CAMERA_STATS_INTERVAL)
+            logger.info("Camera FPS: " + ", ".join(f"{camera.name} {camera.fps:.1f}" for camera in cameras))
+
+    reporter = asyncio.create_task(report_stats())
+    try:
+        await asyncio.gather(*(
+            camera.run(face_detector, stop, track_handler, track_deleted_handler) for camera in cameras
+        ))
+    finally:
+        stop.set()
+        reporter.cancel()
+        face_detector.shutdown()
+
+    stats = [camera.stats() for camera in cameras]
+    for camera, camera_stats in zip(cameras, stats):
+        logger.info(f"{camera.name} stats: {camera_stats}")
+    return stats
@@ -0,0 +1,159 @@
+"""Cheap face crop quality scoring and per-track top-K crop selection."""
+
+import cv2
+import heapq
+import logging
+import numpy as np
+from typing import Callable, List, Optional, Tuple
+
+from .config import FacialRecognitionConfiguration as Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Side length the face box is resized to before measuring sharpness, so the score does not depend on face size.
+_SHARPNESS_SIZE = 64
+
+def face_quality(frame: np.ndarray, detection: np.ndarray) -> float:
+    """
+    Score how useful a detected face is for recognition.
+
+    The score is the product of four factors in [0, 1]:
+    - sharpness: variance of the Laplacian of the face box,
+    - size: the smaller box side relative to `Config.QUALITY_FACE_SIZE`,
+    - confidence: the MediaPipe detection score,
+    - frontality: how centred the nose is between the eyes (landmark symmetry).
+
+    Args:
+    - frame (np.ndarray): BGR frame.
+    - detection (np.ndarray): Detection row from `FaceDetector` ([x, y, w, h, score] followed by eye and nose keypoints).
+
+    Returns:
+    - float: Quality score in [0, 1]; 0 for boxes outside the frame.
+    """
+    img_height, img_width = frame.shape[:2]
+    x, y, w, h = (int(value) for value in detection[:4])
+    x_start, y_start = max(0, x), max(0, y)
+    x_end, y_end = min(img_width, x + w), min(img_height, y + h)
+    if x_end - x_start < 2 or y_end - y_start < 2:
+        return 0.0
+
+    # Bilinear resizing is several times cheaper than area resizing and ranks crops of the same face the same way.
+    face = cv2.resize(frame[y_start:y_end, x_start:x_end], (_SHARPNESS_SIZE, _SHARPNESS_SIZE), interpolation=cv2.INTER_LINEAR)
+    gray = cv2.cvtColor(face, cv2.COLOR_BGR2GRAY)
+    sharpness_variance = float(cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_32F))[1][0, 0] ** 2)
+    sharpness = sharpness_variance / (sharpness_variance + Config.QUALITY_SHARPNESS_REFERENCE)
+
+    size = min(1.0, min(w, h) / Config.QUALITY_FACE_SIZE)
+    confidence = float(detection[4])
+    return sharpness * size * confidence * frontality(detection)
+
+def frontality(detection: np.ndarray) -> float:
+    """
+    Estimate how frontal a face is from its eye and nose keypoints.
+
+    Args:
+    - detection (np.ndarray): Detection row from `FaceDetector`.
+
+    Returns:
+    - float: 1 when the nose is midway between the eyes, falling to 0 as it reaches either eye;
+      1 if the detection has no keypoints.
+    """
+    if len(detection) < 11:
+        return 1.0
+    right_eye_x, left_eye_x, nose_x = detection[5], detection[7], detection[9]
+    half_eye_distance = abs(left_eye_x - right_eye_x) / 2
+    if half_eye_distance < 1e-6:
+        return 0.0
+    offset = abs(nose_x - (left_eye_x + right_eye_x) / 2)
+    return float(max(0.0, 1.0 - offset / half_eye_distance))
+
+class CropBuffer:
+    """
+    Keep the K best face crops of a track, ranked by `face_quality`.
+
+    Crops are only copied out of the frame when they make it into the top K.
+    The buffer is `ready` once it holds K crops and quality has plateaued (the
+    last `patience` offers did not make it into the top K), or after
+    `max_offers` offers so recognition is never postponed indefinitely.
+    The latest K crops kept since the last `clear_fresh` call are also
+    collected, so a recognized track can embed only its new, better crops.
+    """
+
+    def __init__(self, k: int = Config.FACE_IMG_SAVE_LIMIT, patience: int = Config.QUALITY_PATIENCE,
+                 max_offers: int = Config.QUALITY_MAX_OFFERS, min_quality: float = Config.QUALITY_MIN_SCORE):
+        """
+        Args:
+        - k (int): Number of crops kept.
+        - patience (int): Consecutive offers without improvement after which quality counts as plateaued.
+        - max_offers (int): Offers after which the buffer is ready regardless of plateau (if it has any crops).
+        - min_quality (float): Crops below this quality are never kept.
+        """
+        self.k = k
+        self.patience = patience
+        self.max_offers = max_offers
+        self.min_quality = min_quality
+        self.offers = 0
+        self.accepted = 0
+        self._stale = 0
+        self._heap: List[Tuple[float, int, np.ndarray]] = []
+        self._fresh: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def offer(self, quality: float, make_crop: Callable[[], np.ndarray]) -> Optional[np.ndarray]:
+        """
+        Offer a candidate crop.
+
+        Args:
+        - quality (float): Quality score of the candidate.
+        - make_crop (Callable[[], np.ndarray]): Produces the crop; only called if the candidate is kept.
+
+        Returns:
+        - Optional[np.ndarray]: The kept crop, or None if the candidate was rejected.
+        """
+        self.offers += 1
+        if quality < self.min_quality or (len(self._heap) >= self.k and quality <= self._heap[0][0]):
+            self._stale += 1
+            return None
+
+        crop = make_crop()
+        entry = (quality, self.accepted, crop)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        else:
+            heapq.heapreplace(self._heap, entry)
+        self._fresh.append(crop)
+        if len(self._fresh) > self.k:
+            # Later crops beat the top-K threshold at the time they arrived, so the oldest are dropped first.
+            del self._fresh[0]
+        self.accepted += 1
+        self._stale = 0
+        return crop
+
+    @property
+    def fresh(self) -> List[np.ndarray]:
+        """Up to K crops kept since the last `clear_fresh` call, oldest first; they may since have left the top K."""
+        return self._fresh
+
+    def clear_fresh(self) -> None:
+        """Forget the fresh crops, e.g. once they have been submitted for embedding."""
+        self._fresh = []
+
+    @property
+    def ready(self) -> bool:
+        """Whether the crops are good enough to embed."""
+        if len(self._heap) >= self.k and self._stale >= self.patience:
+            return True
+        return bool(self._heap) and self.offers >= self.max_offers
+
+    @property
+    def crops(self) -> List[np.ndarray]:
+        """The kept crops, best first."""
+        return [crop for _, _, crop in sorted(self._heap, key=lambda entry: (-entry[0], entry[1]))]
+
+    @property
+    def best_quality(self) -> float:
+        """Quality of the best kept crop, or 0 if empty."""
+        return max((quality for quality, _, _ in self._heap), default=0.0)
@@ -0,0 +1,197 @@
+"""Process-pool recognition stage for feature vector extraction and facial analysis."""
+
+import asyncio
+import logging
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .config import FacialRecognitionConfiguration as Config
+from .vector import get_feature_vectors, analyze_features
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def warm_models(analyze: bool = True) -> None:
+    """
+    Load Facenet512, the face detector and optionally the analysis models once per worker process.
+
+    Args:
+    - analyze (bool): Also load the Age/Gender/Race models used by `analyze_features`.
+    """
+    from deepface import DeepFace
+
+    DeepFace.build_model("Facenet512")
+    DeepFace.build_model("opencv", task="face_detector")
+    if analyze:
+        for model_name in ("Age", "Gender", "Race"):
+            DeepFace.build_model(model_name, task="facial_attribute")
+
+def _embed_batch(crops: Dict[Any, List[np.ndarray]]) -> Dict[Any, Optional[np.ndarray]]:
+    """
+    Compute the feature vectors of several tracks inside a worker process.
+
+    The crops of all tracks are embedded together in stacked forward passes.
+    Vectors are returned per crop so the caller can fold them into each
+    track's running mean (see `TrackEmbedding`).
+
+    Args:
+    - crops (Dict[Any, List[np.ndarray]]): BGR face crops for each track ID.
+
+    Returns:
+    - Dict[Any, Optional[np.ndarray]]: float32 array of shape (N, 512) with the vectors of the crops that
+      could be processed per track ID, or None if none could.
+    """
+    images, rows = [], {}
+    for track_id, track_crops in crops.items():
+        rows[track_id] = slice(len(images), len(images) + len(track_crops))
+        images.extend(track_crops)
+
+    embeddings = get_feature_vectors(images) if images else None
+    vectors = {}
+    for track_id, track_rows in rows.items():
+        track_embeddings = embeddings[track_rows] if embeddings is not None else np.empty((0, 0), np.float32)
+        track_embeddings = track_embeddings[~np.isnan(track_embeddings).any(axis=1)]
+        vectors[track_id] = track_embeddings if len(track_embeddings) else None
+    return vectors
+
+class RecognitionWorker:
+    """
+    Executor-backed recognition stage with a bounded job queue keyed by track ID.
+
+    Jobs run in a pool of processes whose models are loaded once at startup, so
+    the video loop only submits work and never waits on DeepFace. Tracks submitted
+    during the same event loop iteration are sent to a worker as one batch.
+    """
+
+    def __init__(self, max_workers: int = Config.RECOGNITION_WORKERS,
+                 max_pending: int = Config.RECOGNITION_QUEUE_SIZE):
+        """
+        Args:
+        - max_workers (int): Number of worker processes.
+        - max_pending (int): Maximum number of queued or running jobs.
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: Dict[Any, asyncio.Future] = {}
+        self._batch: Dict[Any, List[np.ndarray]] = {}
+        self._batch_jobs: Dict[Any, asyncio.Future] = {}
+
+    @property
+    def pending(self) -> int:
+        return len(self._jobs)
+
+    def start(self) -> None:
+        """Start the worker processes and begin loading their models."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=warm_models
+            )
+
+    def submit(self, track_id: Any, crops: List[np.ndarray]) -> Optional[asyncio.Future]:
+        """
+        Queue feature vector extraction for a track unless it is already queued or the queue is full.
+
+        Args:
+        - track_id (Any): ID of the track.
+        - crops (List[np.ndarray]): The track's BGR face crops.
+
+        Returns:
+        - Optional[asyncio.Future]: Future resolving to the per-crop feature vectors (or None), or None if rejected.
+        """
+        if track_id in self._jobs or len(self._jobs) >= self.max_pending:
+            return None
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._jobs[track_id] = future
+
+        def forget(done: asyncio.Future) -> None:
+            if self._jobs.get(track_id) is done:
+                del self._jobs[track_id]
+
+        future.add_done_callback(forget)
+
+        if not self._batch:
+            loop.call_soon(self._dispatch_batch)
+        self._batch[track_id] = crops
+        return future
+
+    async def analyze(self, crops: List[np.ndarray]) -> Optional[Dict[str, Any]]:
+        """
+        Run facial analysis on a track's crops in a worker process.
+
+        Analysis is only needed when a new identity is enrolled, so it is requested
+        separately from feature vector extraction.
+
+        Args:
+        - crops (List[np.ndarray]): The track's BGR face crops.
+
+        Returns:
+        - Optional[Dict[str, Any]]: Analysis results if successful, None otherwise.
+        """
+        self.start()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, analyze_features, crops)
+
+    def cancel(self, track_id: Any) -> None:
+        """
+        Cancel recognition for a track that is no longer tracked.
+
+        Queued jobs are removed; a job that is already running finishes in its
+        worker but its result is discarded.
+
+        Args:
+        - track_id (Any): ID of the track.
+        """
+        self._batch.pop(track_id, None)
+        future = self._jobs.pop(track_id, None)
+        if future is not None and not future.done():
+            future.cancel()
+            logger.info(f"Cancelled recognition for track ID {track_id}")
+
+        batch_job = self._batch_jobs.pop(track_id, None)
+        if batch_job is not None and batch_job not in self._batch_jobs.values():
+            batch_job.cancel()
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Cancel all jobs and stop the worker processes.
+
+        Args:
+        - wait (bool): Block until the worker processes have exited.
+        """
+        for track_id in list(self._jobs):
+            self.cancel(track_id)
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    def _dispatch_batch(self) -> None:
+        batch, self._batch = self._batch, {}
+        if not batch or self._executor is None:
+            return
+
+        futures = {track_id: self._jobs[track_id] for track_id in batch}
+        batch_job = asyncio.get_running_loop().run_in_executor(self._executor, _embed_batch, batch)
+        for track_id in batch:
+            self._batch_jobs[track_id] = batch_job
+        batch_job.add_done_callback(lambda done: self._resolve_batch(done, futures))
+        logger.info(f"Dispatched recognition batch for {len(batch)} tracks")
+
+    def _resolve_batch(self, batch_job: asyncio.Future, futures: Dict[Any, asyncio.Future]) -> None:
+        for track_id, future in futures.items():
+            if self._batch_jobs.get(track_id) is batch_job:
+                del self._batch_jobs[track_id]
+            if future.done():
+                continue
+            if batch_job.cancelled():
+                future.cancel()
+            elif batch_job.exception() is not None:
+                future.set_exception(batch_job.exception())
+            else:
+                future.set_result(batch_job.result().get(track_id))
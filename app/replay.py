@@ -0,0 +1,231 @@
+"""Replay recorded video through the pipeline with deterministic timing and JSONL results."""
+
+import os
+import json
+import time
+import queue
+import asyncio
+import logging
+import multiprocessing
+from typing import Any, Dict, IO, List, Optional
+
+from .config import FacialRecognitionConfiguration as Config
+from .detection import InlineDetector
+from .replay_reader import ReplayReader, segment_bounds, video_info
+from .scheduler import DetectionScheduler
+from .trackers import create_tracker
+from .servo_tracking import process_frame, TrackHandler, TrackDeletedHandler
+from .utils import extract_ltrb_from_track
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def frame_record(frame_index: int, fps: float, detected: bool, tracks: List[Any]) -> Dict[str, Any]:
+    """
+    Build the JSONL record of one frame.
+
+    Args:
+    - frame_index (int): Zero-based frame index in the video.
+    - fps (float): Frame rate of the video, used for the media timestamp.
+    - detected (bool): Whether detection ran on this frame.
+    - tracks (List[Any]): The tracker's tracks after this frame.
+
+    Returns:
+    - Dict[str, Any]: Frame index, timestamp in seconds, and the confirmed tracks with their boxes and identities.
+    """
+    confirmed = []
+    for track in tracks:
+        if not track.is_confirmed():
+            continue
+        track_info = getattr(track, 'track_info', {})
+        confirmed.append({
+            'track_id': track.track_id,
+            'box': list(extract_ltrb_from_track(track)),
+            'identity': track_info.get('identity'),
+        })
+    return {'type': 'frame', 'frame': frame_index, 'timestamp': round(frame_index / fps, 6),
+            'detected': detected, 'tracks': confirmed}
+
+async def replay_segment(path: str, output: IO[str], start: int = 0, end: Optional[int] = None,
+                         track_handler: Optional[TrackHandler] = None,
+                         track_deleted_handler: Optional[TrackDeletedHandler] = None,
+                         fps: Optional[float] = None, adaptive: bool = False,
+                         track_prefix: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Replay frames [start, end) of a video through detection, tracking and the track handler.
+
+    Frames are processed as fast as possible, or paced to `fps` frames per
+    second of wall-clock time. Frames are never dropped, and detection runs on
+    every frame unless `adaptive` is set, so the tracks in the output only
+    depend on the video. Identities are resolved asynchronously and appear in
+    the frame records once known; after the last frame, pending recognition is
+    awaited and one summary record with the final identity is written per track.
+
+    Args:
+    - path (str): Path to the video file.
+    - output (IO[str]): Text stream the JSONL records are written to.
+    - start (int): Index of the first frame.
+    - end (Optional[int]): Index one past the last frame; None for the end of the video.
+    - track_handler (Optional[TrackHandler]): Coroutine called for each confirmed track (e.g. `handle_track`).
+    - track_deleted_handler (Optional[TrackDeletedHandler]): Called with the ID of each deleted track.
+    - fps (Optional[float]): Simulated frame rate; None processes frames as fast as possible.
+    - adaptive (bool): Use the adaptive `DetectionScheduler`, whose decisions depend on measured timings.
+    - track_prefix (Optional[str]): Prefix for track IDs, e.g. the segment name.
+
+    Returns:
+    - Dict[str, Any]: Frames processed, wall time, throughput, frames processed late (paced mode) and detection stats.
+    """
+    video_fps, _ = video_info(path)
+    face_detector = InlineDetector()
+    tracker = create_tracker(camera=track_prefix)
+    scheduler = DetectionScheduler() if adaptive else None
+    current_pan, current_tilt = Config.PAN_START, Config.TILT_START
+    seen: Dict[Any, Dict[str, Any]] = {}
+    frame_count = frames_late = detections = 0
+
+    reader = ReplayReader(path, start, end)
+    reader.start_decoding()
+    start_time = time.perf_counter()
+    try:
+        while True:
+            frame_index, frame = await asyncio.to_thread(reader.read)
+            if frame is None:
+                break
+            if fps:
+                delay = start_time + frame_count / fps - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                elif delay < -1 / fps:
+                    frames_late += 1
+
+            frame_count += 1
+            _, current_pan, current_tilt = await process_frame(
+                frame, face_detector, tracker, current_pan, current_tilt, frame_count,
+                track_handler, track_deleted_handler, scheduler
+            )
+            # Record the decision process_frame acted on; asking the scheduler again could differ.
+            detected = scheduler is None or scheduler.last_detected
+            detections += detected
+
+            output.write(json.dumps(frame_record(frame_index, video_fps, detected, tracker.tracker.tracks)) + "\n")
+            for track in tracker.tracker.tracks:
+                if track.is_confirmed():
+                    summary = seen.setdefault(track.track_id, {'track': track, 'first_frame': frame_index, 'frames': 0})
+                    summary['last_frame'] = frame_index
+                    summary['frames'] += 1
+    finally:
+        reader.stop()
+    wall_time = time.perf_counter() - start_time
+
+    pending = [summary['track'].track_info['recognition_task'] for summary in seen.values()
+               if 'recognition_task' in getattr(summary['track'], 'track_info', {})]
+    if pending:
+        logger.info(f"Waiting for recognition of {len(pending)} tracks")
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    for track_id, summary in seen.items():
+        output.write(json.dumps({
+            'type': 'track', 'track_id': track_id, 'first_frame': summary['first_frame'],
+            'last_frame': summary['last_frame'], 'frames': summary['frames'],
+            'identity': getattr(summary['track'], 'track_info', {}).get('identity'),
+        }) + "\n")
+
+    return {
+        'frames': frame_count,
+        'wall_time_s': wall_time,
+        'fps': frame_count / wall_time if wall_time > 0 else 0.0,
+        'frames_late': frames_late,
+        'detections': detections,
+        'tracks': len(seen),
+    }
+
+def _replay_segment_process(path: str, output_path: str, start: int, end: int, track_handler: Optional[TrackHandler],
+                            fps: Optional[float], adaptive: bool, segment: int, results: Any) -> None:
+    with open(output_path, "w") as output:
+        stats = asyncio.run(replay_segment(path, output, start, end, track_handler, None, fps, adaptive, f"seg{segment}"))
+    results.put((segment, stats))
+
+def replay_video(path: str, output_path: str = Config.REPLAY_OUTPUT, start: int = 0, end: Optional[int] = None,
+                 track_handler: Optional[TrackHandler] = None, fps: Optional[float] = None, adaptive: bool = False,
+                 segments: int = 1) -> Dict[str, Any]:
+    """
+    Replay a video file and write per-frame track and identity results as JSONL.
+
+    With several segments, the frame range is split into contiguous segments
+    that are decoded and processed in parallel processes, each with its own
+    detector and tracker; their outputs are concatenated in frame order.
+    Tracks restart at segment boundaries and their IDs are prefixed with the
+    segment ("seg1-4"). `track_handler` must then be picklable (a module-level
+    function or a partial of one). Each segment process imports the handler's
+    module afresh, so it starts its own recognition worker pool and identity
+    cache: N segments load N x `RECOGNITION_WORKERS` model processes, and
+    segments do not share identities they resolved.
+
+    Args:
+    - path (str): Path to the video file.
+    - output_path (str): JSONL output path.
+    - start (int): Index of the first frame.
+    - end (Optional[int]): Index one past the last frame; None for the end of the video.
+    - track_handler (Optional[TrackHandler]): Coroutine called for each confirmed track (e.g. `handle_track`).
+    - fps (Optional[float]): Simulated frame rate; None processes frames as fast as possible.
+    - adaptive (bool): Use the adaptive detection scheduler instead of detecting on every frame.
+    - segments (int): Number of segments processed in parallel.
+
+    Returns:
+    - Dict[str, Any]: Totals over all segments and the statistics of each segment.
+    """
+    video_fps, frame_count = video_info(path)
+    end = frame_count if end is None or (frame_count and end > frame_count) else end
+    segments = max(1, min(segments, (end - start) if end else 1))
+    logger.info(f"Replaying {path} frames {start}-{end} ({video_fps:.2f} fps) in {segments} segment(s)")
+
+    start_time = time.perf_counter()
+    if segments == 1:
+        with open(output_path, "w") as output:
+            segment_stats = [asyncio.run(replay_segment(path, output, start, end or None, track_handler,
+                                                        fps=fps, adaptive=adaptive))]
+    else:
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        part_paths = [f"{output_path}.part{i}" for i in range(segments)]
+        processes = [
+            context.Process(target=_replay_segment_process, name=f"replay-seg{i}",
+                            args=(path, part_paths[i], segment_start, segment_end, track_handler, fps, adaptive, i, results))
+            for i, (segment_start, segment_end) in enumerate(segment_bounds(start, end, segments))
+        ]
+        for process in processes:
+            process.start()
+        stats_by_segment: Dict[int, Dict[str, Any]] = {}
+        while len(stats_by_segment) < segments:
+            try:
+                segment, stats = results.get(timeout=1.0)
+                stats_by_segment[segment] = stats
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    break
+        for process in processes:
+            process.join()
+        failed = [i for i in range(segments) if i not in stats_by_segment]
+        if failed:
+            raise RuntimeError(f"Replay of segments {failed} failed")
+
+        with open(output_path, "w") as output:
+            for part_path in part_paths:
+                with open(part_path) as part:
+                    for line in part:
+                        output.write(line)
+                os.remove(part_path)
+        segment_stats = [stats_by_segment[i] for i in range(segments)]
+    wall_time = time.perf_counter() - start_time
+
+    frames = sum(stats['frames'] for stats in segment_stats)
+    report = {
+        'source': path,
+        'output': output_path,
+        'frames': frames,
+        'wall_time_s': wall_time,
+        'fps': frames / wall_time if wall_time > 0 else 0.0,
+        'segments': segment_stats,
+    }
+    logger.info(f"Replayed {frames} frames in {wall_time:.1f}s ({report['fps']:.1f} fps), results in {output_path}")
+    return report
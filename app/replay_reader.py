@@ -0,0 +1,159 @@
+"""Frame-exact decoding of video files for replay, without the detection and recognition dependencies."""
+
+import cv2
+import queue
+import logging
+import threading
+import numpy as np
+from typing import List, Optional, Tuple
+
+from .config import FacialRecognitionConfiguration as Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def video_info(path: str) -> Tuple[float, int]:
+    """
+    Read the frame rate and frame count of a video file.
+
+    Args:
+    - path (str): Path to the video file.
+
+    Returns:
+    - Tuple[float, int]: Frames per second (`Config.SINK_FPS` if unknown) and frame count (0 if unknown).
+    """
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video {path}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or Config.SINK_FPS
+        return fps, max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+    finally:
+        cap.release()
+
+def seek(cap: cv2.VideoCapture, frame_index: int) -> bool:
+    """
+    Position a capture so that the next read returns frame `frame_index`.
+
+    The backend's seek is used when it lands on the exact frame; otherwise the
+    capture is rewound and frames are grabbed (demuxed and decoded, but not
+    converted) up to the target, which is slow but frame-accurate.
+
+    Args:
+    - cap (cv2.VideoCapture): Open capture of a video file.
+    - frame_index (int): Zero-based index of the next frame to read.
+
+    Returns:
+    - bool: False if the video ends before `frame_index`.
+    """
+    if frame_index <= 0:
+        return True
+    if cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index) and int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == frame_index:
+        return True
+
+    logger.info(f"Inexact seek to frame {frame_index}, decoding forward from the start")
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    for _ in range(frame_index):
+        if not cap.grab():
+            return False
+    return True
+
+class ReplayReader:
+    """
+    Decode frames [start, end) of a video file on a background thread.
+
+    Unlike `FrameCapture`, no frame is ever dropped: the decoder blocks once
+    `decode_ahead` frames are waiting. Frames are decoded into a fixed pool of
+    buffers, and a buffer is only reused after the next frame has been read.
+    """
+
+    def __init__(self, path: str, start: int = 0, end: Optional[int] = None, decode_ahead: int = Config.REPLAY_DECODE_AHEAD):
+        """
+        Args:
+        - path (str): Path to the video file.
+        - start (int): Index of the first frame.
+        - end (Optional[int]): Index one past the last frame; None for the end of the video.
+        - decode_ahead (int): Maximum number of decoded frames waiting to be processed.
+        """
+        self.path = path
+        self.start = start
+        self.end = end
+        self.frames_read = 0
+        self._frames: "queue.Queue[Tuple[int, Optional[np.ndarray]]]" = queue.Queue(maxsize=decode_ahead)
+        self._free: "queue.Queue[Optional[np.ndarray]]" = queue.Queue()
+        for _ in range(decode_ahead + 2):
+            self._free.put(None)
+        self._previous: Optional[np.ndarray] = None
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start_decoding(self) -> None:
+        """Start the decoder thread."""
+        self._running = True
+        self._thread = threading.Thread(target=self._decode, name="replay-decoder", daemon=True)
+        self._thread.start()
+
+    def read(self) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Read the next frame, blocking until it is decoded. The previous frame's buffer is reused from now on.
+
+        Returns:
+        - Tuple[int, Optional[np.ndarray]]: Zero-based frame index in the video and the BGR frame,
+          or (-1, None) at the end of the range.
+        """
+        index, frame = self._frames.get()
+        if self._previous is not None:
+            self._free.put(self._previous)
+        self._previous = frame
+        if frame is None:
+            self._frames.put((index, frame))
+        else:
+            self.frames_read += 1
+        return index, frame
+
+    def stop(self) -> None:
+        """Stop the decoder thread."""
+        self._running = False
+        if self._thread is None:
+            return
+        self._free.put(None)
+        while self._thread.is_alive():
+            try:
+                self._frames.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        self._thread.join()
+        self._thread = None
+
+    def _decode(self) -> None:
+        cap = cv2.VideoCapture(self.path)
+        try:
+            index = self.start
+            if not cap.isOpened() or not seek(cap, self.start):
+                logger.error(f"Cannot read {self.path} from frame {self.start}")
+                return
+            while self._running and (self.end is None or index < self.end):
+                buffer = self._free.get()
+                success, frame = cap.read(buffer) if buffer is not None else cap.read()
+                if not success:
+                    break
+                self._frames.put((index, frame))
+                index += 1
+        finally:
+            cap.release()
+            self._frames.put((-1, None))
+
+def segment_bounds(start: int, end: int, segments: int) -> List[Tuple[int, int]]:
+    """
+    Split frames [start, end) into contiguous segments of near-equal length.
+
+    Args:
+    - start (int): Index of the first frame.
+    - end (int): Index one past the last frame.
+    - segments (int): Number of segments.
+
+    Returns:
+    - List[Tuple[int, int]]: (start, end) of each segment; each segment starts where the previous one ends.
+    """
+    bounds = np.linspace(start, end, segments + 1).astype(int)
+    return [(int(bounds[i]), int(bounds[i + 1])) for i in range(segments)]
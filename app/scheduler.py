@@ -0,0 +1,123 @@
+"""Adaptive scheduling of face detection between tracker-predicted frames."""
+
+import math
+import logging
+from typing import Any, Dict, Iterable
+
+from .config import FacialRecognitionConfiguration as Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class DetectionScheduler:
+    """
+    Decide per frame whether to run face detection or only advance the tracker's Kalman filters.
+
+    Detection runs every `stride` frames. The stride is tuned from the measured
+    cost of detection frames and prediction-only frames so that the average
+    frame time meets `target_frame_time`, and is capped below the tracker's
+    `max_age` so a missed face is re-detected before its track is deleted.
+    Detection is forced on the next frame when there are no confirmed tracks,
+    when a confirmed track was missed by the last detection, or when a track's
+    position uncertainty grows past `uncertainty_threshold`.
+    """
+
+    def __init__(self, target_frame_time: float = Config.TARGET_FRAME_TIME, max_stride: int = Config.DETECTION_MAX_STRIDE,
+                 uncertainty_threshold: float = Config.DETECTION_UNCERTAINTY_THRESHOLD, max_age: int = Config.MAX_AGE,
+                 smoothing: float = 0.1):
+        """
+        Args:
+        - target_frame_time (float): Desired average seconds per frame.
+        - max_stride (int): Upper bound on frames per detection.
+        - uncertainty_threshold (float): Maximum positional standard deviation of a track, relative to its height.
+        - max_age (int): The tracker's `max_age`; the stride is kept below half of it.
+        - smoothing (float): Weight of the newest sample in the exponential moving averages of frame costs.
+        """
+        self.target_frame_time = target_frame_time
+        self.max_stride = max(1, min(max_stride, max_age // 2))
+        self.uncertainty_threshold = uncertainty_threshold
+        self.smoothing = smoothing
+        self.stride = 1
+        self.detections = 0
+        self.predictions = 0
+        self.last_detected = False  # whether detection ran on the last recorded frame
+
+        self._frames_since_detection = 0
+        self._force_detection = True
+        self._detect_time = 0.0
+        self._predict_time = 0.0
+
+    def should_detect(self, tracks: Iterable[Any]) -> bool:
+        """
+        Decide whether the next frame needs detection.
+
+        Args:
+        - tracks (Iterable[Any]): The tracker's current tracks.
+
+        Returns:
+        - bool: True to run detection, False to only predict.
+        """
+        if self._force_detection or self._frames_since_detection + 1 >= self.stride:
+            return True
+
+        confirmed = [track for track in tracks if track.is_confirmed()]
+        if not confirmed:
+            return True
+        return self._max_uncertainty(confirmed) > self.uncertainty_threshold
+
+    def record(self, detected: bool, seconds: float, tracks: Iterable[Any]) -> None:
+        """
+        Record a processed frame and retune the stride.
+
+        Args:
+        - detected (bool): Whether detection ran on the frame.
+        - seconds (float): Time spent processing the frame.
+        - tracks (Iterable[Any]): The tracker's tracks after the frame.
+        """
+        self.last_detected = detected
+        if detected:
+            self.detections += 1
+            self._frames_since_detection = 0
+            self._detect_time = self._average(self._detect_time, seconds)
+            confirmed = [track for track in tracks if track.is_confirmed()]
+            self._force_detection = not confirmed or any(track.time_since_update > 0 for track in confirmed)
+        else:
+            self.predictions += 1
+            self._frames_since_detection += 1
+            self._predict_time = self._average(self._predict_time, seconds)
+        self.stride = self._tune_stride()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get scheduling statistics.
+
+        Returns:
+        - Dict[str, float]: Current stride, detection and prediction-only frame counts, and average cost of each in milliseconds.
+        """
+        return {
+            'stride': self.stride,
+            'detections': self.detections,
+            'predictions': self.predictions,
+            'detect_ms': 1000 * self._detect_time,
+            'predict_ms': 1000 * self._predict_time,
+        }
+
+    def _tune_stride(self) -> int:
+        # Average frame time at stride N is (detect + (N - 1) * predict) / N; pick the smallest N meeting the target.
+        if self._detect_time <= self.target_frame_time:
+            return 1
+        if self._predict_time >= self.target_frame_time:
+            return self.max_stride
+        stride = math.ceil((self._detect_time - self._predict_time) / (self.target_frame_time - self._predict_time))
+        return max(1, min(self.max_stride, stride))
+
+    def _average(self, average: float, sample: float) -> float:
+        return sample if average == 0.0 else average + self.smoothing * (sample - average)
+
+    @staticmethod
+    def _max_uncertainty(tracks: Iterable[Any]) -> float:
+        # Kalman state is [cx, cy, a, h, ...]; compare the positional standard deviation to the box height.
+        return max(
+            math.sqrt(track.covariance[0, 0] + track.covariance[1, 1]) / max(float(track.mean[3]), 1.0)
+            for track in tracks
+        )
@@ -6,3 +6,4 @@ from .group_sync_write import *
 from .group_sync_read import *
 from .sms_sts import *
 from .scscl import *
+from .async_packet_handler import *
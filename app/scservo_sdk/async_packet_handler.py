@@ -0,0 +1,381 @@
+#!/usr/bin/env python
+
+import asyncio
+import weakref
+
+from .scservo_def import *
+from .protocol_packet_handler import *
+from .group_sync_read import GroupSyncRead
+from .group_sync_write import GroupSyncWrite
+
+# one transport (and lock) per PortHandler, shared by every async handler on that port
+_transports = weakref.WeakKeyDictionary()
+
+
+class AsyncPortHandler(object):
+    # asyncio transport over an open PortHandler. One lock per bus serializes transactions of
+    # async handlers: txPacket acquires it and the end of the transaction releases it, so a second
+    # coroutine waits its turn instead of getting COMM_PORT_BUSY. Synchronous handlers on the same
+    # port keep using is_using: it is set while the lock is held, and a transaction started while
+    # a synchronous one is in progress fails with COMM_PORT_BUSY, as it would in the sync SDK.
+    # Get the port's shared instance with forPort.
+    def __init__(self, portHandler):
+        self.portHandler = portHandler
+        self.lock = asyncio.Lock()
+        self._fd = None
+        self._selectable = None
+
+    @staticmethod
+    def forPort(portHandler):
+        transport = _transports.get(portHandler)
+        if transport is None:
+            transport = _transports[portHandler] = AsyncPortHandler(portHandler)
+        return transport
+
+    async def acquire(self):
+        # False if a synchronous handler is using the port
+        await self.lock.acquire()
+        if self.portHandler.is_using:
+            self.lock.release()
+            return False
+        self.portHandler.is_using = True
+        return True
+
+    def release(self):
+        if self.lock.locked():
+            self.portHandler.is_using = False
+            self.lock.release()
+
+    def writePort(self, packet):
+        return self.portHandler.writePort(packet)
+
+    async def readPort(self, length):
+        # wait until the port is readable or the packet timeout expires without blocking the
+        # event loop, then read what has arrived (up to length bytes)
+        timeout = max(0.0, self.portHandler.packet_timeout - self.portHandler.getTimeSinceStart()) / 1000.0
+        if not self.isSelectable():
+            # no readiness notification for this port/event loop (e.g. Windows): block in a worker thread
+            return await asyncio.to_thread(self.portHandler.readPort, length)
+
+        ser = self.portHandler.ser
+        if timeout > 0 and not ser.in_waiting:
+            await self.waitReadable(timeout)
+        # only read what has arrived, so the read never blocks whatever ser.timeout is set to
+        return ser.read(min(length, ser.in_waiting))
+
+    def isSelectable(self):
+        if self._selectable is None:
+            try:
+                self._fd = self.portHandler.ser.fileno()
+                loop = asyncio.get_running_loop()
+                loop.add_reader(self._fd, lambda: None)
+                loop.remove_reader(self._fd)
+                self._selectable = True
+            except (AttributeError, NotImplementedError, OSError, ValueError):
+                self._selectable = False
+        return self._selectable
+
+    async def waitReadable(self, timeout):
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+
+        def on_readable():
+            if not readable.done():
+                readable.set_result(None)
+
+        loop.add_reader(self._fd, on_readable)
+        try:
+            await asyncio.wait_for(readable, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            loop.remove_reader(self._fd)
+
+
+class async_protocol_packet_handler(protocol_packet_handler):
+    # protocol_packet_handler with awaitable transactions on an AsyncPortHandler. Packets are built
+    # and parsed by the synchronous handler's code; only the bus I/O differs. Use it with
+    # AsyncGroupSyncWrite and AsyncGroupSyncRead, whose transactions are coroutines as well.
+    def __init__(self, portHandler, protocol_end):
+        protocol_packet_handler.__init__(self, portHandler, protocol_end)
+        self.transport = AsyncPortHandler.forPort(portHandler)
+
+    async def txPacket(self, txpacket):
+        if txpacket[PKT_LENGTH] + 4 > TXPACKET_MAX_LEN:
+            return COMM_TX_ERROR
+
+        if not await self.transport.acquire():
+            return COMM_PORT_BUSY
+
+        total_packet_length = self.finishPacket(txpacket)
+        if not isinstance(txpacket, bytearray):
+            txpacket = bytearray(txpacket)
+        try:
+            written_packet_length = self.transport.writePort(memoryview(txpacket)[:total_packet_length])
+        except BaseException:
+            self.transport.release()
+            raise
+        if total_packet_length != written_packet_length:
+            self.transport.release()
+            return COMM_TX_FAIL
+
+        return COMM_SUCCESS
+
+    async def rxPacket(self):
+        try:
+            return await self.rxStatusPacket()
+        finally:
+            self.transport.release()
+
+    async def rxStatusPacket(self):
+        # receive one status packet, keeping the bus locked
+        rxpacket = bytearray()
+        wait_length = 6  # minimum length (HEADER0 HEADER1 ID LENGTH ERROR CHKSUM)
+
+        while True:
+            rxpacket += await self.transport.readPort(wait_length - len(rxpacket))
+            wait_length, result = scs_parse_status(rxpacket)
+            if result is not None:
+                return rxpacket, result
+
+            # check timeout
+            if self.portHandler.isPacketTimeout():
+                return rxpacket, COMM_RX_TIMEOUT if not rxpacket else COMM_RX_CORRUPT
+
+    async def rxStatusPacketFrom(self, scs_id):
+        # receive status packets until one from scs_id arrives or reception fails, then release the bus
+        try:
+            while True:
+                rxpacket, result = await self.rxStatusPacket()
+                if result != COMM_SUCCESS or rxpacket[PKT_ID] == scs_id:
+                    return rxpacket, result
+        finally:
+            self.transport.release()
+
+    async def txRxPacket(self, txpacket):
+        rxpacket = None
+        error = 0
+
+        # tx packet
+        result = await self.txPacket(txpacket)
+        if result != COMM_SUCCESS:
+            return rxpacket, result, error
+
+        # (ID == Broadcast ID) == no need to wait for status packet or not available
+        if (txpacket[PKT_ID] == BROADCAST_ID):
+            self.transport.release()
+            return rxpacket, result, error
+
+        # set packet timeout
+        self.portHandler.setPacketTimeout(self.rxPacketTimeout(txpacket))
+
+        # rx packet
+        rxpacket, result = await self.rxStatusPacketFrom(txpacket[PKT_ID])
+
+        if result == COMM_SUCCESS:
+            error = rxpacket[PKT_ERROR]
+
+        return rxpacket, result, error
+
+    async def ping(self, scs_id):
+        model_number = 0
+        error = 0
+
+        if scs_id >= BROADCAST_ID:
+            return model_number, COMM_NOT_AVAILABLE, error
+
+        rxpacket, result, error = await self.txRxPacket(self.makePacket(scs_id, INST_PING))
+
+        if result == COMM_SUCCESS:
+            data_read, result, error = await self.readTxRx(scs_id, 3, 2)  # Address 3 : Model Number
+            if result == COMM_SUCCESS:
+                model_number = self.scs_unpack('H', data_read)[0]
+
+        return model_number, result, error
+
+    async def action(self, scs_id):
+        _, result, _ = await self.txRxPacket(self.makePacket(scs_id, INST_ACTION))
+
+        return result
+
+    async def readTx(self, scs_id, address, length):
+        # on success the bus stays locked until readRx
+        if scs_id >= BROADCAST_ID:
+            return COMM_NOT_AVAILABLE
+
+        result = await self.txPacket(self.makePacket(scs_id, INST_READ, (address, length)))
+
+        # set packet timeout
+        if result == COMM_SUCCESS:
+            self.portHandler.setPacketTimeout(length + 6)
+
+        return result
+
+    async def readRx(self, scs_id, length):
+        error = 0
+        data = []
+
+        rxpacket, result = await self.rxStatusPacketFrom(scs_id)
+
+        if result == COMM_SUCCESS:
+            error = rxpacket[PKT_ERROR]
+
+            data = rxpacket[PKT_PARAMETER0 : PKT_PARAMETER0+length]
+
+        return data, result, error
+
+    async def readTxRx(self, scs_id, address, length):
+        data = []
+
+        if scs_id >= BROADCAST_ID:
+            return data, COMM_NOT_AVAILABLE, 0
+
+        rxpacket, result, error = await self.txRxPacket(self.makePacket(scs_id, INST_READ, (address, length)))
+        if result == COMM_SUCCESS:
+            error = rxpacket[PKT_ERROR]
+
+            data = rxpacket[PKT_PARAMETER0 : PKT_PARAMETER0+length]
+
+        return data, result, error
+
+    async def read1ByteTx(self, scs_id, address):
+        return await self.readTx(scs_id, address, 1)
+
+    async def read1ByteRx(self, scs_id):
+        return self.decodeRead(1, *await self.readRx(scs_id, 1))
+
+    async def read1ByteTxRx(self, scs_id, address):
+        return self.decodeRead(1, *await self.readTxRx(scs_id, address, 1))
+
+    async def read2ByteTx(self, scs_id, address):
+        return await self.readTx(scs_id, address, 2)
+
+    async def read2ByteRx(self, scs_id):
+        return self.decodeRead(2, *await self.readRx(scs_id, 2))
+
+    async def read2ByteTxRx(self, scs_id, address):
+        return self.decodeRead(2, *await self.readTxRx(scs_id, address, 2))
+
+    async def read4ByteTx(self, scs_id, address):
+        return await self.readTx(scs_id, address, 4)
+
+    async def read4ByteRx(self, scs_id):
+        return self.decodeRead(4, *await self.readRx(scs_id, 4))
+
+    async def read4ByteTxRx(self, scs_id, address):
+        return self.decodeRead(4, *await self.readTxRx(scs_id, address, 4))
+
+    async def writeTxOnly(self, scs_id, address, length, data):
+        result = await self.txPacket(self.makePacket(scs_id, INST_WRITE, [address] + list(data[0: length])))
+        if result == COMM_SUCCESS:
+            self.transport.release()
+
+        return result
+
+    async def writeTxRx(self, scs_id, address, length, data):
+        rxpacket, result, error = await self.txRxPacket(self.makePacket(scs_id, INST_WRITE, [address] + list(data[0: length])))
+
+        return result, error
+
+    async def write1ByteTxOnly(self, scs_id, address, data):
+        return await self.writeTxOnly(scs_id, address, 1, [data])
+
+    async def write1ByteTxRx(self, scs_id, address, data):
+        return await self.writeTxRx(scs_id, address, 1, [data])
+
+    async def write2ByteTxOnly(self, scs_id, address, data):
+        return await self.writeTxOnly(scs_id, address, 2, self.encodeWrite(2, data))
+
+    async def write2ByteTxRx(self, scs_id, address, data):
+        return await self.writeTxRx(scs_id, address, 2, self.encodeWrite(2, data))
+
+    async def write4ByteTxOnly(self, scs_id, address, data):
+        return await self.writeTxOnly(scs_id, address, 4, self.encodeWrite(4, data))
+
+    async def write4ByteTxRx(self, scs_id, address, data):
+        return await self.writeTxRx(scs_id, address, 4, self.encodeWrite(4, data))
+
+    async def regWriteTxOnly(self, scs_id, address, length, data):
+        result = await self.txPacket(self.makePacket(scs_id, INST_REG_WRITE, [address] + list(data[0: length])))
+        if result == COMM_SUCCESS:
+            self.transport.release()
+
+        return result
+
+    async def regWriteTxRx(self, scs_id, address, length, data):
+        _, result, error = await self.txRxPacket(self.makePacket(scs_id, INST_REG_WRITE, [address] + list(data[0: length])))
+
+        return result, error
+
+    async def syncReadTx(self, start_address, data_length, param, param_length):
+        # on success the bus stays locked until syncReadRx
+        txpacket = self.makeSyncPacket(INST_SYNC_READ, start_address, data_length, param, param_length)
+
+        return await self.txPacket(txpacket)
+
+    async def syncReadRx(self, data_length, param_length):
+        wait_length = (6 + data_length) * param_length
+        self.portHandler.setPacketTimeout(wait_length)
+        rxpacket = bytearray()
+        try:
+            while True:
+                rxpacket += await self.transport.readPort(wait_length - len(rxpacket))
+                if len(rxpacket) >= wait_length:
+                    result = COMM_SUCCESS
+                    break
+                # check timeout
+                if self.portHandler.isPacketTimeout():
+                    result = COMM_RX_TIMEOUT if not rxpacket else COMM_RX_CORRUPT
+                    break
+        finally:
+            self.transport.release()
+        return result, rxpacket
+
+    async def syncWriteTxOnly(self, start_address, data_length, param, param_length):
+        txpacket = self.makeSyncPacket(INST_SYNC_WRITE, start_address, data_length, param, param_length)
+
+        _, result, _ = await self.txRxPacket(txpacket)
+
+        return result
+
+
+class AsyncGroupSyncWrite(GroupSyncWrite):
+    # GroupSyncWrite for an async_protocol_packet_handler: txPacket is a coroutine
+    async def txPacket(self):
+        if len(self.data_dict.keys()) == 0:
+            return COMM_NOT_AVAILABLE
+
+        if self.is_param_changed is True or not self.param:
+            self.makeParam()
+
+        return await self.ph.syncWriteTxOnly(self.start_address, self.data_length, self.param,
+                                             len(self.data_dict.keys()) * (1 + self.data_length))
+
+
+class AsyncGroupSyncRead(GroupSyncRead):
+    # GroupSyncRead for an async_protocol_packet_handler: txPacket, rxPacket and txRxPacket are
+    # coroutines. On success txPacket keeps the bus locked until rxPacket.
+    async def txPacket(self):
+        if len(self.data_dict.keys()) == 0:
+            return COMM_NOT_AVAILABLE
+
+        if self.is_param_changed is True or not self.param:
+            self.makeParam()
+
+        return await self.ph.syncReadTx(self.start_address, self.data_length, self.param, len(self.data_dict.keys()))
+
+    async def rxPacket(self):
+        self.last_result = True
+
+        if len(self.data_dict.keys()) == 0:
+            return COMM_NOT_AVAILABLE
+
+        result, rxpacket = await self.ph.syncReadRx(self.data_length, len(self.data_dict.keys()))
+        return self.parseRx(result, rxpacket)
+
+    async def txRxPacket(self):
+        result = await self.txPacket()
+        if result != COMM_SUCCESS:
+            return result
+
+        return await self.rxPacket()
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 
 from .scservo_def import *
+from .protocol_packet_handler import scs_checksum
 
 class GroupSyncRead:
     def __init__(self, ph, start_address, data_length):
@@ -63,6 +64,10 @@ class GroupSyncRead:
             return COMM_NOT_AVAILABLE
 
         result, rxpacket = self.ph.syncReadRx(self.data_length, len(self.data_dict.keys()))
+        return self.parseRx(result, rxpacket)
+
+    def parseRx(self, result, rxpacket):
+        # split the status packets of all servos read by syncReadRx into data_dict
         # print(rxpacket)
         if len(rxpacket) >= (self.data_length+6):
             for scs_id in self.data_dict:
@@ -83,44 +88,18 @@ class GroupSyncRead:
         return self.rxPacket()
 
     def readRx(self, rxpacket, scs_id, data_length):
-        # print(scs_id)
-        # print(rxpacket)
-        data = []
+        # find this servo's status packet: HEADER0 HEADER1 ID LENGTH ERROR DATA... CHKSUM
+        header = bytes((0xFF, 0xFF, scs_id))
         rx_length = len(rxpacket)
-        # print(rx_length)
-        rx_index = 0;
-        while (rx_index+6+data_length) <= rx_length:
-            headpacket = [0x00, 0x00, 0x00]
-            while rx_index < rx_length:
-                headpacket[2] = headpacket[1];
-                headpacket[1] = headpacket[0];
-                headpacket[0] = rxpacket[rx_index];
-                rx_index += 1
-                if (headpacket[2] == 0xFF) and (headpacket[1] == 0xFF) and headpacket[0] == scs_id:
-                    # print(rx_index)
-                    break
-            # print(rx_index+3+data_length)
-            if (rx_index+3+data_length) > rx_length:
-                break;
-            if rxpacket[rx_index] != (data_length+2):
-                rx_index += 1
-                # print(rx_index)
+        rx_index = rxpacket.find(header)
+        while 0 <= rx_index and (rx_index + 6 + data_length) <= rx_length:
+            if rxpacket[rx_index + 3] != (data_length + 2):
+                rx_index = rxpacket.find(header, rx_index + 1)
                 continue
-            rx_index += 1
-            Error = rxpacket[rx_index]
-            rx_index += 1
-            calSum = scs_id + (data_length+2) + Error
-            data = [Error]
-            data.extend(rxpacket[rx_index : rx_index+data_length])
-            for i in range(0, data_length):
-                calSum += rxpacket[rx_index]
-                rx_index += 1
-            calSum = ~calSum & 0xFF
-            # print(calSum)
-            if calSum != rxpacket[rx_index]:
+            packet_length = data_length + 6
+            if rxpacket[rx_index + packet_length - 1] != scs_checksum(rxpacket[rx_index : rx_index + packet_length], packet_length):
                 return None, COMM_RX_CORRUPT
-            return data, COMM_SUCCESS 
-        # print(rx_index)
+            return rxpacket[rx_index + 4 : rx_index + 5 + data_length], COMM_SUCCESS  # ERROR DATA...
         return None, COMM_RX_CORRUPT
 
     def isAvailable(self, scs_id, address, data_length):
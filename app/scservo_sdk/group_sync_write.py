@@ -18,7 +18,7 @@ class GroupSyncWrite:
         if not self.data_dict:
             return
 
-        self.param = []
+        self.param = bytearray()
 
         for scs_id in self.data_dict:
             if not self.data_dict[scs_id]:
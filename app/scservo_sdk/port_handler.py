@@ -54,6 +54,13 @@ class PortHandler(object):
         return self.ser.in_waiting
 
     def readPort(self, length):
+        # block until `length` bytes arrived or the read timeout set by setPacketTimeout expired
+        # instead of polling; the OS wakes the read when bytes arrive, so waiting for a status
+        # packet costs no CPU. A read that starts late in the transaction may wait past the packet
+        # deadline by at most the time already elapsed; once the deadline has passed, only bytes
+        # that already arrived are read.
+        if self.getTimeSinceStart() >= self.packet_timeout:
+            length = min(length, self.ser.in_waiting)
         if (sys.version_info > (3, 0)):
             return self.ser.read(length)
         else:
@@ -65,10 +72,19 @@ class PortHandler(object):
     def setPacketTimeout(self, packet_length):
         self.packet_start_time = self.getCurrentTime()
         self.packet_timeout = (self.tx_time_per_byte * packet_length) + (self.tx_time_per_byte * 3.0) + LATENCY_TIMER
+        self.setReadTimeout()
 
     def setPacketTimeoutMillis(self, msec):
         self.packet_start_time = self.getCurrentTime()
         self.packet_timeout = msec
+        self.setReadTimeout()
+
+    def setReadTimeout(self):
+        # configure the serial read timeout once per transaction, and only when it changes:
+        # assigning ser.timeout reconfigures the port (SetCommTimeouts on Windows)
+        timeout = self.packet_timeout / 1000.0
+        if self.ser is not None and self.ser.timeout != timeout:
+            self.ser.timeout = timeout
 
     def isPacketTimeout(self):
         if self.getTimeSinceStart() > self.packet_timeout:
@@ -78,14 +94,11 @@ class PortHandler(object):
         return False
 
     def getCurrentTime(self):
-        return round(time.time() * 1000000000) / 1000000.0
+        # milliseconds on a monotonic clock, so wall clock adjustments cannot stretch or cut a timeout
+        return time.monotonic() * 1000.0
 
     def getTimeSinceStart(self):
-        time_since = self.getCurrentTime() - self.packet_start_time
-        if time_since < 0.0:
-            self.packet_start_time = self.getCurrentTime()
-
-        return time_since
+        return self.getCurrentTime() - self.packet_start_time
 
     def setupPort(self, cflag_baud):
         if self.is_open:
@@ -1,5 +1,7 @@
 #!/usr/bin/env python
 
+import struct
+
 from .scservo_def import *
 
 TXPACKET_MAX_LEN = 250
@@ -21,6 +23,48 @@ ERRBIT_OVERHEAT = 4
 ERRBIT_OVERELE = 8
 ERRBIT_OVERLOAD = 32
 
+PKT_HEADER = b'\xff\xff'
+
+
+def scs_checksum(packet, length):
+    # inverted low byte of the sum of ID, LENGTH, INSTRUCTION/ERROR and the parameters
+    return ~sum(packet[2:length - 1]) & 0xFF
+
+
+def scs_parse_status(rxpacket):
+    # drop bytes before the first plausible status packet in rxpacket (in place) and return the
+    # packet's length and COMM_SUCCESS/COMM_RX_CORRUPT, or (bytes needed, None) while it is incomplete
+    while True:
+        rx_length = len(rxpacket)
+        if rx_length < 6:  # minimum length (HEADER0 HEADER1 ID LENGTH ERROR CHKSUM)
+            return 6, None
+
+        # find packet header; without one keep the last byte, it may be the first header byte.
+        # deleting from the front of a bytearray only moves its start, so resyncing is not O(n) per byte
+        idx = rxpacket.find(PKT_HEADER)
+        if idx < 0:
+            idx = rx_length - 1
+        if idx > 0:
+            # remove unnecessary packets
+            del rxpacket[0: idx]
+            continue
+
+        if (rxpacket[PKT_ID] > 0xFD) or (rxpacket[PKT_LENGTH] > RXPACKET_MAX_LEN) or (rxpacket[PKT_ERROR] > 0x7F):
+            # unavailable ID or unavailable Length or unavailable Error
+            # remove the first byte in the packet
+            del rxpacket[0]
+            continue
+
+        # re-calculate the exact length of the rx packet
+        wait_length = rxpacket[PKT_LENGTH] + PKT_LENGTH + 1
+        if rx_length < wait_length:
+            return wait_length, None
+
+        # verify checksum
+        if rxpacket[wait_length - 1] == scs_checksum(rxpacket, wait_length):
+            return wait_length, COMM_SUCCESS
+        return wait_length, COMM_RX_CORRUPT
+
 
 class protocol_packet_handler(object):
     def __init__(self, portHandler, protocol_end):
@@ -72,7 +116,14 @@ class protocol_packet_handler(object):
             return (w >> 8) & 0xFF
         else:
             return w & 0xFF
-        
+
+    def scs_pack(self, fmt, *values):
+        # encode unsigned values in the servo's byte order, e.g. scs_pack('HH', loword, hiword)
+        return struct.pack(('>' if self.scs_end else '<') + fmt, *values)
+
+    def scs_unpack(self, fmt, data):
+        return struct.unpack_from(('>' if self.scs_end else '<') + fmt, data)
+
     def getProtocolVersion(self):
         return 1.0
 
@@ -116,17 +167,23 @@ class protocol_packet_handler(object):
 
         return ""
 
-    def txPacket(self, txpacket):
-        checksum = 0
-        total_packet_length = txpacket[PKT_LENGTH] + 4  # 4: HEADER0 HEADER1 ID LENGTH
+    def makePacket(self, scs_id, instruction, params=b''):
+        # HEADER0 HEADER1 ID LENGTH INSTRUCTION PARAMETERS... CHKSUM; txPacket fills in the header and checksum
+        txpacket = bytearray(len(params) + 6)
 
-        if self.portHandler.is_using:
-            return COMM_PORT_BUSY
-        self.portHandler.is_using = True
+        txpacket[PKT_ID] = scs_id
+        txpacket[PKT_LENGTH] = len(params) + 2
+        txpacket[PKT_INSTRUCTION] = instruction
+        txpacket[PKT_PARAMETER0: PKT_PARAMETER0 + len(params)] = params
+
+        return txpacket
+
+    def finishPacket(self, txpacket):
+        # add header and checksum; returns the packet length or COMM_TX_ERROR if it is too long
+        total_packet_length = txpacket[PKT_LENGTH] + 4  # 4: HEADER0 HEADER1 ID LENGTH
 
         # check max packet length
         if total_packet_length > TXPACKET_MAX_LEN:
-            self.portHandler.is_using = False
             return COMM_TX_ERROR
 
         # make packet header
@@ -134,16 +191,27 @@ class protocol_packet_handler(object):
         txpacket[PKT_HEADER1] = 0xFF
 
         # add a checksum to the packet
-        for idx in range(2, total_packet_length - 1):  # except header, checksum
-            checksum += txpacket[idx]
+        txpacket[total_packet_length - 1] = scs_checksum(txpacket, total_packet_length)
 
-        txpacket[total_packet_length - 1] = ~checksum & 0xFF
+        return total_packet_length
+
+    def txPacket(self, txpacket):
+        if self.portHandler.is_using:
+            return COMM_PORT_BUSY
+        self.portHandler.is_using = True
+
+        total_packet_length = self.finishPacket(txpacket)
+        if total_packet_length == COMM_TX_ERROR:
+            self.portHandler.is_using = False
+            return COMM_TX_ERROR
 
         #print "[TxPacket] %r" % txpacket
 
-        # tx packet
+        # tx packet; lists are converted once here rather than byte by byte by pyserial
+        if not isinstance(txpacket, bytearray):
+            txpacket = bytearray(txpacket)
         self.portHandler.clearPort()
-        written_packet_length = self.portHandler.writePort(txpacket)
+        written_packet_length = self.portHandler.writePort(memoryview(txpacket)[:total_packet_length])
         if total_packet_length != written_packet_length:
             self.portHandler.is_using = False
             return COMM_TX_FAIL
@@ -151,76 +219,32 @@ class protocol_packet_handler(object):
         return COMM_SUCCESS
 
     def rxPacket(self):
-        rxpacket = []
-
-        result = COMM_TX_FAIL
-        checksum = 0
-        rx_length = 0
+        rxpacket = bytearray()
         wait_length = 6  # minimum length (HEADER0 HEADER1 ID LENGTH ERROR CHKSUM)
 
+        # each readPort may block for the whole read timeout (the packet timeout), so a packet that
+        # stops arriving just before the deadline is reported up to about twice the packet timeout
+        # after the transaction started; later reads only take bytes that already arrived
         while True:
-            rxpacket.extend(self.portHandler.readPort(wait_length - rx_length))
-            rx_length = len(rxpacket)
-            if rx_length >= wait_length:
-                # find packet header
-                for idx in range(0, (rx_length - 1)):
-                    if (rxpacket[idx] == 0xFF) and (rxpacket[idx + 1] == 0xFF):
-                        break
-
-                if idx == 0:  # found at the beginning of the packet
-                    if (rxpacket[PKT_ID] > 0xFD) or (rxpacket[PKT_LENGTH] > RXPACKET_MAX_LEN) or (
-                            rxpacket[PKT_ERROR] > 0x7F):
-                        # unavailable ID or unavailable Length or unavailable Error
-                        # remove the first byte in the packet
-                        del rxpacket[0]
-                        rx_length -= 1
-                        continue
-
-                    # re-calculate the exact length of the rx packet
-                    if wait_length != (rxpacket[PKT_LENGTH] + PKT_LENGTH + 1):
-                        wait_length = rxpacket[PKT_LENGTH] + PKT_LENGTH + 1
-                        continue
-
-                    if rx_length < wait_length:
-                        # check timeout
-                        if self.portHandler.isPacketTimeout():
-                            if rx_length == 0:
-                                result = COMM_RX_TIMEOUT
-                            else:
-                                result = COMM_RX_CORRUPT
-                            break
-                        else:
-                            continue
-
-                    # calculate checksum
-                    for i in range(2, wait_length - 1):  # except header, checksum
-                        checksum += rxpacket[i]
-                    checksum = ~checksum & 0xFF
-
-                    # verify checksum
-                    if rxpacket[wait_length - 1] == checksum:
-                        result = COMM_SUCCESS
-                    else:
-                        result = COMM_RX_CORRUPT
-                    break
-
-                else:
-                    # remove unnecessary packets
-                    del rxpacket[0: idx]
-                    rx_length -= idx
+            rxpacket += self.portHandler.readPort(wait_length - len(rxpacket))
+            wait_length, result = scs_parse_status(rxpacket)
+            if result is not None:
+                break
 
-            else:
-                # check timeout
-                if self.portHandler.isPacketTimeout():
-                    if rx_length == 0:
-                        result = COMM_RX_TIMEOUT
-                    else:
-                        result = COMM_RX_CORRUPT
-                    break
+            # check timeout
+            if self.portHandler.isPacketTimeout():
+                result = COMM_RX_TIMEOUT if not rxpacket else COMM_RX_CORRUPT
+                break
 
         self.portHandler.is_using = False
         return rxpacket, result
 
+    def rxPacketTimeout(self, txpacket):
+        # expected length of the status packet answering txpacket
+        if txpacket[PKT_INSTRUCTION] == INST_READ:
+            return txpacket[PKT_PARAMETER0 + 1] + 6
+        return 6  # HEADER0 HEADER1 ID LENGTH ERROR CHECKSUM
+
     def txRxPacket(self, txpacket):
         rxpacket = None
         error = 0
@@ -236,10 +260,7 @@ class protocol_packet_handler(object):
             return rxpacket, result, error
 
         # set packet timeout
-        if txpacket[PKT_INSTRUCTION] == INST_READ:
-            self.portHandler.setPacketTimeout(txpacket[PKT_PARAMETER0 + 1] + 6)
-        else:
-            self.portHandler.setPacketTimeout(6)  # HEADER0 HEADER1 ID LENGTH ERROR CHECKSUM
+        self.portHandler.setPacketTimeout(self.rxPacketTimeout(txpacket))
 
         # rx packet
         while True:
@@ -256,49 +277,28 @@ class protocol_packet_handler(object):
         model_number = 0
         error = 0
 
-        txpacket = [0] * 6
-
         if scs_id >= BROADCAST_ID:
             return model_number, COMM_NOT_AVAILABLE, error
 
-        txpacket[PKT_ID] = scs_id
-        txpacket[PKT_LENGTH] = 2
-        txpacket[PKT_INSTRUCTION] = INST_PING
-
-        rxpacket, result, error = self.txRxPacket(txpacket)
+        rxpacket, result, error = self.txRxPacket(self.makePacket(scs_id, INST_PING))
 
         if result == COMM_SUCCESS:
             data_read, result, error = self.readTxRx(scs_id, 3, 2)  # Address 3 : Model Number
             if result == COMM_SUCCESS:
-                model_number = self.scs_makeword(data_read[0], data_read[1])
+                model_number = self.scs_unpack('H', data_read)[0]
 
         return model_number, result, error
 
     def action(self, scs_id):
-        txpacket = [0] * 6
-
-        txpacket[PKT_ID] = scs_id
-        txpacket[PKT_LENGTH] = 2
-        txpacket[PKT_INSTRUCTION] = INST_ACTION
-
-        _, result, _ = self.txRxPacket(txpacket)
+        _, result, _ = self.txRxPacket(self.makePacket(scs_id, INST_ACTION))
 
         return result
 
     def readTx(self, scs_id, address, length):
-
-        txpacket = [0] * 8
-
         if scs_id >= BROADCAST_ID:
             return COMM_NOT_AVAILABLE
 
-        txpacket[PKT_ID] = scs_id
-        txpacket[PKT_LENGTH] = 4
-        txpacket[PKT_INSTRUCTION] = INST_READ
-        txpacket[PKT_PARAMETER0 + 0] = address
-        txpacket[PKT_PARAMETER0 + 1] = length
-
-        result = self.txPacket(txpacket)
+        result = self.txPacket(self.makePacket(scs_id, INST_READ, (address, length)))
 
         # set packet timeout
         if result == COMM_SUCCESS:
@@ -322,28 +322,21 @@ class protocol_packet_handler(object):
         if result == COMM_SUCCESS and rxpacket[PKT_ID] == scs_id:
             error = rxpacket[PKT_ERROR]
 
-            data.extend(rxpacket[PKT_PARAMETER0 : PKT_PARAMETER0+length])
+            data = rxpacket[PKT_PARAMETER0 : PKT_PARAMETER0+length]
 
         return data, result, error
 
     def readTxRx(self, scs_id, address, length):
-        txpacket = [0] * 8
         data = []
 
         if scs_id >= BROADCAST_ID:
             return data, COMM_NOT_AVAILABLE, 0
 
-        txpacket[PKT_ID] = scs_id
-        txpacket[PKT_LENGTH] = 4
-        txpacket[PKT_INSTRUCTION] = INST_READ
-        txpacket[PKT_PARAMETER0 + 0] = address
-        txpacket[PKT_PARAMETER0 + 1] = length
-
-        rxpacket, result, error = self.txRxPacket(txpacket)
+        rxpacket, result, error = self.txRxPacket(self.makePacket(scs_id, INST_READ, (address, length)))
         if result == COMM_SUCCESS:
             error = rxpacket[PKT_ERROR]
 
-            data.extend(rxpacket[PKT_PARAMETER0 : PKT_PARAMETER0+length])
+            data = rxpacket[PKT_PARAMETER0 : PKT_PARAMETER0+length]
 
         return data, result, error
 
@@ -351,141 +344,93 @@ class protocol_packet_handler(object):
         return self.readTx(scs_id, address, 1)
 
     def read1ByteRx(self, scs_id):
-        data, result, error = self.readRx(scs_id, 1)
-        data_read = data[0] if (result == COMM_SUCCESS) else 0
-        return data_read, result, error
+        return self.decodeRead(1, *self.readRx(scs_id, 1))
 
     def read1ByteTxRx(self, scs_id, address):
-        data, result, error = self.readTxRx(scs_id, address, 1)
-        data_read = data[0] if (result == COMM_SUCCESS) else 0
-        return data_read, result, error
+        return self.decodeRead(1, *self.readTxRx(scs_id, address, 1))
 
     def read2ByteTx(self, scs_id, address):
         return self.readTx(scs_id, address, 2)
 
     def read2ByteRx(self, scs_id):
-        data, result, error = self.readRx(scs_id, 2)
-        data_read = self.scs_makeword(data[0], data[1]) if (result == COMM_SUCCESS) else 0
-        return data_read, result, error
+        return self.decodeRead(2, *self.readRx(scs_id, 2))
 
     def read2ByteTxRx(self, scs_id, address):
-        data, result, error = self.readTxRx(scs_id, address, 2)
-        data_read = self.scs_makeword(data[0], data[1]) if (result == COMM_SUCCESS) else 0
-        return data_read, result, error
+        return self.decodeRead(2, *self.readTxRx(scs_id, address, 2))
 
     def read4ByteTx(self, scs_id, address):
         return self.readTx(scs_id, address, 4)
 
     def read4ByteRx(self, scs_id):
-        data, result, error = self.readRx(scs_id, 4)
-        data_read = self.scs_makedword(self.scs_makeword(data[0], data[1]),
-                                  self.scs_makeword(data[2], data[3])) if (result == COMM_SUCCESS) else 0
-        return data_read, result, error
+        return self.decodeRead(4, *self.readRx(scs_id, 4))
 
     def read4ByteTxRx(self, scs_id, address):
-        data, result, error = self.readTxRx(scs_id, address, 4)
-        data_read = self.scs_makedword(self.scs_makeword(data[0], data[1]),
-                                  self.scs_makeword(data[2], data[3])) if (result == COMM_SUCCESS) else 0
-        return data_read, result, error
-
-    def writeTxOnly(self, scs_id, address, length, data):
-        txpacket = [0] * (length + 7)
-
-        txpacket[PKT_ID] = scs_id
-        txpacket[PKT_LENGTH] = length + 3
-        txpacket[PKT_INSTRUCTION] = INST_WRITE
-        txpacket[PKT_PARAMETER0] = address
+        return self.decodeRead(4, *self.readTxRx(scs_id, address, 4))
 
-        txpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length] = data[0: length]
+    def decodeRead(self, length, data, result, error):
+        # 1, 2 or 4 bytes read from the servo to (value, result, error)
+        if result != COMM_SUCCESS:
+            return 0, result, error
+        if length == 1:
+            return data[0], result, error
+        if length == 2:
+            return self.scs_unpack('H', data)[0], result, error
+        return self.scs_makedword(*self.scs_unpack('HH', data)), result, error
 
-        result = self.txPacket(txpacket)
+    def writeTxOnly(self, scs_id, address, length, data):
+        result = self.txPacket(self.makePacket(scs_id, INST_WRITE, [address] + list(data[0: length])))
         self.portHandler.is_using = False
 
         return result
 
     def writeTxRx(self, scs_id, address, length, data):
-        txpacket = [0] * (length + 7)
-
-        txpacket[PKT_ID] = scs_id
-        txpacket[PKT_LENGTH] = length + 3
-        txpacket[PKT_INSTRUCTION] = INST_WRITE
-        txpacket[PKT_PARAMETER0] = address
-
-        txpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length] = data[0: length]
-        rxpacket, result, error = self.txRxPacket(txpacket)
+        rxpacket, result, error = self.txRxPacket(self.makePacket(scs_id, INST_WRITE, [address] + list(data[0: length])))
 
         return result, error
 
     def write1ByteTxOnly(self, scs_id, address, data):
-        data_write = [data]
-        return self.writeTxOnly(scs_id, address, 1, data_write)
+        return self.writeTxOnly(scs_id, address, 1, [data])
 
     def write1ByteTxRx(self, scs_id, address, data):
-        data_write = [data]
-        return self.writeTxRx(scs_id, address, 1, data_write)
+        return self.writeTxRx(scs_id, address, 1, [data])
 
     def write2ByteTxOnly(self, scs_id, address, data):
-        data_write = [self.scs_lobyte(data), self.scs_hibyte(data)]
-        return self.writeTxOnly(scs_id, address, 2, data_write)
+        return self.writeTxOnly(scs_id, address, 2, self.encodeWrite(2, data))
 
     def write2ByteTxRx(self, scs_id, address, data):
-        data_write = [self.scs_lobyte(data), self.scs_hibyte(data)]
-        return self.writeTxRx(scs_id, address, 2, data_write)
+        return self.writeTxRx(scs_id, address, 2, self.encodeWrite(2, data))
 
     def write4ByteTxOnly(self, scs_id, address, data):
-        data_write = [self.scs_lobyte(self.scs_loword(data)),
-                      self.scs_hibyte(self.scs_loword(data)),
-                      self.scs_lobyte(self.scs_hiword(data)),
-                      self.scs_hibyte(self.scs_hiword(data))]
-        return self.writeTxOnly(scs_id, address, 4, data_write)
+        return self.writeTxOnly(scs_id, address, 4, self.encodeWrite(4, data))
 
     def write4ByteTxRx(self, scs_id, address, data):
-        data_write = [self.scs_lobyte(self.scs_loword(data)),
-                      self.scs_hibyte(self.scs_loword(data)),
-                      self.scs_lobyte(self.scs_hiword(data)),
-                      self.scs_hibyte(self.scs_hiword(data))]
-        return self.writeTxRx(scs_id, address, 4, data_write)
+        return self.writeTxRx(scs_id, address, 4, self.encodeWrite(4, data))
 
-    def regWriteTxOnly(self, scs_id, address, length, data):
-        txpacket = [0] * (length + 7)
-
-        txpacket[PKT_ID] = scs_id
-        txpacket[PKT_LENGTH] = length + 3
-        txpacket[PKT_INSTRUCTION] = INST_REG_WRITE
-        txpacket[PKT_PARAMETER0] = address
+    def encodeWrite(self, length, data):
+        # 2 or 4 byte value in the servo's byte order
+        if length == 2:
+            return self.scs_pack('H', data & 0xFFFF)
+        return self.scs_pack('HH', self.scs_loword(data), self.scs_hiword(data))
 
-        txpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length] = data[0: length]
-
-        result = self.txPacket(txpacket)
+    def regWriteTxOnly(self, scs_id, address, length, data):
+        result = self.txPacket(self.makePacket(scs_id, INST_REG_WRITE, [address] + list(data[0: length])))
         self.portHandler.is_using = False
 
         return result
 
     def regWriteTxRx(self, scs_id, address, length, data):
-        txpacket = [0] * (length + 7)
-
-        txpacket[PKT_ID] = scs_id
-        txpacket[PKT_LENGTH] = length + 3
-        txpacket[PKT_INSTRUCTION] = INST_REG_WRITE
-        txpacket[PKT_PARAMETER0] = address
-
-        txpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length] = data[0: length]
-
-        _, result, error = self.txRxPacket(txpacket)
+        _, result, error = self.txRxPacket(self.makePacket(scs_id, INST_REG_WRITE, [address] + list(data[0: length])))
 
         return result, error
 
-    def syncReadTx(self, start_address, data_length, param, param_length):
-        txpacket = [0] * (param_length + 8)
-        # 8: HEADER0 HEADER1 ID LEN INST START_ADDR DATA_LEN CHKSUM
-
-        txpacket[PKT_ID] = BROADCAST_ID
-        txpacket[PKT_LENGTH] = param_length + 4  # 7: INST START_ADDR DATA_LEN CHKSUM
-        txpacket[PKT_INSTRUCTION] = INST_SYNC_READ
-        txpacket[PKT_PARAMETER0 + 0] = start_address
-        txpacket[PKT_PARAMETER0 + 1] = data_length
+    def makeSyncPacket(self, instruction, start_address, data_length, param, param_length):
+        # HEADER0 HEADER1 ID LEN INST START_ADDR DATA_LEN PARAM... CHKSUM
+        params = bytearray((start_address, data_length))
+        params += bytes(param[0: param_length])
+        return self.makePacket(BROADCAST_ID, instruction, params)
 
-        txpacket[PKT_PARAMETER0 + 2: PKT_PARAMETER0 + 2 + param_length] = param[0: param_length]
+    def syncReadTx(self, start_address, data_length, param, param_length):
+        txpacket = self.makeSyncPacket(INST_SYNC_READ, start_address, data_length, param, param_length)
 
         # print(txpacket)
         result = self.txPacket(txpacket)
@@ -494,36 +439,22 @@ class protocol_packet_handler(object):
     def syncReadRx(self, data_length, param_length):
         wait_length = (6 + data_length) * param_length
         self.portHandler.setPacketTimeout(wait_length)
-        rxpacket = []
-        rx_length = 0
+        rxpacket = bytearray()
         while True:
-            rxpacket.extend(self.portHandler.readPort(wait_length - rx_length))
-            rx_length = len(rxpacket)
-            if rx_length >= wait_length:
+            rxpacket += self.portHandler.readPort(wait_length - len(rxpacket))
+            if len(rxpacket) >= wait_length:
                 result = COMM_SUCCESS
                 break
             else:
                 # check timeout
                 if self.portHandler.isPacketTimeout():
-                    if rx_length == 0:
-                        result = COMM_RX_TIMEOUT
-                    else:
-                        result = COMM_RX_CORRUPT
+                    result = COMM_RX_TIMEOUT if not rxpacket else COMM_RX_CORRUPT
                     break
         self.portHandler.is_using = False
         return result, rxpacket
 
     def syncWriteTxOnly(self, start_address, data_length, param, param_length):
-        txpacket = [0] * (param_length + 8)
-        # 8: HEADER0 HEADER1 ID LEN INST START_ADDR DATA_LEN ... CHKSUM
-
-        txpacket[PKT_ID] = BROADCAST_ID
-        txpacket[PKT_LENGTH] = param_length + 4  # 4: INST START_ADDR DATA_LEN ... CHKSUM
-        txpacket[PKT_INSTRUCTION] = INST_SYNC_WRITE
-        txpacket[PKT_PARAMETER0 + 0] = start_address
-        txpacket[PKT_PARAMETER0 + 1] = data_length
-
-        txpacket[PKT_PARAMETER0 + 2: PKT_PARAMETER0 + 2 + param_length] = param[0: param_length]
+        txpacket = self.makeSyncPacket(INST_SYNC_WRITE, start_address, data_length, param, param_length)
 
         _, result, _ = self.txRxPacket(txpacket)
 
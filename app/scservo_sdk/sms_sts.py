@@ -63,7 +63,7 @@ class sms_sts(protocol_packet_handler):
         self.groupSyncWrite = GroupSyncWrite(self, SMS_STS_ACC, 7)
 
     def WritePosEx(self, scs_id, position, speed, acc):
-        txpacket = [acc, self.scs_lobyte(position), self.scs_hibyte(position), 0, 0, self.scs_lobyte(speed), self.scs_hibyte(speed)]
+        txpacket = self.scs_pack('BHHH', acc, position & 0xFFFF, 0, speed & 0xFFFF)
         return self.writeTxRx(scs_id, SMS_STS_ACC, len(txpacket), txpacket)
 
     def ReadPos(self, scs_id):
@@ -85,11 +85,11 @@ class sms_sts(protocol_packet_handler):
         return moving, scs_comm_result, scs_error
 
     def SyncWritePosEx(self, scs_id, position, speed, acc):
-        txpacket = [acc, self.scs_lobyte(position), self.scs_hibyte(position), 0, 0, self.scs_lobyte(speed), self.scs_hibyte(speed)]
+        txpacket = self.scs_pack('BHHH', acc, position & 0xFFFF, 0, speed & 0xFFFF)
         return self.groupSyncWrite.addParam(scs_id, txpacket)
 
     def RegWritePosEx(self, scs_id, position, speed, acc):
-        txpacket = [acc, self.scs_lobyte(position), self.scs_hibyte(position), 0, 0, self.scs_lobyte(speed), self.scs_hibyte(speed)]
+        txpacket = self.scs_pack('BHHH', acc, position & 0xFFFF, 0, speed & 0xFFFF)
         return self.regWriteTxRx(scs_id, SMS_STS_ACC, len(txpacket), txpacket)
 
     def RegAction(self):
@@ -100,7 +100,7 @@ class sms_sts(protocol_packet_handler):
 
     def WriteSpec(self, scs_id, speed, acc):
         speed = self.scs_toscs(speed, 15)
-        txpacket = [acc, 0, 0, 0, 0, self.scs_lobyte(speed), self.scs_hibyte(speed)]
+        txpacket = self.scs_pack('BHHH', acc, 0, 0, speed & 0xFFFF)
         return self.writeTxRx(scs_id, SMS_STS_ACC, len(txpacket), txpacket)
 
     def LockEprom(self, scs_id):
@@ -0,0 +1,275 @@
+"""Servo actuator thread that owns the serial bus and writes only the newest pan/tilt setpoint."""
+
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .config import FacialRecognitionConfiguration as Config
+from .metrics import metrics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bytes of a sync write of two servos: 8 framing bytes + (ID + 7 data bytes) per servo.
+_SYNC_WRITE_PACKET_LENGTH = 8 + 2 * (1 + 7)
+
+class SetpointMailbox:
+    """
+    Single-slot mailbox holding the newest pan/tilt setpoint.
+
+    The producer replaces the slot with one reference assignment and never
+    waits for the consumer; setpoints the consumer never saw are counted as
+    dropped from the gap in sequence numbers. An event wakes the consumer.
+    """
+
+    def __init__(self):
+        self._setpoint: Optional[Tuple[int, int, int, float]] = None
+        self._sequence = 0
+        self._taken = 0
+        self._event = threading.Event()
+
+    def post(self, pan: int, tilt: int) -> None:
+        """
+        Replace the setpoint.
+
+        Args:
+        - pan (int): Pan position.
+        - tilt (int): Tilt position.
+        """
+        self._sequence += 1
+        self._setpoint = (self._sequence, pan, tilt, time.perf_counter())
+        self._event.set()
+
+    def wake(self) -> None:
+        """Wake the consumer without posting a setpoint."""
+        self._event.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until a setpoint has been posted since the last `take`, or `wake` was called.
+
+        Args:
+        - timeout (Optional[float]): Maximum seconds to wait.
+
+        Returns:
+        - bool: False if the wait timed out.
+        """
+        return self._event.wait(timeout)
+
+    def take(self) -> Tuple[Optional[Tuple[int, int, float]], int]:
+        """
+        Take the newest setpoint.
+
+        Returns:
+        - Tuple[Optional[Tuple[int, int, float]], int]: (pan, tilt, perf_counter time it was posted), or None if
+          nothing new was posted, and the number of setpoints replaced before they could be taken.
+        """
+        self._event.clear()
+        setpoint = self._setpoint
+        if setpoint is None or setpoint[0] <= self._taken:
+            return None, 0
+        sequence, pan, tilt, posted_at = setpoint
+        dropped = sequence - self._taken - 1
+        self._taken = sequence
+        return (pan, tilt, posted_at), dropped
+
+class ServoActuator:
+    """
+    Dedicated thread that owns one open `PortHandler`/`sms_sts` pair and drives the pan and tilt servos.
+
+    `post` only stores the setpoint in a `SetpointMailbox`, so the video loop
+    never waits on the serial bus. The thread writes the newest setpoint with
+    one sync write, at most every `min_interval` seconds: the longer of
+    `1 / max_rate` and the time the packet takes on the bus at the configured
+    baud rate. Setpoints replaced before they were written count as dropped.
+
+    A setpoint whose write failed is written again unless a newer one arrives,
+    up to `Config.SERVO_MAX_RETRIES` consecutive failures. While writes fail,
+    the interval between writes doubles up to `Config.SERVO_RETRY_MAX_DELAY`
+    and failures are logged at most every `Config.SERVO_ERROR_LOG_INTERVAL`.
+    If the port raises (e.g. the adapter was unplugged), the thread closes the
+    port and stops, so `running` turns False and the port can be reopened.
+    """
+
+    def __init__(self, port_name: str = Config.SERIAL_PORT, baudrate: int = Config.BAUDRATE,
+                 max_rate: float = Config.SERVO_MAX_WRITE_RATE, speed: int = Config.SCS_MOVING_SPEED,
+                 acc: int = Config.SCS_MOVING_ACC):
+        """
+        Args:
+        - port_name (str): Serial port of the servo bus.
+        - baudrate (int): Bus baud rate.
+        - max_rate (float): Maximum sync writes per second.
+        - speed (int): Servo moving speed.
+        - acc (int): Servo moving acceleration.
+        """
+        self.port_name = port_name
+        self.baudrate = baudrate
+        self.speed = speed
+        self.acc = acc
+        self.min_interval = max(1.0 / max_rate, _SYNC_WRITE_PACKET_LENGTH * 10.0 / baudrate)
+
+        self.writes = 0
+        self.failed_writes = 0
+        self.dropped = 0
+        self.unchanged = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+        self._mailbox = SetpointMailbox()
+        self._packet_handler: Optional[Any] = None
+        self._position: Optional[Tuple[int, int]] = None
+        self._last_write = 0.0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> bool:
+        """
+        Open the serial port and start the actuator thread.
+
+        Returns:
+        - bool: True if the port was opened (or the thread is already running), False otherwise.
+        """
+        if self._running:
+            return True
+        if self._thread is not None:
+            # The previous thread stopped after a port error and is closing its port.
+            self._thread.join()
+            self._thread = None
+
+        from .scservo_sdk import PortHandler, sms_sts
+
+        port_handler = PortHandler(self.port_name)
+        try:
+            if not port_handler.openPort():
+                logger.error(f"Failed to open the servo port {self.port_name}")
+                return False
+        except Exception as e:
+            logger.error(f"Failed to open the servo port {self.port_name}: {e}")
+            return False
+        if not port_handler.setBaudRate(self.baudrate):
+            logger.error(f"Failed to change the servo baud rate to {self.baudrate}")
+            port_handler.closePort()
+            return False
+
+        self._packet_handler = sms_sts(port_handler)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, args=(port_handler,), name="servo-actuator", daemon=True)
+        self._thread.start()
+        logger.info(f"Servo actuator on {self.port_name} writing at most every {self.min_interval * 1000:.1f} ms")
+        return True
+
+    def post(self, pan: int, tilt: int) -> None:
+        """
+        Set the newest pan/tilt target, clamped to the configured ranges. Never blocks.
+
+        Args:
+        - pan (int): Pan position.
+        - tilt (int): Tilt position.
+        """
+        pan = max(Config.PAN_MIN, min(Config.PAN_MAX, int(pan)))
+        tilt = max(Config.TILT_MIN, min(Config.TILT_MAX, int(tilt)))
+        self._mailbox.post(pan, tilt)
+
+    def stop(self) -> None:
+        """Stop the actuator thread, which closes the serial port on its way out."""
+        if self._thread is None:
+            return
+        self._running = False
+        self._mailbox.wake()
+        self._thread.join()
+        self._thread = None
+        logger.info(f"Servo actuator stats: {self.stats()}")
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get actuator statistics.
+
+        Returns:
+        - Dict[str, float]: Sync writes, failed writes, dropped and unchanged setpoints, and mean and
+          maximum milliseconds from posting a setpoint to the end of its write.
+        """
+        return {
+            'writes': self.writes,
+            'failed_writes': self.failed_writes,
+            'setpoints_dropped': self.dropped,
+            'setpoints_unchanged': self.unchanged,
+            'latency_mean_ms': self._latency_total / self.writes * 1000 if self.writes else 0.0,
+            'latency_max_ms': self._latency_max * 1000,
+        }
+
+    def _run(self, port_handler: Any) -> None:
+        try:
+            self._write_loop()
+        finally:
+            port_handler.closePort()
+
+    def _write_loop(self) -> None:
+        retry: Optional[Tuple[int, int, float]] = None
+        failures = 0
+        next_log = 0.0
+        while self._running:
+            if retry is None and not self._mailbox.wait(timeout=0.1):
+                continue
+
+            # Setpoints posted while waiting for the bus replace each other; only the newest is written.
+            # After failed writes the interval doubles per failure, up to SERVO_RETRY_MAX_DELAY.
+            interval = min(self.min_interval * 2 ** failures, max(self.min_interval, Config.SERVO_RETRY_MAX_DELAY))
+            delay = self._last_write + interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            setpoint, dropped = self._mailbox.take()
+            self.dropped += dropped
+            if setpoint is None:
+                setpoint = retry
+            retry = None
+            if setpoint is None or not self._running:
+                continue
+
+            pan, tilt, posted_at = setpoint
+            if (pan, tilt) == self._position:
+                self.unchanged += 1
+                continue
+
+            start = time.perf_counter()
+            try:
+                success = self._write(pan, tilt)
+            except Exception as e:
+                logger.error(f"Servo port {self.port_name} failed, stopping the actuator: {e}")
+                self.failed_writes += 1
+                self._running = False
+                break
+            self._last_write = time.perf_counter()
+
+            if success:
+                failures = 0
+                self._position = (pan, tilt)
+                self.writes += 1
+                latency = self._last_write - posted_at
+                self._latency_total += latency
+                self._latency_max = max(self._latency_max, latency)
+                metrics.observe('servo_write', self._last_write - start)
+                metrics.observe('servo_latency', latency)
+            else:
+                self.failed_writes += 1
+                failures += 1
+                if failures <= Config.SERVO_MAX_RETRIES:
+                    retry = setpoint
+                if self._last_write >= next_log:
+                    logger.warning(f"Servo write failed ({failures} in a row, {self.failed_writes} in total)")
+                    next_log = self._last_write + Config.SERVO_ERROR_LOG_INTERVAL
+            metrics.set_gauge('servo_setpoints_dropped', self.dropped)
+
+    def _write(self, pan: int, tilt: int) -> bool:
+        from .scservo_sdk import COMM_SUCCESS
+
+        group_sync_write = self._packet_handler.groupSyncWrite
+        self._packet_handler.SyncWritePosEx(Config.TILT_SERVO_ID, tilt, self.speed, self.acc)
+        self._packet_handler.SyncWritePosEx(Config.PAN_SERVO_ID, pan, self.speed, self.acc)
+        result = group_sync_write.txPacket()
+        group_sync_write.clearParam()
+        return result == COMM_SUCCESS
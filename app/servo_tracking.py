@@ -1,131 +1,231 @@
 import cv2
+import time
 import asyncio
 import numpy as np
-import mediapipe as mp
-from deep_sort_realtime.deepsort_tracker import DeepSort
-# from scservo_sdk import PortHandler, sms_sts, COMM_SUCCESS  # Commented out
-from typing import Tuple, Any
+from typing import TYPE_CHECKING, Tuple, Any, Awaitable, Callable, Optional, Union
 from .config import FacialRecognitionConfiguration as Config
+from .capture import FrameCapture
+from .servo_actuator import ServoActuator
+from .controller import PanTiltController
+from .scheduler import DetectionScheduler
+from .detection import InlineDetector, DetectionPool
+from .sinks import FrameSink, create_sink
+from .trackers import SortTracker, create_tracker
+from .metrics import metrics
+from .utils import extract_ltrb_from_track
 
-# def open_port() -> bool:
-#     """
-#     Open the serial port for servo communication.
-#
-#     Returns:
-#     - bool: True if port opened successfully, False otherwise.
-#     """
-#     portHandler = PortHandler(Config.SERIAL_PORT)
-#     if not portHandler.openPort():
-#         print("Failed to open the port")
-#         return False
-#     if not portHandler.setBaudRate(Config.BAUDRATE):
-#         print("Failed to change the baud rate")
-#         return False
-#     return True
-
-# def move_servo(pan_pos: int, tilt_pos: int) -> None:
-#     """
-#     Move the servo to the specified pan and tilt positions.
-#
-#     Args:
-#     - pan_pos (int): Pan position.
-#     - tilt_pos (int): Tilt position.
-#     """
-#     print(f"Moving servos to Pan: {pan_pos}, Tilt: {tilt_pos}")
-#     packetHandler = sms_sts(PortHandler(Config.SERIAL_PORT))
-#     packetHandler.SyncWritePosEx(1, tilt_pos, Config.SCS_MOVING_SPEED, Config.SCS_MOVING_ACC)
-#     packetHandler.SyncWritePosEx(2, pan_pos, Config.SCS_MOVING_SPEED, Config.SCS_MOVING_ACC)
-#     packetHandler.groupSyncWrite.txPacket()
-#     packetHandler.groupSyncWrite.clearParam()
-
-async def process_frame(frame: np.ndarray, face_detection: mp.solutions.face_detection.FaceDetection, 
-                        tracker: DeepSort, current_pan: int, current_tilt: int) -> Tuple[np.ndarray, int, int]:
+if TYPE_CHECKING:
+    from .deepsort_tracker import DeepSortTracker
+
+_servo_actuator: Optional[ServoActuator] = None
+_next_open_attempt = 0.0
+
+def open_port() -> bool:
+    """
+    Open the serial port for servo communication and start the servo actuator thread.
+
+    Returns:
+    - bool: True if port opened successfully, False otherwise.
+    """
+    global _servo_actuator
+
+    if _servo_actuator is None:
+        _servo_actuator = ServoActuator()
+    return _servo_actuator.start()
+
+def close_port() -> None:
+    """Stop the servo actuator thread and close the serial port, if open."""
+    if _servo_actuator is not None:
+        _servo_actuator.stop()
+
+def move_servo(pan_pos: int, tilt_pos: int) -> None:
+    """
+    Move the servo to the specified pan and tilt positions.
+
+    The positions are posted to the servo actuator thread, which writes only
+    the newest setpoint, so this never waits on the serial bus. The port is
+    opened on the first call if `open_port` was not called. If it cannot be
+    opened, the move is skipped and opening is retried at most every
+    `Config.SERVO_REOPEN_INTERVAL` seconds.
+
+    Args:
+    - pan_pos (int): Pan position.
+    - tilt_pos (int): Tilt position.
+    """
+    global _next_open_attempt
+
+    if _servo_actuator is None or not _servo_actuator.running:
+        now = time.monotonic()
+        if now < _next_open_attempt:
+            return
+        if not open_port():
+            _next_open_attempt = now + Config.SERVO_REOPEN_INTERVAL
+            return
+    _servo_actuator.post(pan_pos, tilt_pos)
+
+TrackHandler = Callable[[np.ndarray, Any, int, int, int], Awaitable[None]]
+TrackDeletedHandler = Callable[[Any], None]
+
+async def process_frame(frame: np.ndarray, face_detector: Union[InlineDetector, DetectionPool],
+                        tracker: Union["DeepSortTracker", SortTracker], current_pan: int, current_tilt: int, frame_count: int = 0,
+                        track_handler: Optional[TrackHandler] = None,
+                        track_deleted_handler: Optional[TrackDeletedHandler] = None,
+                        scheduler: Optional[DetectionScheduler] = None,
+                        display: Optional[np.ndarray] = None,
+                        controller: Optional[PanTiltController] = None) -> Tuple[np.ndarray, int, int]:
     """
     Process a single frame for face detection and tracking.
 
+    The frame itself is never drawn on, so the tracker's embedder and the face
+    crops see clean pixels. Overlays are drawn on a copy in `display`, a
+    preallocated buffer reused across frames, and only if one is given.
+
+    With a scheduler, detection only runs on the frames it selects; on the
+    other frames the tracks are advanced by Kalman prediction alone.
+
+    With a controller, the servos follow the first confirmed track.
+
     Args:
     - frame (np.ndarray): Input frame.
-    - face_detection (mp.solutions.face_detection.FaceDetection): Face detection model.
-    - tracker (DeepSort): DeepSort tracker.
+    - face_detector (Union[InlineDetector, DetectionPool]): Detector whose `detect` coroutine returns boxes in native-resolution coordinates.
+    - tracker (Union[DeepSortTracker, SortTracker]): Tracker from `create_tracker`.
     - current_pan (int): Current pan position.
     - current_tilt (int): Current tilt position.
+    - frame_count (int): Current frame count.
+    - track_handler (Optional[TrackHandler]): Coroutine called with (frame, track, img_width, img_height, frame_count) for each confirmed track.
+    - track_deleted_handler (Optional[TrackDeletedHandler]): Called with the ID of each track the tracker deleted.
+    - scheduler (Optional[DetectionScheduler]): Adaptive detection scheduler; detection runs on every frame if None.
+    - display (Optional[np.ndarray]): Buffer with the frame's shape to draw overlays on; no overlays are drawn if None.
+    - controller (Optional[PanTiltController]): Pan/tilt controller; the servos are not moved if None.
 
     Returns:
-    - Tuple[np.ndarray, int, int]: Processed frame, updated pan position, updated tilt position.
+    - Tuple[np.ndarray, int, int]: Annotated display buffer (or the untouched frame without one), updated pan position, updated tilt position.
     """
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = face_detection.process(frame_rgb)
     img_height, img_width = frame.shape[:2]
     first_confirmed = False
+    if display is not None:
+        np.copyto(display, frame)
+    detect = scheduler is None or scheduler.should_detect(tracker.tracker.tracks)
+    start_time = time.perf_counter()
 
-    if results.detections:
-        bbs = []
-        for detection in results.detections:
-            bboxC = detection.location_data.relative_bounding_box
-            x = int(bboxC.xmin * img_width)
-            y = int(bboxC.ymin * img_height)
-            w = int(bboxC.width * img_width)
-            h = int(bboxC.height * img_height)
-            bbs.append(([x, y, w, h], detection.score[0], 0))
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-
-        tracks = tracker.update_tracks(bbs, frame=frame)
-        for track in tracks:
-            if not track.is_confirmed():
-                continue
-            if not first_confirmed:
-                x, y, w, h = track.to_ltwh()
-                cx, cy = int(x + w / 2), int(y + h / 2)
-                frame_center_x, frame_center_y = img_width // 2, img_height // 2
-                distance_x = frame_center_x - cx
-                distance_y = frame_center_y - cy
-
-                cv2.line(frame, (frame_center_x, frame_center_y), (cx, cy), (255, 0, 0), 2)
+    if detect:
+        boxes = await face_detector.detect(frame)
+        if not len(boxes):
+            print("No faces detected.")
+        if display is not None:
+            for x, y, w, h in boxes[:, :4].astype(np.int32):
+                cv2.rectangle(display, (x, y), (x + w, y + h), (0, 255, 0), 2)
+
+        # Update even without detections so that lost tracks age out and are deleted.
+        with metrics.timer('tracker_update'):
+            tracks = tracker.update_tracks(boxes, frame=frame)
+        if track_deleted_handler is not None:
+            for track_id in tracker.tracker.del_tracks_ids:
+                track_deleted_handler(track_id)
+    else:
+        with metrics.timer('tracker_predict'):
+            tracker.tracker.predict()
+        tracks = tracker.tracker.tracks
+
+    if scheduler is not None:
+        scheduler.record(detect, time.perf_counter() - start_time, tracks)
+        metrics.set_gauge('detection_stride', scheduler.stride)
+    metrics.set_gauge('tracks', len(tracks))
+
+    for track in tracks:
+        if not track.is_confirmed():
+            continue
+        if track_handler is not None:
+            await track_handler(frame, track, img_width, img_height, frame_count)
+        if display is not None:
+            x, y, w, h = extract_ltrb_from_track(track)
+            cv2.rectangle(display, (x, y), (x + w, y + h), (0, 255, 0), 2)
+            cv2.putText(display, f'ID: {track.track_id}', (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+        if not first_confirmed:
+            x, y, w, h = track.to_ltwh()
+            cx, cy = int(x + w / 2), int(y + h / 2)
+            frame_center_x, frame_center_y = img_width // 2, img_height // 2
+            distance_x = frame_center_x - cx
+            distance_y = frame_center_y - cy
+
+            if display is not None:
+                cv2.line(display, (frame_center_x, frame_center_y), (cx, cy), (255, 0, 0), 2)
                 distance_label = f"x: {distance_x}, y: {distance_y}"
-                cv2.putText(frame, distance_label, ((frame_center_x + cx) // 2, (frame_center_y + cy) // 2), 
+                cv2.putText(display, distance_label, ((frame_center_x + cx) // 2, (frame_center_y + cy) // 2), 
                             cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 2)
 
-                # Servo movement code (commented out)
-                # if abs(distance_x) > Config.X_THRESHOLD or abs(distance_y) > Config.Y_THRESHOLD:
-                #     pan_step = -np.sign(distance_x) * Config.STEP_SIZE
-                #     tilt_step = -np.sign(distance_y) * Config.STEP_SIZE
-                #     current_pan = max(Config.PAN_MIN, min(Config.PAN_MAX, current_pan + pan_step))
-                #     current_tilt = max(Config.TILT_MIN, min(Config.TILT_MAX, current_tilt + tilt_step))
-                #     move_servo(current_pan, current_tilt)
+            if controller is not None:
+                with metrics.timer('pan_tilt_control'):
+                    command = controller.update(track, img_width, img_height, current_pan, current_tilt)
+                if command is not None:
+                    current_pan, current_tilt = command
+                    move_servo(current_pan, current_tilt)
 
-                first_confirmed = True
-    else:
-        print("No faces detected.")
+            first_confirmed = True
 
-    return frame, current_pan, current_tilt
+    if controller is not None and not first_confirmed:
+        controller.reset()
 
-async def setup_and_process_video(video_source: int = 2) -> None:
+    return (display if display is not None else frame), current_pan, current_tilt
+
+async def setup_and_process_video(video_source: Union[int, str] = 2, track_handler: Optional[TrackHandler] = None,
+                                  track_deleted_handler: Optional[TrackDeletedHandler] = None,
+                                  sink: Optional[FrameSink] = None) -> None:
     """
-    Set up video capture, face detection, and tracking, then process video frames.
+    Set up threaded video capture, face detection, and tracking, then process video frames.
+
+    Frames are captured on a separate thread into a ring buffer; this loop always
+    processes the newest frame and older unprocessed frames are dropped.
+    Annotated frames go to `sink`; with a `NullSink` (headless) no overlays are drawn.
 
     Args:
-    - video_source (int): Video source index (default is 2).
+    - video_source (Union[int, str]): Camera index, video file or stream URL (default is camera 2).
+    - track_handler (Optional[TrackHandler]): Coroutine called for each confirmed track.
+    - track_deleted_handler (Optional[TrackDeletedHandler]): Called with the ID of each deleted track.
+    - sink (Optional[FrameSink]): Destination for annotated frames; created from `Config.FRAME_SINK` if None.
     """
-    face_detection = mp.solutions.face_detection.FaceDetection(min_detection_confidence=Config.MIN_DETECTION_CONFIDENCE)
-    tracker = DeepSort(max_age=Config.MAX_AGE)
-    cap = cv2.VideoCapture(video_source)
+    face_detector = InlineDetector()
+    tracker = create_tracker()
+    scheduler = DetectionScheduler()
+    controller = PanTiltController() if Config.SERVO_ENABLED else None
+    capture = FrameCapture(video_source, buffer_size=Config.CAPTURE_BUFFER_SIZE)
     current_pan = Config.PAN_START
     current_tilt = Config.TILT_START
+    frame_count = 0
+    display = None
+    sink = sink if sink is not None else create_sink(Config.FRAME_SINK)
+
+    if not capture.start():
+        sink.close()
+        return
 
     try:
-        while cap.isOpened():
-            success, frame = cap.read()
-            if not success:
-                print("Failed to read frame. Skipping...")
+        while capture.is_running():
+            _, frame = await asyncio.to_thread(capture.read_latest, Config.CAPTURE_READ_TIMEOUT)
+            if frame is None:
+                print("No new frame available. Waiting...")
                 continue
 
-            frame, current_pan, current_tilt = await process_frame(frame, face_detection, tracker, current_pan, current_tilt)
-            cv2.imshow('Face Tracking with Servo Control', frame)
-            
-            if cv2.waitKey(5) & 0xFF == 27:  # Exit on ESC key
-                break
+            frame_count += 1
+            if sink.wants_frames and (display is None or display.shape != frame.shape):
+                display = np.empty_like(frame)
+            with metrics.timer('process_frame'):
+                frame, current_pan, current_tilt = await process_frame(frame, face_detector, tracker, current_pan, current_tilt,
+                                                                       frame_count, track_handler, track_deleted_handler,
+                                                                       scheduler, display, controller)
+            if metrics.enabled:
+                metrics.set_gauge('frames_captured', capture.frames_captured)
+                metrics.set_gauge('frames_dropped', capture.frames_dropped)
+                metrics.set_gauge('frames_processed', capture.frames_processed)
+            if sink.wants_frames:
+                with metrics.timer('sink_write'):
+                    if not sink.write(frame):
+                        break
     except Exception as e:
         print(f"An error occurred during video processing: {e}")
     finally:
-        cap.release()
-        cv2.destroyAllWindows()
+        capture.stop()
+        sink.close()
+        print(f"Capture stats: {capture.stats()}")
+        print(f"Detection stats: {scheduler.stats()}")
+        print(f"Sink stats: {sink.stats()}")
@@ -0,0 +1,346 @@
+"""Destinations for annotated frames: nothing, a window, a video file, shared memory or an MJPEG stream."""
+
+import cv2
+import logging
+import threading
+import numpy as np
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+from .config import FacialRecognitionConfiguration as Config
+from .capture import FrameRingBuffer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class FrameSink(ABC):
+    """Base class for frame sinks. `write` is called on the video loop and must not block on encoding."""
+
+    # Sinks that discard frames let the video loop skip drawing overlays altogether.
+    wants_frames = True
+
+    @abstractmethod
+    def write(self, frame: np.ndarray) -> bool:
+        """
+        Hand a frame to the sink. The frame may be reused by the caller after this returns.
+
+        Args:
+        - frame (np.ndarray): Annotated BGR frame.
+
+        Returns:
+        - bool: False if the sink asks the video loop to stop (e.g. ESC pressed in the window).
+        """
+
+    def close(self) -> None:
+        """Flush and release the sink's resources."""
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get sink statistics.
+
+        Returns:
+        - Dict[str, int]: Frames written and dropped.
+        """
+        return {}
+
+class NullSink(FrameSink):
+    """Discard all frames (headless mode)."""
+
+    wants_frames = False
+
+    def write(self, frame: np.ndarray) -> bool:
+        return True
+
+class WindowSink(FrameSink):
+    """Show frames in an OpenCV window. Needs a display; stops the loop when ESC is pressed."""
+
+    def __init__(self, title: str = 'Face Tracking with Servo Control'):
+        """
+        Args:
+        - title (str): Window title.
+        """
+        self.title = title
+
+    def write(self, frame: np.ndarray) -> bool:
+        cv2.imshow(self.title, frame)
+        return cv2.waitKey(1) & 0xFF != 27  # Exit on ESC key
+
+    def close(self) -> None:
+        cv2.destroyAllWindows()
+
+class _ThreadedSink(FrameSink):
+    """
+    Sink that copies frames into a ring of preallocated buffers and processes them on its own thread.
+
+    The video loop only pays for one `np.copyto`; if the worker falls behind, it
+    skips to the newest frame and the skipped frames are counted as dropped.
+    `close` processes the frame still waiting in the ring before releasing the sink.
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+        - name (str): Name of the worker thread.
+        """
+        self._buffer = FrameRingBuffer(3)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def write(self, frame: np.ndarray) -> bool:
+        slot = self._buffer.acquire_slot(frame.shape, frame.dtype)
+        np.copyto(slot, frame)
+        self._buffer.publish(slot)
+        return True
+
+    def close(self) -> None:
+        self._running = False
+        self._buffer.wake()
+        self._thread.join()
+        self._release()
+
+    def stats(self) -> Dict[str, int]:
+        return {'frames_written': self._buffer.frames_read, 'frames_dropped': self._buffer.frames_dropped}
+
+    def _run(self) -> None:
+        while True:
+            running = self._running
+            # Once closed, only drain what is already published instead of waiting for more.
+            _, frame = self._buffer.get_latest(timeout=0.1 if running else 0)
+            if frame is None:
+                if not running:
+                    break
+                continue
+            try:
+                self._consume(frame)
+            except Exception as e:
+                logger.error(f"{type(self).__name__} failed to process a frame: {e}")
+
+    @abstractmethod
+    def _consume(self, frame: np.ndarray) -> None:
+        """
+        Process one frame on the worker thread.
+
+        Args:
+        - frame (np.ndarray): Frame slot owned by the worker until the next read.
+        """
+
+    def _release(self) -> None:
+        pass
+
+class VideoFileSink(_ThreadedSink):
+    """Encode frames to a video file on a background thread."""
+
+    def __init__(self, path: str, fps: float = Config.SINK_FPS, fourcc: str = "mp4v"):
+        """
+        Args:
+        - path (str): Output video path.
+        - fps (float): Frame rate written to the file.
+        - fourcc (str): Four-character codec code.
+        """
+        self.path = path
+        self.fps = fps
+        self.fourcc = fourcc
+        self._writer: Optional[cv2.VideoWriter] = None
+        super().__init__("video-file-sink")
+
+    def _consume(self, frame: np.ndarray) -> None:
+        if self._writer is None:
+            height, width = frame.shape[:2]
+            self._writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*self.fourcc), self.fps, (width, height))
+            logger.info(f"Writing {width}x{height} video to {self.path}")
+        self._writer.write(frame)
+
+    def _release(self) -> None:
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+
+class SharedMemorySink(FrameSink):
+    """
+    Publish frames to a named shared-memory ring for another process.
+
+    Layout: an int64 header [sequence, height, width, channels, slots] followed
+    by `slots` frames of height x width x channels bytes. Frame `sequence` is
+    in slot `sequence % slots`; the header sequence is updated after the copy.
+    The writer never waits for readers, so a slow reader can see its slot being
+    overwritten; `SharedMemoryFrameReader` re-checks the sequence after copying
+    and retries in that case.
+    """
+
+    HEADER_FIELDS = 5
+
+    def __init__(self, name: str, slots: int = Config.SHM_SLOTS):
+        """
+        Args:
+        - name (str): Shared memory block name.
+        - slots (int): Number of frame slots in the ring.
+        """
+        self.name = name
+        self.slots = max(2, slots)
+        self.frames_written = 0
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._header: Optional[np.ndarray] = None
+        self._frames: Optional[np.ndarray] = None
+
+    def write(self, frame: np.ndarray) -> bool:
+        if self._frames is None or self._frames.shape[1:] != frame.shape:
+            self._allocate(frame.shape)
+        sequence = self.frames_written + 1
+        np.copyto(self._frames[sequence % self.slots], frame)
+        self._header[0] = sequence
+        self.frames_written = sequence
+        return True
+
+    def close(self) -> None:
+        if self._shm is not None:
+            self._header = self._frames = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def stats(self) -> Dict[str, int]:
+        return {'frames_written': self.frames_written, 'frames_dropped': 0}
+
+    def _allocate(self, shape: Tuple[int, ...]) -> None:
+        self.close()
+        height, width, channels = shape
+        header_size = self.HEADER_FIELDS * np.dtype(np.int64).itemsize
+        size = header_size + self.slots * height * width * channels
+        try:
+            self._shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=self.name)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+
+        self._header = np.ndarray((self.HEADER_FIELDS,), dtype=np.int64, buffer=self._shm.buf)
+        self._header[:] = (0, height, width, channels, self.slots)
+        self._frames = np.ndarray((self.slots, height, width, channels), dtype=np.uint8,
+                                  buffer=self._shm.buf, offset=header_size)
+        logger.info(f"Publishing {width}x{height} frames to shared memory '{self.name}' ({self.slots} slots)")
+
+class SharedMemoryFrameReader:
+    """Read the newest frame published by a `SharedMemorySink`, typically from another process."""
+
+    def __init__(self, name: str):
+        """
+        Args:
+        - name (str): Shared memory block name.
+        """
+        self._shm = shared_memory.SharedMemory(name=name)
+        header_size = SharedMemorySink.HEADER_FIELDS * np.dtype(np.int64).itemsize
+        self._header = np.ndarray((SharedMemorySink.HEADER_FIELDS,), dtype=np.int64, buffer=self._shm.buf)
+        _, height, width, channels, slots = (int(value) for value in self._header)
+        self._frames = np.ndarray((slots, height, width, channels), dtype=np.uint8,
+                                  buffer=self._shm.buf, offset=header_size)
+
+    def read(self) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Copy the newest frame, retrying if the writer reached its slot again during the copy.
+
+        Returns:
+        - Tuple[int, Optional[np.ndarray]]: Frame sequence number and frame, or (0, None) if nothing was published yet.
+        """
+        slots = len(self._frames)
+        while True:
+            sequence = int(self._header[0])
+            if sequence == 0:
+                return 0, None
+            frame = self._frames[sequence % slots].copy()
+            # The writer starts overwriting this slot only after publishing sequence + slots - 1.
+            if int(self._header[0]) < sequence + slots - 1:
+                return sequence, frame
+
+    def close(self) -> None:
+        self._header = self._frames = None
+        self._shm.close()
+
+class MJPEGSink(_ThreadedSink):
+    """Serve frames as a multipart MJPEG stream at http://<host>:<port>/, JPEG-encoded on a background thread."""
+
+    def __init__(self, port: int = Config.MJPEG_PORT, quality: int = Config.MJPEG_QUALITY, host: str = "0.0.0.0"):
+        """
+        Args:
+        - port (int): Port to serve on.
+        - quality (int): JPEG quality (0-100).
+        - host (str): Address to bind.
+        """
+        self.quality = quality
+        self._jpeg: Optional[bytes] = None
+        self._jpeg_seq = 0
+        self._jpeg_cond = threading.Condition()
+
+        sink = self
+
+        class StreamHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+                self.end_headers()
+                seq = 0
+                try:
+                    while sink._running:
+                        seq, jpeg = sink._wait_for_jpeg(seq)
+                        if jpeg is None:
+                            continue
+                        self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\n")
+                        self.wfile.write(f"Content-Length: {len(jpeg)}\r\n\r\n".encode("ascii"))
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b"\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), StreamHandler)
+        self._server.daemon_threads = True
+        super().__init__("mjpeg-sink")
+        threading.Thread(target=self._server.serve_forever, name="mjpeg-http", daemon=True).start()
+        logger.info(f"Streaming MJPEG at http://{host}:{port}/")
+
+    def _consume(self, frame: np.ndarray) -> None:
+        success, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if success:
+            with self._jpeg_cond:
+                self._jpeg = encoded.tobytes()
+                self._jpeg_seq += 1
+                self._jpeg_cond.notify_all()
+
+    def _wait_for_jpeg(self, seq: int) -> Tuple[int, Optional[bytes]]:
+        with self._jpeg_cond:
+            if not self._jpeg_cond.wait_for(lambda: self._jpeg_seq > seq, timeout=0.5):
+                return seq, None
+            return self._jpeg_seq, self._jpeg
+
+    def _release(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+def create_sink(spec: str = Config.FRAME_SINK) -> FrameSink:
+    """
+    Create a frame sink from a spec string.
+
+    Args:
+    - spec (str): "none" (headless), "window", "file:<path>", "shm:<name>" or "mjpeg[:<port>]".
+
+    Returns:
+    - FrameSink: The sink.
+    """
+    kind, _, arg = spec.partition(":")
+    kind = kind.strip().lower()
+    if kind in ("", "none", "headless"):
+        return NullSink()
+    if kind == "window":
+        return WindowSink()
+    if kind == "file" and arg:
+        return VideoFileSink(arg)
+    if kind == "shm" and arg:
+        return SharedMemorySink(arg)
+    if kind == "mjpeg":
+        return MJPEGSink(int(arg) if arg else Config.MJPEG_PORT)
+    raise ValueError(f"Unknown frame sink: {spec!r}")
@@ -0,0 +1,328 @@
+"""
+Tracker backends: DeepSort with its CNN embedder, DeepSort with cheap supplied embeddings, or a NumPy SORT tracker.
+
+The DeepSort backends live in `deepsort_tracker` and are imported only when selected, so the
+SORT tracker works without deep_sort_realtime installed.
+"""
+
+import cv2
+import logging
+import numpy as np
+from typing import TYPE_CHECKING, Any, List, Optional, Sequence, Tuple, Union
+
+from .config import FacialRecognitionConfiguration as Config
+
+if TYPE_CHECKING:
+    from .deepsort_tracker import DeepSortTracker
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def valid_boxes(boxes: np.ndarray) -> np.ndarray:
+    """
+    Drop detections with a non-positive width or height, as DeepSort does internally.
+
+    Args:
+    - boxes (np.ndarray): (N, 5+) array of [x, y, w, h, score, ...] rows.
+
+    Returns:
+    - np.ndarray: The rows with positive width and height.
+    """
+    return boxes[(boxes[:, 2] > 0) & (boxes[:, 3] > 0)]
+
+def to_raw_detections(boxes: np.ndarray) -> List[Tuple[List[int], float, int]]:
+    """
+    Convert a detection array to DeepSort's `([l, t, w, h], confidence, class)` tuples.
+
+    Args:
+    - boxes (np.ndarray): (N, 5+) array of [x, y, w, h, score, ...] rows.
+
+    Returns:
+    - List[Tuple[List[int], float, int]]: DeepSort raw detections.
+    """
+    return [(ltwh, score, 0) for ltwh, score in zip(boxes[:, :4].astype(np.int32).tolist(), boxes[:, 4].tolist())]
+
+def patch_embeddings(frame: np.ndarray, boxes: np.ndarray, size: int = Config.PATCH_EMBEDDING_SIZE) -> np.ndarray:
+    """
+    Compute cheap appearance embeddings from small colour thumbnails of the face boxes.
+
+    Each box is area-resized to `size` x `size` pixels, flattened, centred and
+    L2-normalized. This is enough for DeepSort's cosine gating to tell nearby
+    faces apart, at a tiny fraction of the cost of its CNN embedder.
+
+    Args:
+    - frame (np.ndarray): BGR frame.
+    - boxes (np.ndarray): (N, 5+) array of [x, y, w, h, score, ...] rows in frame pixels.
+    - size (int): Thumbnail side length.
+
+    Returns:
+    - np.ndarray: (N, size * size * 3) float32 embeddings.
+    """
+    img_height, img_width = frame.shape[:2]
+    embeddings = np.empty((len(boxes), size * size * 3), dtype=np.float32)
+    for i, (x, y, w, h) in enumerate(boxes[:, :4].astype(np.int32)):
+        x_start, y_start = max(0, x), max(0, y)
+        x_end, y_end = min(img_width, x + w), min(img_height, y + h)
+        if x_end <= x_start or y_end <= y_start:
+            embeddings[i] = 1.0
+        else:
+            thumbnail = cv2.resize(frame[y_start:y_end, x_start:x_end], (size, size), interpolation=cv2.INTER_AREA)
+            embeddings[i] = thumbnail.reshape(-1)
+            embeddings[i] -= embeddings[i].mean()
+    embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-6)
+    return embeddings
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Compute pairwise IoU between two sets of boxes.
+
+    Args:
+    - boxes_a (np.ndarray): (A, 4) array of [left, top, right, bottom] boxes.
+    - boxes_b (np.ndarray): (B, 4) array of [left, top, right, bottom] boxes.
+
+    Returns:
+    - np.ndarray: (A, B) IoU matrix.
+    """
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod(np.maximum(bottom_right - top_left, 0), axis=2)
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    return intersection / np.maximum(area_a[:, None] + area_b[None, :] - intersection, 1e-9)
+
+class SortTrack:
+    """
+    Track of the NumPy SORT tracker, with the attributes and methods of a DeepSort track used by the pipeline.
+    Like DeepSort's `others`, `others` holds the detection row matched on the current frame, if any.
+
+    The Kalman state matches DeepSort's: `mean` is [cx, cy, aspect, height] and
+    their velocities, and `covariance` is the 8x8 state covariance.
+    """
+
+    TENTATIVE, CONFIRMED, DELETED = 1, 2, 3
+
+    # Noise standard deviations as (weight * box height + constant), as in DeepSort's Kalman filter.
+    STD_WEIGHT_POSITION = 1.0 / 20
+    STD_WEIGHT_VELOCITY = 1.0 / 160
+    _initial_std = (np.array([2, 2, 0, 2, 0, 0, 0, 0]) * STD_WEIGHT_POSITION + np.array([0, 0, 0, 0, 10, 10, 0, 10]) * STD_WEIGHT_VELOCITY,
+                    np.array([0, 0, 1e-2, 0, 0, 0, 1e-5, 0]))
+    _process_std = (np.array([1, 1, 0, 1, 0, 0, 0, 0]) * STD_WEIGHT_POSITION + np.array([0, 0, 0, 0, 1, 1, 0, 1]) * STD_WEIGHT_VELOCITY,
+                    np.array([0, 0, 1e-2, 0, 0, 0, 1e-5, 0]))
+    _measurement_std = (np.array([1, 1, 0, 1]) * STD_WEIGHT_POSITION, np.array([0, 0, 1e-1, 0]))
+
+    _motion = np.eye(8)
+    _motion[:4, 4:] = np.eye(4)
+
+    def __init__(self, track_id: str, detection: np.ndarray, n_init: int, max_age: int):
+        """
+        Args:
+        - track_id (str): Track ID.
+        - detection (np.ndarray): Initial detection row [x, y, w, h, score, ...].
+        - n_init (int): Consecutive matches needed to confirm the track.
+        - max_age (int): Frames the track survives without a match once confirmed.
+        """
+        self.track_id = track_id
+        self.hits = 1
+        self.age = 1
+        self.time_since_update = 0
+        self.state = self.TENTATIVE
+        self.det_conf: Optional[float] = float(detection[4])
+        self.original_ltwh: Optional[np.ndarray] = detection[:4].copy()
+        self.others: Optional[np.ndarray] = detection
+        self._n_init = n_init
+        self._max_age = max_age
+
+        measurement = self._to_xyah(detection[:4])
+        height = measurement[3]
+        self.mean = np.concatenate([measurement, np.zeros(4)])
+        self.covariance = np.diag(self._variance(self._initial_std, height))
+
+    def is_tentative(self) -> bool:
+        return self.state == self.TENTATIVE
+
+    def is_confirmed(self) -> bool:
+        return self.state == self.CONFIRMED
+
+    def is_deleted(self) -> bool:
+        return self.state == self.DELETED
+
+    def to_ltwh(self, orig: bool = False) -> np.ndarray:
+        if orig and self.original_ltwh is not None:
+            return self.original_ltwh.copy()
+        ltwh = self.mean[:4].copy()
+        ltwh[2] *= ltwh[3]
+        ltwh[:2] -= ltwh[2:] / 2
+        return ltwh
+
+    def to_ltrb(self, orig: bool = False) -> np.ndarray:
+        ltrb = self.to_ltwh(orig=orig)
+        ltrb[2:] += ltrb[:2]
+        return ltrb
+
+    def predict(self) -> None:
+        process_variance = self._variance(self._process_std, self.mean[3])
+        self.mean = self._motion @ self.mean
+        self.covariance = self._motion @ self.covariance @ self._motion.T
+        self.covariance.flat[::9] += process_variance
+        self.age += 1
+        self.time_since_update += 1
+        self.original_ltwh = None
+        self.det_conf = None
+        self.others = None
+
+    def update(self, detection: np.ndarray) -> None:
+        measurement = self._to_xyah(detection[:4])
+        projected_cov = self.covariance[:4, :4].copy()
+        projected_cov.flat[::5] += self._variance(self._measurement_std, self.mean[3])
+        gain = np.linalg.solve(projected_cov, self.covariance[:4, :]).T
+        self.mean = self.mean + gain @ (measurement - self.mean[:4])
+        self.covariance = self.covariance - gain @ projected_cov @ gain.T
+
+        self.hits += 1
+        self.time_since_update = 0
+        self.det_conf = float(detection[4])
+        self.original_ltwh = detection[:4].copy()
+        self.others = detection
+        if self.state == self.TENTATIVE and self.hits >= self._n_init:
+            self.state = self.CONFIRMED
+
+    def mark_missed(self) -> None:
+        if self.state == self.TENTATIVE or self.time_since_update > self._max_age:
+            self.state = self.DELETED
+
+    @staticmethod
+    def _variance(std: Tuple[np.ndarray, np.ndarray], height: float) -> np.ndarray:
+        weight, constant = std
+        return np.square(weight * height + constant)
+
+    @staticmethod
+    def _to_xyah(ltwh: np.ndarray) -> np.ndarray:
+        x, y, w, h = (float(value) for value in ltwh)
+        return np.array([x + w / 2, y + h / 2, w / max(h, 1e-6), h])
+
+class SortTracker:
+    """
+    Pure-NumPy IoU/Kalman tracker (SORT with ByteTrack-style two-stage association).
+
+    Tracks are predicted with a constant-velocity Kalman filter, then matched
+    greedily by IoU first to high-confidence detections and then to the
+    remaining low-confidence ones; only high-confidence detections start new
+    tracks. It exposes the parts of DeepSort's interface used by the pipeline
+    (`update_tracks`, and `tracker.tracks`, `tracker.predict()` and
+    `tracker.del_tracks_ids`) and needs neither the frame nor embeddings.
+    """
+
+    def __init__(self, max_age: int = Config.MAX_AGE, n_init: int = Config.TRACKER_N_INIT,
+                 iou_threshold: float = Config.SORT_IOU_THRESHOLD, high_score: float = Config.SORT_HIGH_SCORE,
+                 camera: Optional[str] = None):
+        """
+        Args:
+        - max_age (int): Frames a confirmed track survives without a matching detection.
+        - n_init (int): Matches needed to confirm a track.
+        - iou_threshold (float): Minimum IoU between a predicted track box and a detection to match them.
+        - high_score (float): Detections at or above this confidence are matched first and may start tracks.
+        - camera (Optional[str]): Camera name to prefix track IDs with.
+        """
+        self.max_age = max_age
+        self.n_init = n_init
+        self.iou_threshold = iou_threshold
+        self.high_score = high_score
+        self.tracks: List[SortTrack] = []
+        self.del_tracks_ids: List[str] = []
+        self._prefix = f"{camera}-" if camera else ""
+        self._next_id = 1
+
+    @property
+    def tracker(self) -> "SortTracker":
+        # DeepSort keeps its tracks on an inner `tracker`; this tracker is its own.
+        return self
+
+    def predict(self) -> None:
+        """Advance every track by one frame with the Kalman filter."""
+        for track in self.tracks:
+            track.predict()
+
+    def update_tracks(self, raw_detections: Union[np.ndarray, Sequence], embeds: Optional[Sequence] = None,
+                      frame: Optional[np.ndarray] = None, **kwargs: Any) -> List[SortTrack]:
+        """
+        Predict all tracks one frame ahead and update them with the frame's detections.
+
+        Args:
+        - raw_detections (Union[np.ndarray, Sequence]): (N, 5+) array of [x, y, w, h, score, ...] rows, or
+          DeepSort-style `([l, t, w, h], confidence, class)` tuples.
+        - embeds (Optional[Sequence]): Ignored; accepted for DeepSort compatibility.
+        - frame (Optional[np.ndarray]): Ignored; accepted for DeepSort compatibility.
+
+        Returns:
+        - List[SortTrack]: The current tracks.
+        """
+        if isinstance(raw_detections, np.ndarray):
+            boxes = valid_boxes(raw_detections.astype(np.float64, copy=False))
+        elif len(raw_detections):
+            boxes = valid_boxes(np.array([list(ltwh) + [score] for ltwh, score, *_ in raw_detections], dtype=np.float64))
+        else:
+            boxes = np.empty((0, 5))
+
+        self.predict()
+
+        high = np.flatnonzero(boxes[:, 4] >= self.high_score)
+        low = np.flatnonzero(boxes[:, 4] < self.high_score)
+        unmatched_tracks = list(range(len(self.tracks)))
+        unmatched_tracks, unmatched_high = self._associate(boxes, unmatched_tracks, high)
+        unmatched_tracks, _ = self._associate(boxes, unmatched_tracks, low)
+
+        for track_index in unmatched_tracks:
+            self.tracks[track_index].mark_missed()
+        for detection_index in unmatched_high:
+            self.tracks.append(SortTrack(f"{self._prefix}{self._next_id}", boxes[detection_index].copy(),
+                                         self.n_init, self.max_age))
+            self._next_id += 1
+
+        self.del_tracks_ids = [track.track_id for track in self.tracks if track.is_deleted()]
+        self.tracks = [track for track in self.tracks if not track.is_deleted()]
+        return self.tracks
+
+    def _associate(self, boxes: np.ndarray, track_indices: List[int], detection_indices: np.ndarray) -> Tuple[List[int], List[int]]:
+        if not track_indices or not len(detection_indices):
+            return track_indices, list(detection_indices)
+
+        track_ltrb = np.array([self.tracks[i].to_ltrb() for i in track_indices])
+        detection_ltrb = boxes[detection_indices, :4].copy()
+        detection_ltrb[:, 2:] += detection_ltrb[:, :2]
+        iou = iou_matrix(track_ltrb, detection_ltrb)
+
+        matched_tracks, matched_detections = set(), set()
+        for flat_index in np.argsort(-iou, axis=None):
+            row, col = divmod(int(flat_index), iou.shape[1])
+            if iou[row, col] < self.iou_threshold:
+                break
+            if row in matched_tracks or col in matched_detections:
+                continue
+            matched_tracks.add(row)
+            matched_detections.add(col)
+            detection_index = detection_indices[col]
+            self.tracks[track_indices[row]].update(boxes[detection_index].copy())
+
+        return ([index for row, index in enumerate(track_indices) if row not in matched_tracks],
+                [int(index) for col, index in enumerate(detection_indices) if col not in matched_detections])
+
+def create_tracker(backend: str = Config.TRACKER_BACKEND, camera: Optional[str] = None) -> Union["DeepSortTracker", SortTracker]:
+    """
+    Create a tracker for the configured backend.
+
+    Args:
+    - backend (str): "deepsort" (DeepSort with its CNN embedder), "deepsort_lite" (DeepSort with
+      `patch_embeddings`) or "sort" (NumPy IoU/Kalman tracker).
+    - camera (Optional[str]): Camera name to prefix track IDs with.
+
+    Returns:
+    - Union[DeepSortTracker, SortTracker]: The tracker.
+    """
+    if backend == "sort":
+        return SortTracker(camera=camera)
+    if backend not in ("deepsort", "deepsort_lite"):
+        raise ValueError(f"Unknown tracker backend: {backend!r}")
+
+    # deep_sort_realtime is only needed, and imported, for the DeepSort backends
+    from .deepsort_tracker import DeepSortTracker
+    return DeepSortTracker(supplied_embeddings=backend == "deepsort_lite", camera=camera)
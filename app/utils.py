@@ -2,38 +2,115 @@
 
 import os
 import cv2
+import queue
 import logging
+import threading
 import numpy as np
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Optional, Tuple
+from .config import FacialRecognitionConfiguration as Config
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def save_face_image(frame: np.ndarray, x: int, y: int, w: int, h: int, 
-                    track_info: Dict[str, Any], track_id: int, 
-                    img_width: int, img_height: int) -> None:
+class FaceImageWriter:
+    """Write face crops to disk on a background thread so saving never blocks the video loop."""
+
+    def __init__(self, max_queue_size: int = 64):
+        """
+        Args:
+        - max_queue_size (int): Maximum number of crops waiting to be written; extra crops are dropped.
+        """
+        self._queue: "queue.Queue[Tuple[str, np.ndarray]]" = queue.Queue(maxsize=max_queue_size)
+        self._thread = threading.Thread(target=self._write_loop, name="face-image-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, path: str, image: np.ndarray) -> bool:
+        """
+        Queue a crop to be written.
+
+        Args:
+        - path (str): Destination path.
+        - image (np.ndarray): The crop. It must not be modified afterwards.
+
+        Returns:
+        - bool: True if queued, False if the queue is full and the crop was dropped.
+        """
+        try:
+            self._queue.put_nowait((path, image))
+            return True
+        except queue.Full:
+            logger.warning(f"Face image writer is busy, not saving {path}")
+            return False
+
+    def _write_loop(self) -> None:
+        while True:
+            path, image = self._queue.get()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if not cv2.imwrite(path, image):
+                logger.error(f"Failed to write face image to {path}")
+
+_face_image_writer: Optional[FaceImageWriter] = None
+
+def crop_face_image(frame: np.ndarray, x: int, y: int, w: int, h: int,
+                    img_width: int, img_height: int, margin: int = 100) -> np.ndarray:
     """
-    Save a face image from the given frame.
+    Copy a face crop with a margin out of the given frame.
 
     Args:
     - frame (np.ndarray): The input frame.
     - x, y, w, h (int): Bounding box coordinates and dimensions.
-    - track_info (Dict[str, Any]): Information about the current track.
-    - track_id (int): ID of the current track.
     - img_width (int): Width of the input frame.
     - img_height (int): Height of the input frame.
+    - margin (int): Margin in pixels added around the bounding box.
+
+    Returns:
+    - np.ndarray: The crop, copied so it stays valid after the frame buffer is reused.
     """
-    face_img_path = f"{track_info['dir_path']}/face_{track_id}_{track_info['images_saved']}.png"
-    margin = 100
     x_start = max(0, x - margin)
     y_start = max(0, y - margin)
     x_end = min(img_width, x + w + margin)
     y_end = min(img_height, y + h + margin)
-    face_img = frame[int(y_start):int(y_end), int(x_start):int(x_end)]
-    cv2.imwrite(face_img_path, face_img)
+    return frame[int(y_start):int(y_end), int(x_start):int(x_end)].copy()
+
+def save_face_image(frame: np.ndarray, x: int, y: int, w: int, h: int, 
+                    track_info: Dict[str, Any], track_id: int, 
+                    img_width: int, img_height: int, quality: float = 1.0) -> bool:
+    """
+    Offer a face crop from the given frame to the track's top-K crop buffer.
+
+    The crop is only copied out of the frame if its quality ranks among the
+    best kept so far. If `Config.PERSIST_FACE_IMAGES` is set, kept crops are
+    also written to the track's directory in the background.
+
+    Args:
+    - frame (np.ndarray): The input frame.
+    - x, y, w, h (int): Bounding box coordinates and dimensions.
+    - track_info (Dict[str, Any]): Information about the current track, with a `CropBuffer` under 'crop_buffer'.
+    - track_id (int): ID of the current track.
+    - img_width (int): Width of the input frame.
+    - img_height (int): Height of the input frame.
+    - quality (float): Quality score of the face (see `face_quality`).
+
+    Returns:
+    - bool: True if the crop was kept.
+    """
+    global _face_image_writer
+
+    face_img = track_info['crop_buffer'].offer(
+        quality, lambda: crop_face_image(frame, x, y, w, h, img_width, img_height)
+    )
+    if face_img is None:
+        return False
+
+    if Config.PERSIST_FACE_IMAGES:
+        if _face_image_writer is None:
+            _face_image_writer = FaceImageWriter()
+        face_img_path = f"{track_info['dir_path']}/face_{track_id}_{track_info['images_saved']}.png"
+        _face_image_writer.write(face_img_path, face_img)
 
     track_info['images_saved'] += 1
-    logger.info(f"Saving image for track ID: {track_id} at {face_img_path}")
+    logger.info(f"Kept face image {track_info['images_saved']} (quality {quality:.3f}) for track ID: {track_id}")
+    return True
 
 def extract_ltrb_from_track(track: Any) -> Tuple[int, int, int, int]:
     """
@@ -1,83 +1,229 @@
 """Module for feature vector extraction and facial analysis."""
 
+import cv2
 import logging
 import numpy as np
 import os
-from deepface import DeepFace
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+from .config import FacialRecognitionConfiguration as Config
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_feature_vector(directory: str) -> Optional[np.ndarray]:
+def _preprocess_face(image: np.ndarray, target_size: Tuple[int, int]) -> np.ndarray:
     """
-    Calculate the average feature vector from all PNG images in the specified directory using DeepFace.
+    Detect, align and resize the face in a crop exactly as `DeepFace.represent` does.
+
+    Args:
+    - image (np.ndarray): BGR face crop.
+    - target_size (Tuple[int, int]): Model input shape as (height, width).
+
+    Returns:
+    - np.ndarray: Preprocessed face of shape (height, width, 3).
+    """
+    from deepface import DeepFace
+    from deepface.modules import preprocessing
+
+    face = DeepFace.extract_faces(
+        img_path=image,
+        detector_backend=Config.EMBEDDING_DETECTOR_BACKEND,
+        enforce_detection=False
+    )[0]['face']
+    face = face[:, :, ::-1]
+    return preprocessing.resize_image(img=face, target_size=(target_size[1], target_size[0]))[0]
+
+def get_feature_vectors(images: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    Calculate Facenet512 feature vectors for many face crops with stacked forward passes.
+
+    Crops may come from any number of tracks; use `pool_feature_vectors` to average them per track.
+
+    Args:
+    - images (Sequence[np.ndarray]): BGR face crops.
+
+    Returns:
+    - np.ndarray: Array of shape (N, 512). Rows for crops that failed to process are NaN.
+    """
+    from deepface import DeepFace
+
+    model = DeepFace.build_model("Facenet512")
+    embeddings = np.full((len(images), Config.FEATURE_VECTOR_DIMENSION), np.nan, dtype=np.float32)
+
+    faces, rows = [], []
+    for row, image in enumerate(images):
+        try:
+            faces.append(_preprocess_face(image, model.input_shape))
+            rows.append(row)
+        except Exception as e:
+            logger.error(f"Failed to preprocess image {row}: {e}")
+
+    for start in range(0, len(faces), Config.EMBEDDING_BATCH_SIZE):
+        batch = np.stack(faces[start:start + Config.EMBEDDING_BATCH_SIZE])
+        embeddings[rows[start:start + len(batch)]] = model.model(batch, training=False).numpy()
+
+    logger.info(f"Calculated feature vectors for {len(faces)} of {len(images)} images.")
+    return embeddings
+
+def pool_feature_vectors(embeddings: np.ndarray, keys: Sequence[Any]) -> Dict[Any, np.ndarray]:
+    """
+    Average feature vectors that share a key, skipping rows that failed to process.
+
+    Args:
+    - embeddings (np.ndarray): Array of shape (N, D) from `get_feature_vectors`.
+    - keys (Sequence[Any]): Key (e.g. track ID) of each row.
+
+    Returns:
+    - Dict[Any, np.ndarray]: Mean feature vector per key that has at least one valid row.
+    """
+    valid = ~np.isnan(embeddings).any(axis=1)
+    if not valid.any():
+        return {}
+
+    unique_keys, inverse = np.unique(np.asarray(keys)[valid], return_inverse=True)
+    sums = np.zeros((len(unique_keys), embeddings.shape[1]), dtype=np.float64)
+    np.add.at(sums, inverse, embeddings[valid])
+    means = sums / np.bincount(inverse)[:, None]
+    return dict(zip(unique_keys.tolist(), means))
+
+class TrackEmbedding:
+    """
+    Running mean of a track's L2-normalized feature vectors, kept in float32.
+
+    New embeddings are folded in as better crops arrive, so the track's vector
+    improves over its lifetime without re-embedding earlier crops. The vector
+    the identity was last looked up with is remembered; `drift` is the cosine
+    distance between it and the current mean, and `needs_query` tells when the
+    identity should be looked up again.
+    """
+
+    def __init__(self, dimension: int = Config.FEATURE_VECTOR_DIMENSION,
+                 drift_threshold: float = Config.EMBEDDING_DRIFT_THRESHOLD):
+        """
+        Args:
+        - dimension (int): Feature vector dimension.
+        - drift_threshold (float): Cosine distance from the last queried vector that triggers a new query.
+        """
+        self.drift_threshold = drift_threshold
+        self.count = 0
+        self.queries = 0
+        self._mean = np.zeros(dimension, dtype=np.float32)
+        self._queried: Optional[np.ndarray] = None
+
+    def update(self, embeddings: np.ndarray) -> int:
+        """
+        Fold new feature vectors into the running mean.
+
+        Args:
+        - embeddings (np.ndarray): Array of shape (N, D); rows containing NaN are skipped.
+
+        Returns:
+        - int: Number of vectors added.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(-1, len(self._mean))
+        embeddings = embeddings[~np.isnan(embeddings).any(axis=1)]
+        if not len(embeddings):
+            return 0
+
+        norms = np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        self.count += len(embeddings)
+        self._mean += ((embeddings / norms).sum(axis=0) - len(embeddings) * self._mean) / self.count
+        return len(embeddings)
+
+    @property
+    def vector(self) -> np.ndarray:
+        """The normalized mean feature vector."""
+        return self._mean / max(float(np.linalg.norm(self._mean)), 1e-12)
+
+    @property
+    def drift(self) -> float:
+        """Cosine distance between the current vector and the last queried one (1 if never queried)."""
+        if self._queried is None:
+            return 1.0
+        return 1.0 - float(self.vector @ self._queried)
+
+    @property
+    def needs_query(self) -> bool:
+        """Whether the identity should be looked up (again) with the current vector."""
+        return self.count > 0 and (self._queried is None or self.drift > self.drift_threshold)
+
+    def mark_queried(self) -> np.ndarray:
+        """
+        Record that the identity is being looked up with the current vector.
+
+        Returns:
+        - np.ndarray: The vector to query with.
+        """
+        self._queried = self.vector
+        self.queries += 1
+        return self._queried
+
+def load_face_images(directory: str) -> List[np.ndarray]:
+    """
+    Load all PNG images in a directory.
 
     Args:
     - directory (str): Path to the directory containing PNG images.
 
     Returns:
-    - Optional[np.ndarray]: Average feature vector if successful, None otherwise.
+    - List[np.ndarray]: BGR images that could be read.
     """
-    feature_vectors = []
-    for filename in os.listdir(directory):
+    images = []
+    for filename in sorted(os.listdir(directory)):
         if filename.endswith(".png"):
-            img_path = os.path.join(directory, filename)
-            try:
-                output = DeepFace.represent(
-                    img_path=img_path,
-                    model_name="Facenet512",
-                    enforce_detection=False
-                )[0]
-                
-                if 'embedding' in output:
-                    feature_vector = output['embedding']
-                    feature_vectors.append(feature_vector)
-                    logger.info(f"Feature vector for {img_path} calculated successfully.")
-                else:
-                    logger.error(f"Feature vector 'embedding' key not found in the output for {img_path}")
-                    
-            except Exception as e:
-                logger.error(f"Failed to process image {img_path}: {e}")
-
-    if feature_vectors:
-        feature_vectors = np.array(feature_vectors)
-        average_vector = np.mean(feature_vectors, axis=0)
-        return average_vector
+            image = cv2.imread(os.path.join(directory, filename))
+            if image is not None:
+                images.append(image)
+            else:
+                logger.error(f"Failed to read image {filename} in {directory}")
+    return images
+
+def get_feature_vector(images: Sequence[np.ndarray]) -> Optional[np.ndarray]:
+    """
+    Calculate the average feature vector of a track's face crops using DeepFace.
+
+    Args:
+    - images (Sequence[np.ndarray]): BGR face crops.
+
+    Returns:
+    - Optional[np.ndarray]: Average feature vector if successful, None otherwise.
+    """
+    pooled = pool_feature_vectors(get_feature_vectors(images), [0] * len(images)) if len(images) else {}
+    if 0 in pooled:
+        return pooled[0]
     else:
         logger.info("No valid images processed.")
         return None
 
-def analyze_features(directory: str) -> Optional[Dict[str, Any]]:
+def analyze_features(images: Sequence[np.ndarray]) -> Optional[Dict[str, Any]]:
     """
-    Analyzes the feature vector of the first PNG image in a directory using DeepFace to get attributes like age, gender, and race.
+    Analyzes the first face crop using DeepFace to get attributes like age, gender, and race.
 
     Args:
-    - directory (str): Path to the directory containing PNG images.
+    - images (Sequence[np.ndarray]): BGR face crops.
 
     Returns:
     - Optional[Dict[str, Any]]: Dictionary containing analysis results if successful, None otherwise.
     """
-    for filename in os.listdir(directory):
-        if filename.endswith(".png"):
-            img_path = os.path.join(directory, filename)
-            try:
-                output = DeepFace.analyze(
-                    img_path=img_path,
-                    actions=['age', 'gender', 'race']
-                )[0]
-                
-                logger.info(f"Analysis Output: {output}")
-                
-                results = {
-                    "age": output["age"],
-                    "gender": output["dominant_gender"],
-                    "race": output["dominant_race"]
-                }
-                return results
-            except Exception as e:
-                logger.error(f"Failed to analyze image {img_path}: {e}")
-                return None
-            
-    logger.info("No PNG files found in the directory.")
-    return None
+    if not len(images):
+        logger.info("No face images to analyze.")
+        return None
+
+    from deepface import DeepFace
+
+    try:
+        output = DeepFace.analyze(
+            img_path=images[0],
+            actions=['age', 'gender', 'race']
+        )[0]
+
+        logger.info(f"Analysis Output: {output}")
+
+        results = {
+            "age": output["age"],
+            "gender": output["dominant_gender"],
+            "race": output["dominant_race"]
+        }
+        return results
+    except Exception as e:
+        logger.error(f"Failed to analyze image: {e}")
+        return None
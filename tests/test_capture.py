@@ -0,0 +1,61 @@
+import time
+
+import cv2
+import numpy as np
+
+from app.capture import FrameCapture, FrameRingBuffer
+
+def publish(buffer, value, shape=(2, 3, 3)):
+    slot = buffer.acquire_slot(shape)
+    slot.fill(value)
+    buffer.publish(slot)
+    return slot
+
+def test_reader_gets_newest_frame_and_older_frames_count_as_dropped():
+    buffer = FrameRingBuffer(4)
+    assert buffer.get_latest(timeout=0) == (-1, None)
+
+    for value in (1, 2, 3):
+        publish(buffer, value)
+    sequence, frame = buffer.get_latest(timeout=0)
+    assert sequence == 3
+    assert frame[0, 0, 0] == 3
+    assert (buffer.frames_written, buffer.frames_dropped, buffer.frames_read) == (3, 2, 1)
+    assert buffer.get_latest(timeout=0) == (-1, None)
+
+def test_slot_being_read_is_not_overwritten_until_next_read():
+    buffer = FrameRingBuffer(3)
+    publish(buffer, 1)
+    _, frame = buffer.get_latest(timeout=0)
+    for value in range(2, 10):
+        publish(buffer, value)
+        assert frame[0, 0, 0] == 1
+
+    _, newest = buffer.get_latest(timeout=0)
+    assert newest[0, 0, 0] == 9
+
+def test_slots_are_reused_and_reallocated_only_on_shape_change():
+    buffer = FrameRingBuffer(3)
+    slots = {id(publish(buffer, value)) for value in range(6)}
+    assert len(slots) == 3
+
+    resized = buffer.acquire_slot((4, 3, 3))
+    assert resized.shape == (4, 3, 3)
+    assert id(resized) not in slots
+
+def test_file_source_stops_at_end_of_file(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (32, 24))
+    for value in range(5):
+        writer.write(np.full((24, 32, 3), value * 40, dtype=np.uint8))
+    writer.release()
+
+    capture = FrameCapture(path, buffer_size=8)
+    assert capture.start()
+    deadline = time.monotonic() + 5.0
+    while capture.is_running() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not capture.is_running()
+    assert capture.frames_captured == 5
+    assert capture.read_latest(timeout=0)[0] == 5
+    capture.stop()
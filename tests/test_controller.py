@@ -0,0 +1,64 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.config import FacialRecognitionConfiguration as Config
+from app.controller import AxisController, PanTiltController, focal_length
+
+WIDTH, HEIGHT = 1280, 720
+PAN, TILT = 2500, 2600
+
+def track(cx, cy, track_id=1, vx=0.0, vy=0.0):
+    return SimpleNamespace(track_id=track_id, mean=np.array([cx, cy, 1.0, 100.0, vx, vy, 0.0, 0.0]))
+
+def fixed_gains(pan_tilt):
+    pan_tilt.pan = AxisController(Config.PAN_MIN, Config.PAN_MAX, kp=0.5, ki=0.0, deadband=5)
+    pan_tilt.tilt = AxisController(Config.TILT_MIN, Config.TILT_MAX, kp=0.5, ki=0.0, deadband=5)
+    return pan_tilt
+
+@pytest.fixture
+def pan_tilt():
+    return fixed_gains(PanTiltController(latency=0.1))
+
+def pan_target(pan_tilt, offset):
+    degrees = math.degrees(math.atan2(offset, focal_length(WIDTH, pan_tilt.hfov)))
+    return PAN + degrees * pan_tilt.pan_units
+
+def test_centred_face_holds_the_servos(pan_tilt):
+    assert pan_tilt.update(track(WIDTH / 2, HEIGHT / 2), WIDTH, HEIGHT, PAN, TILT, now=0.0) is None
+
+def test_offset_face_moves_pan_towards_it_by_kp(pan_tilt):
+    pan, tilt = pan_tilt.update(track(WIDTH / 2 + 200, HEIGHT / 2), WIDTH, HEIGHT, PAN, TILT, now=0.0)
+    assert tilt == TILT
+    assert pan == round(PAN + 0.5 * (pan_target(pan_tilt, 200) - PAN))
+    assert math.copysign(1, pan - PAN) == Config.PAN_DIRECTION
+
+def test_moves_under_way_are_not_commanded_twice(pan_tilt):
+    # Within the latency the camera has not moved yet, so each frame still shows the same offset.
+    target = pan_target(pan_tilt, 200)
+    pan, tilt = PAN, TILT
+    for frame in range(3):
+        command = pan_tilt.update(track(WIDTH / 2 + 200, HEIGHT / 2), WIDTH, HEIGHT, pan, tilt, now=frame * 0.03)
+        if command is not None:
+            pan, tilt = command
+    assert abs(pan - target) < abs(PAN - target)
+    assert (pan - PAN) * (target - pan) >= 0  # approached the target without overshooting it
+
+def test_small_corrections_are_not_sent():
+    pan_tilt = fixed_gains(PanTiltController(latency=0.1, min_step=50))
+    assert pan_tilt.update(track(WIDTH / 2 + 30, HEIGHT / 2), WIDTH, HEIGHT, PAN, TILT, now=0.0) is None
+    assert pan_tilt.commands == 0
+
+def test_velocity_feed_forward_leads_a_moving_face():
+    still = fixed_gains(PanTiltController(latency=0.1)).update(track(WIDTH / 2 + 200, HEIGHT / 2), WIDTH, HEIGHT, PAN, TILT, now=0.0)
+    moving = fixed_gains(PanTiltController(latency=0.1)).update(track(WIDTH / 2 + 200, HEIGHT / 2, vx=10.0), WIDTH, HEIGHT, PAN, TILT, now=0.0)
+    assert (moving[0] - still[0]) * Config.PAN_DIRECTION > 0
+
+def test_axis_integral_is_frozen_while_saturated():
+    axis = AxisController(0, 100, kp=0.5, ki=1.0, deadband=1, integral_limit=1000.0)
+    assert axis.update(target=500, pose=0, position=100, dt=1.0) == 100
+    assert axis._integral == 0.0
+    assert axis.update(target=60, pose=50, position=50, dt=1.0) == 65.0
+    assert axis.update(target=50.5, pose=50, position=50, dt=1.0) == 50
@@ -0,0 +1,43 @@
+import numpy as np
+
+from app.identity_cache import IdentityCache
+
+def unit(seed, dimension=8):
+    return np.random.default_rng(seed).standard_normal(dimension).tolist()
+
+def test_match_returns_similar_identity_and_counts_hits():
+    cache = IdentityCache(max_size=4, ttl=60.0, threshold=0.5)
+    assert cache.match(unit(0)) is None
+
+    cache.put("alice", unit(0))
+    cache.put("bob", unit(1))
+    noisy = (np.asarray(unit(0)) + 0.05 * np.asarray(unit(2))).tolist()
+    assert cache.match(noisy) == "alice"
+    assert cache.match((-np.asarray(unit(0))).tolist()) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_least_recently_used_identity_is_evicted():
+    cache = IdentityCache(max_size=2, ttl=60.0, threshold=0.9)
+    cache.put("a", unit(0))
+    cache.put("b", unit(1))
+    assert cache.match(unit(0)) == "a"  # "b" is now least recently used
+    cache.put("c", unit(2))
+
+    assert len(cache) == 2
+    assert cache.match(unit(1)) is None
+    assert cache.match(unit(0)) == "a"
+    assert cache.match(unit(2)) == "c"
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.identity_cache.time.monotonic", lambda: now[0])
+    cache = IdentityCache(max_size=4, ttl=10.0, threshold=0.9)
+    cache.put("a", unit(0))
+
+    now[0] += 5.0
+    assert cache.match(unit(0)) == "a"  # a hit refreshes the TTL
+    now[0] += 9.0
+    assert cache.match(unit(0)) == "a"
+    now[0] += 11.0
+    assert cache.match(unit(0)) is None
+    assert len(cache) == 0
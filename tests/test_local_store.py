@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from app.local_store import LocalVectorIndex
+
+def random_vectors(count, dimension=16, seed=0):
+    return np.random.default_rng(seed).standard_normal((count, dimension)).astype(np.float32)
+
+def records(vectors, prefix="v"):
+    return [{"id": f"{prefix}{i}", "values": vector.tolist()} for i, vector in enumerate(vectors)]
+
+def test_exact_query_returns_best_matches_in_order():
+    vectors = random_vectors(50)
+    index = LocalVectorIndex(None, 16)
+    assert index.upsert(records(vectors)) == {"upserted_count": 50}
+
+    matches = index.query(vectors[7].tolist(), top_k=3)["matches"]
+    assert matches[0]["id"] == "v7"
+    assert matches[0]["score"] == pytest.approx(1.0, abs=1e-5)
+    assert [m["score"] for m in matches] == sorted((m["score"] for m in matches), reverse=True)
+
+def test_upsert_overwrites_existing_id():
+    vectors = random_vectors(10)
+    index = LocalVectorIndex(None, 16)
+    index.upsert(records(vectors))
+    index.upsert([{"id": "v3", "values": (-vectors[3]).tolist()}])
+
+    assert len(index) == 10
+    assert index.query((-vectors[3]).tolist())["matches"][0]["id"] == "v3"
+
+def test_empty_index_and_dimension_check():
+    index = LocalVectorIndex(None, 16)
+    assert index.query([0.0] * 16) == {"matches": []}
+    with pytest.raises(ValueError):
+        index.upsert([{"id": "x", "values": [1.0, 2.0]}])
+    with pytest.raises(ValueError):
+        LocalVectorIndex(None, 16, mode="hnsw")
+
+def test_query_batch_matches_single_queries():
+    vectors = random_vectors(40)
+    index = LocalVectorIndex(None, 16)
+    index.upsert(records(vectors))
+    queries = random_vectors(5, seed=1)
+
+    batch = index.query_batch(queries.tolist(), top_k=4)
+    single = [index.query(query.tolist(), top_k=4) for query in queries]
+    assert [[m["id"] for m in r["matches"]] for r in batch] == [[m["id"] for m in r["matches"]] for r in single]
+
+def test_ivf_finds_stored_vectors():
+    vectors = random_vectors(300)
+    index = LocalVectorIndex(None, 16, mode="ivf", nprobe=2, ivf_min_size=50)
+    index.upsert(records(vectors))
+
+    for i in (0, 123, 299):
+        assert index.query(vectors[i].tolist())["matches"][0]["id"] == f"v{i}"
+
+def test_ivf_reassigns_overwritten_rows():
+    vectors = random_vectors(300)
+    index = LocalVectorIndex(None, 16, mode="ivf", nprobe=2, ivf_min_size=50)
+    index.upsert(records(vectors))
+    index.query(vectors[0].tolist())  # trains the index
+
+    index.upsert([{"id": "v5", "values": (-vectors[5]).tolist()}])
+    match = index.query((-vectors[5]).tolist())["matches"][0]
+    assert match["id"] == "v5"
+    assert match["score"] == pytest.approx(1.0, abs=1e-5)
+
+def test_ivf_indexes_vectors_added_after_training():
+    vectors = random_vectors(300)
+    index = LocalVectorIndex(None, 16, mode="ivf", nprobe=2, ivf_min_size=50)
+    index.upsert(records(vectors[:200]))
+    index.query(vectors[0].tolist())
+    index.upsert(records(vectors[200:], prefix="w"))
+
+    assert index.query(vectors[250].tolist())["matches"][0]["id"] == "w50"
+
+def test_persisted_index_reloads(tmp_path):
+    vectors = random_vectors(20)
+    path = str(tmp_path / "gallery" / "index")
+    index = LocalVectorIndex(path, 16)
+    index.upsert(records(vectors))
+    index.upsert([{"id": "v2", "values": (-vectors[2]).tolist()}])
+    del index
+
+    reloaded = LocalVectorIndex(path, 16)
+    assert len(reloaded) == 20
+    assert reloaded.query((-vectors[2]).tolist())["matches"][0]["id"] == "v2"
+    with pytest.raises(ValueError):
+        LocalVectorIndex(path, 8)
@@ -0,0 +1,75 @@
+import socket
+
+import pytest
+
+from app.metrics import BUCKETS, Histogram, MetricsRegistry
+
+def test_histogram_buckets_are_inclusive_upper_bounds_with_overflow():
+    histogram = Histogram(window=8)
+    for seconds in (0.0001, 0.0003, 0.003, 0.003, 20.0):
+        histogram.observe(seconds)
+
+    assert len(histogram.counts) == len(BUCKETS) + 1
+    assert histogram.counts[0] == 1  # 0.0001 is counted in its own bucket
+    assert histogram.counts[BUCKETS.index(0.0005)] == 1
+    assert histogram.counts[BUCKETS.index(0.005)] == 2
+    assert histogram.counts[-1] == 1
+    assert (histogram.count, histogram.sum) == (5, pytest.approx(20.0064))
+
+def test_histogram_window_keeps_the_most_recent_samples():
+    histogram = Histogram(window=3)
+    histogram.observe(1.0)
+    assert list(histogram.recent()) == [1.0]
+    for seconds in (2.0, 3.0, 4.0):
+        histogram.observe(seconds)
+    assert sorted(histogram.recent()) == [2.0, 3.0, 4.0]
+    assert histogram.count == 4
+
+def test_snapshot_reports_rolling_percentiles_in_milliseconds():
+    registry = MetricsRegistry(enabled=True, window=100)
+    for millis in range(1, 101):
+        registry.observe("face_detection", millis / 1000)
+    registry.set_gauge("recognition_queue", 3)
+
+    snapshot = registry.snapshot()
+    stage = snapshot['stages']['face_detection']
+    assert stage['count'] == 100
+    assert stage['mean_ms'] == pytest.approx(50.5)
+    assert stage['p50_ms'] == pytest.approx(50.5)
+    assert stage['p95_ms'] == pytest.approx(95.05)
+    assert stage['p99_ms'] == pytest.approx(99.01)
+    assert snapshot['gauges'] == {'recognition_queue': 3}
+
+def test_render_prometheus_emits_cumulative_buckets_sum_count_and_gauges():
+    registry = MetricsRegistry(enabled=True, window=10)
+    registry.observe("tracking", 0.003)
+    registry.observe("tracking", 0.02)
+    registry.observe("tracking", 20.0)
+    registry.set_gauge("frames_dropped", 7)
+
+    lines = registry.render_prometheus().splitlines()
+    assert lines[0] == "# TYPE facial_profiling_stage_seconds histogram"
+    assert 'facial_profiling_stage_seconds_bucket{stage="tracking",le="0.0025"} 0' in lines
+    assert 'facial_profiling_stage_seconds_bucket{stage="tracking",le="0.005"} 1' in lines
+    assert 'facial_profiling_stage_seconds_bucket{stage="tracking",le="0.025"} 2' in lines
+    assert 'facial_profiling_stage_seconds_bucket{stage="tracking",le="10.0"} 2' in lines
+    assert 'facial_profiling_stage_seconds_bucket{stage="tracking",le="+Inf"} 3' in lines
+    assert 'facial_profiling_stage_seconds_count{stage="tracking"} 3' in lines
+    assert lines[-2:] == ["# TYPE facial_profiling_gauge gauge", 'facial_profiling_gauge{name="frames_dropped"} 7']
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    with registry.timer("face_detection"):
+        pass
+    registry.observe("face_detection", 0.1)
+    registry.set_gauge("recognition_queue", 1)
+    assert registry.snapshot()['stages'] == {} and registry.snapshot()['gauges'] == {}
+
+def test_http_server_on_a_busy_port_is_logged_not_raised():
+    with socket.socket() as busy:
+        busy.bind(("0.0.0.0", 0))
+        busy.listen()
+        registry = MetricsRegistry(enabled=True)
+        registry.start_http_server(busy.getsockname()[1])
+    assert registry._server is None
+    registry.stop()
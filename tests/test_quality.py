@@ -0,0 +1,75 @@
+import numpy as np
+
+from app.quality import CropBuffer, face_quality, frontality
+
+def crop(value):
+    return lambda: np.full((2, 2, 3), value, dtype=np.uint8)
+
+def test_crop_buffer_keeps_top_k_and_only_copies_kept_crops():
+    buffer = CropBuffer(k=2, patience=3, max_offers=100, min_quality=0.1)
+    made = []
+
+    def tracked(value):
+        def make():
+            made.append(value)
+            return crop(value)()
+        return make
+
+    for quality, value in ((0.5, 5), (0.05, 0), (0.7, 7), (0.4, 4), (0.9, 9)):
+        buffer.offer(quality, tracked(value))
+
+    assert [int(kept[0, 0, 0]) for kept in buffer.crops] == [9, 7]
+    assert made == [5, 7, 9]  # below min_quality and below the top K are never copied
+    assert buffer.best_quality == 0.9
+
+def test_crop_buffer_is_ready_when_quality_plateaus_or_after_max_offers():
+    buffer = CropBuffer(k=2, patience=2, max_offers=100, min_quality=0.0)
+    buffer.offer(0.5, crop(1))
+    buffer.offer(0.6, crop(2))
+    assert not buffer.ready
+    buffer.offer(0.1, crop(3))
+    assert not buffer.ready
+    buffer.offer(0.2, crop(4))
+    assert buffer.ready
+
+    buffer = CropBuffer(k=3, patience=2, max_offers=3, min_quality=0.0)
+    buffer.offer(0.5, crop(1))
+    buffer.offer(0.6, crop(2))
+    assert not buffer.ready
+    buffer.offer(0.7, crop(3))
+    assert buffer.ready
+
+def test_fresh_crops_hold_the_latest_k_kept_since_clear():
+    buffer = CropBuffer(k=2, patience=2, max_offers=100, min_quality=0.0)
+    for quality, value in ((0.1, 1), (0.2, 2), (0.3, 3)):
+        buffer.offer(quality, crop(value))
+    assert [int(kept[0, 0, 0]) for kept in buffer.fresh] == [2, 3]
+
+    buffer.clear_fresh()
+    buffer.offer(0.05, crop(4))
+    assert buffer.fresh == []
+    buffer.offer(0.4, crop(5))
+    assert [int(kept[0, 0, 0]) for kept in buffer.fresh] == [5]
+
+def detection(x, y, w, h, score, nose_x):
+    # right eye at x + 0.3w, left eye at x + 0.7w
+    return np.array([x, y, w, h, score, x + 0.3 * w, y + 0.4 * h, x + 0.7 * w, y + 0.4 * h, nose_x, y + 0.6 * h],
+                    dtype=np.float32)
+
+def test_frontality_falls_as_the_nose_moves_towards_an_eye():
+    assert frontality(detection(0, 0, 100, 100, 1.0, 50)) == 1.0
+    assert abs(frontality(detection(0, 0, 100, 100, 1.0, 60)) - 0.5) < 1e-6
+    assert frontality(detection(0, 0, 100, 100, 1.0, 75)) == 0.0
+    assert frontality(np.array([0, 0, 100, 100, 1.0])) == 1.0
+
+def test_face_quality_prefers_sharp_confident_faces_inside_the_frame():
+    rng = np.random.default_rng(0)
+    sharp = rng.integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    blurred = np.full_like(sharp, 128)
+    box = detection(100, 50, 120, 120, 0.9, 160)
+
+    assert face_quality(sharp, box) > face_quality(blurred, box)
+    less_confident = box.copy()
+    less_confident[4] = 0.45
+    assert face_quality(sharp, less_confident) < face_quality(sharp, box)
+    assert face_quality(sharp, detection(400, 300, 50, 50, 0.9, 425)) == 0.0
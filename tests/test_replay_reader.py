@@ -0,0 +1,72 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from app.replay_reader import ReplayReader, seek, segment_bounds, video_info
+
+FRAMES = 20
+
+@pytest.fixture(scope="module")
+def video(tmp_path_factory):
+    # Frame i is a flat grey of level 10 * i, which survives MJPG compression to within a few levels.
+    path = str(tmp_path_factory.mktemp("replay") / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (32, 24))
+    for index in range(FRAMES):
+        writer.write(np.full((24, 32, 3), 10 * index, dtype=np.uint8))
+    writer.release()
+    return path
+
+def frame_number(frame):
+    return int(round(frame.mean() / 10))
+
+def read_all(reader):
+    frames = []
+    while True:
+        index, frame = reader.read()
+        if frame is None:
+            return frames
+        frames.append((index, frame_number(frame)))
+
+def test_video_info(video):
+    assert video_info(video) == (10.0, FRAMES)
+    with pytest.raises(ValueError):
+        video_info(video + ".missing")
+
+def test_reader_returns_the_range_in_order_then_stays_at_the_end(video):
+    reader = ReplayReader(video, start=5, end=12, decode_ahead=2)
+    reader.start_decoding()
+    assert read_all(reader) == [(index, index) for index in range(5, 12)]
+    assert reader.read() == (-1, None)
+    assert reader.frames_read == 7
+    reader.stop()
+
+def test_reader_without_end_reads_to_the_end_of_the_video(video):
+    reader = ReplayReader(video, start=15)
+    reader.start_decoding()
+    assert [index for index, _ in read_all(reader)] == list(range(15, FRAMES))
+    reader.stop()
+
+def test_stop_unblocks_a_decoder_waiting_for_the_reader(video):
+    reader = ReplayReader(video, decode_ahead=1)
+    reader.start_decoding()
+    assert reader.read()[0] == 0
+    time.sleep(0.05)  # let the decoder fill the queue and block
+
+    reader.stop()
+    assert reader._thread is None
+
+def test_seek_positions_the_next_read(video):
+    cap = cv2.VideoCapture(video)
+    try:
+        assert seek(cap, 7)
+        success, frame = cap.read()
+        assert success and frame_number(frame) == 7
+        assert not seek(cap, FRAMES + 5)
+    finally:
+        cap.release()
+
+def test_segment_bounds_are_contiguous_and_cover_the_range():
+    assert segment_bounds(5, 12, 3) == [(5, 7), (7, 9), (9, 12)]
+    assert segment_bounds(0, 20, 1) == [(0, 20)]
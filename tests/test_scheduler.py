@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from app.scheduler import DetectionScheduler
+
+class FakeTrack:
+    def __init__(self, confirmed=True, time_since_update=0, sigma=1.0, height=100.0):
+        self._confirmed = confirmed
+        self.time_since_update = time_since_update
+        self.mean = np.array([0.0, 0.0, 1.0, height])
+        self.covariance = np.diag([sigma ** 2, sigma ** 2, 1.0, 1.0])
+
+    def is_confirmed(self):
+        return self._confirmed
+
+@pytest.fixture
+def schedule():
+    # smoothing=1.0 makes the cost averages equal the latest sample
+    return DetectionScheduler(target_frame_time=0.010, max_stride=8, uncertainty_threshold=0.5, max_age=30, smoothing=1.0)
+
+def test_stride_meets_target_from_measured_costs(schedule):
+    tracks = [FakeTrack()]
+    schedule.record(True, 0.030, tracks)
+    schedule.record(False, 0.002, tracks)
+    # (30 + (N - 1) * 2) / N <= 10 ms needs N >= 3.5
+    assert schedule.stride == 4
+
+    schedule.record(True, 0.008, tracks)
+    assert schedule.stride == 1
+
+def test_stride_is_capped_below_half_the_tracker_max_age():
+    schedule = DetectionScheduler(target_frame_time=0.010, max_stride=50, uncertainty_threshold=0.5, max_age=10, smoothing=1.0)
+    schedule.record(True, 1.0, [FakeTrack()])
+    schedule.record(False, 0.5, [FakeTrack()])
+    assert schedule.stride == 5
+
+def test_predicts_between_detections_until_stride_is_reached(schedule):
+    tracks = [FakeTrack()]
+    assert schedule.should_detect(tracks)  # first frame always detects
+    schedule.record(True, 0.030, tracks)
+    schedule.record(False, 0.002, tracks)
+    assert schedule.stride == 4
+
+    decisions = []
+    for _ in range(3):
+        detect = schedule.should_detect(tracks)
+        decisions.append(detect)
+        schedule.record(detect, 0.030 if detect else 0.002, tracks)
+        assert schedule.last_detected == detect
+    assert decisions == [False, False, True]
+
+def test_detection_is_forced_without_tracks_missed_tracks_or_high_uncertainty(schedule):
+    schedule.record(True, 0.030, [FakeTrack()])
+    schedule.record(False, 0.002, [FakeTrack()])
+    assert not schedule.should_detect([FakeTrack()])
+
+    assert schedule.should_detect([])
+    assert schedule.should_detect([FakeTrack(confirmed=False)])
+    assert schedule.should_detect([FakeTrack(sigma=80.0)])
+
+    schedule.record(True, 0.030, [FakeTrack(time_since_update=1)])
+    assert schedule.should_detect([FakeTrack()])
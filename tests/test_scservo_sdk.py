@@ -0,0 +1,178 @@
+import asyncio
+
+from app.scservo_sdk import (COMM_NOT_AVAILABLE, COMM_PORT_BUSY, COMM_RX_CORRUPT, COMM_RX_TIMEOUT, COMM_SUCCESS,
+                             AsyncGroupSyncRead, AsyncGroupSyncWrite, GroupSyncRead, GroupSyncWrite, PortHandler,
+                             async_protocol_packet_handler, scs_checksum, sms_sts)
+
+class FakeSerial:
+    """Loopback stand-in for serial.Serial: records writes and serves queued reply bytes."""
+
+    def __init__(self):
+        self.written = []
+        self.rx = bytearray()
+        self.timeout_sets = 0
+        self._timeout = 0
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, timeout):
+        self.timeout_sets += 1
+        self._timeout = timeout
+
+    @property
+    def in_waiting(self):
+        return len(self.rx)
+
+    def write(self, data):
+        self.written.append(bytes(data))
+        return len(data)
+
+    def read(self, length):
+        data = bytes(self.rx[:length])
+        del self.rx[:length]
+        return data
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+def reply(scs_id, params=b'', error=0):
+    body = bytes([scs_id, len(params) + 2, error]) + bytes(params)
+    return b'\xff\xff' + body + bytes([~sum(body) & 0xFF])
+
+def fake_port():
+    port_handler = PortHandler('fake')
+    port_handler.ser = FakeSerial()
+    port_handler.is_open = True
+    port_handler.tx_time_per_byte = 0.01
+    return port_handler
+
+# Packets below were recorded from the SDK before its packets were built with struct and bytearrays.
+
+def test_write_packets_match_the_reference_encoding():
+    port_handler = fake_port()
+    packet_handler = sms_sts(port_handler)
+    packet_handler.SyncWritePosEx(1, 2625, 3000, 150)
+    packet_handler.SyncWritePosEx(2, 2560, 3000, 150)
+    assert packet_handler.groupSyncWrite.txPacket() == COMM_SUCCESS
+    assert packet_handler.write1ByteTxOnly(3, 40, 1) == COMM_SUCCESS
+    assert packet_handler.write2ByteTxOnly(3, 42, 0x1234) == COMM_SUCCESS
+    assert packet_handler.write4ByteTxOnly(3, 42, 0x89ABCDEF) == COMM_SUCCESS
+
+    assert [packet.hex() for packet in port_handler.ser.written] == [
+        'fffffe148329070196410a0000b80b0296000a0000b80b30',
+        'ffff0304032801cc',
+        'ffff0305032a341284',
+        'ffff0307032aefcdab89d8',
+    ]
+
+def test_checksum_is_inverted_byte_sum_without_header():
+    packet = bytes.fromhex('ffff0305032a3412')
+    assert scs_checksum(packet + b'\x00', len(packet) + 1) == 0x84
+
+def test_status_packet_is_found_after_noise_and_decoded():
+    port_handler = fake_port()
+    packet_handler = sms_sts(port_handler)
+    port_handler.ser.rx += b'\x00\x12\xff' + reply(3, b'\x34\x12')
+    assert packet_handler.read2ByteTxRx(3, 56) == (0x1234, COMM_SUCCESS, 0)
+    port_handler.ser.rx += reply(3, b'\x01\x02\x03\x04')
+    assert packet_handler.read4ByteTxRx(3, 56) == (0x04030201, COMM_SUCCESS, 0)
+    assert port_handler.ser.written == [bytes.fromhex('ffff0304023802bc'), bytes.fromhex('ffff0304023804ba')]
+
+def test_corrupt_status_packet_is_reported():
+    port_handler = fake_port()
+    packet_handler = sms_sts(port_handler)
+    corrupt = bytearray(reply(3, b'\x34\x12'))
+    corrupt[-1] ^= 1
+    port_handler.ser.rx += corrupt
+    assert packet_handler.read2ByteTxRx(3, 56)[1] == COMM_RX_CORRUPT
+
+def test_group_sync_read_packet_and_parsing():
+    port_handler = fake_port()
+    group = GroupSyncRead(sms_sts(port_handler), 56, 4)
+    group.addParam(1)
+    group.addParam(2)
+    port_handler.ser.rx += reply(1, b'\x10\x00\x20\x00') + reply(2, b'\x30\x00\x40\x00')
+    assert group.txRxPacket() == COMM_SUCCESS
+    assert port_handler.ser.written == [bytes.fromhex('fffffe0682380401023a')]
+    assert (group.getData(1, 56, 2), group.getData(2, 58, 2), group.getData(2, 56, 4)) == (0x10, 0x40, 0x400030)
+
+def test_read_timeout_is_configured_once_for_repeated_transactions():
+    port_handler = fake_port()
+    packet_handler = sms_sts(port_handler)
+    for _ in range(5):
+        port_handler.ser.rx += reply(3, b'\x34\x12')
+        assert packet_handler.read2ByteTxRx(3, 56) == (0x1234, COMM_SUCCESS, 0)
+
+    assert port_handler.ser.timeout_sets == 1
+    assert port_handler.ser.timeout == port_handler.packet_timeout / 1000.0
+
+def test_read_after_the_deadline_only_takes_arrived_bytes():
+    port_handler = fake_port()
+    port_handler.setPacketTimeoutMillis(0)
+    port_handler.ser.rx += b'\xff\xff'
+    assert port_handler.readPort(6) == b'\xff\xff'
+    assert port_handler.readPort(6) == b''
+
+def test_missing_status_packet_times_out():
+    port_handler = fake_port()
+    packet_handler = sms_sts(port_handler)
+    assert packet_handler.read2ByteTxRx(3, 56)[1] == COMM_RX_TIMEOUT
+    assert not port_handler.is_using
+
+def test_async_handlers_on_one_port_share_a_lock_and_serialize():
+    port_handler = fake_port()
+    first = async_protocol_packet_handler(port_handler, 0)
+    second = async_protocol_packet_handler(port_handler, 0)
+    assert first.transport is second.transport
+
+    async def read_both():
+        port_handler.ser.rx += reply(3, b'\x34\x12') + reply(4, b'\x78\x56')
+        return await asyncio.gather(first.read2ByteTxRx(3, 56), second.read2ByteTxRx(4, 56))
+
+    assert asyncio.run(read_both()) == [(0x1234, COMM_SUCCESS, 0), (0x5678, COMM_SUCCESS, 0)]
+    assert not first.transport.lock.locked()
+    assert not port_handler.is_using
+
+def test_async_transaction_fails_while_a_sync_handler_uses_the_port():
+    port_handler = fake_port()
+    packet_handler = async_protocol_packet_handler(port_handler, 0)
+    port_handler.is_using = True
+
+    assert asyncio.run(packet_handler.write1ByteTxOnly(3, 40, 1)) == COMM_PORT_BUSY
+    assert port_handler.ser.written == []
+    assert not packet_handler.transport.lock.locked()
+    assert port_handler.is_using
+
+def test_async_group_sync_write_matches_sync_packet():
+    port_handler = fake_port()
+    sync_write = GroupSyncWrite(sms_sts(port_handler), 41, 7)
+    async_write = AsyncGroupSyncWrite(async_protocol_packet_handler(port_handler, 0), 41, 7)
+    assert asyncio.run(async_write.txPacket()) == COMM_NOT_AVAILABLE
+
+    for group in (sync_write, async_write):
+        group.addParam(1, [150, 0x41, 0x0A, 0, 0, 0xB8, 0x0B])
+        group.addParam(2, [150, 0x00, 0x0A, 0, 0, 0xB8, 0x0B])
+    assert sync_write.txPacket() == COMM_SUCCESS
+    assert asyncio.run(async_write.txPacket()) == COMM_SUCCESS
+    assert port_handler.ser.written[0] == port_handler.ser.written[1]
+
+def test_async_group_sync_read_parses_replies_and_releases_the_bus():
+    port_handler = fake_port()
+    packet_handler = async_protocol_packet_handler(port_handler, 0)
+    group = AsyncGroupSyncRead(packet_handler, 56, 4)
+    assert asyncio.run(group.txRxPacket()) == COMM_NOT_AVAILABLE
+
+    group.addParam(1)
+    group.addParam(2)
+    port_handler.ser.rx += reply(1, b'\x10\x00\x20\x00') + reply(2, b'\x30\x00\x40\x00')
+    assert asyncio.run(group.txRxPacket()) == COMM_SUCCESS
+    assert group.isAvailable(1, 56, 2) == (True, 0)
+    assert (group.getData(1, 56, 2), group.getData(2, 58, 2)) == (0x10, 0x40)
+    assert not packet_handler.transport.lock.locked()
+    assert not port_handler.is_using
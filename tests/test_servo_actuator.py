@@ -0,0 +1,123 @@
+import time
+
+import pytest
+
+import app.scservo_sdk as scservo_sdk
+from app.config import FacialRecognitionConfiguration as Config
+from app.servo_actuator import ServoActuator, SetpointMailbox
+
+def test_mailbox_keeps_newest_setpoint_and_counts_dropped():
+    mailbox = SetpointMailbox()
+    assert mailbox.take() == (None, 0)
+
+    mailbox.post(1, 2)
+    mailbox.post(3, 4)
+    mailbox.post(5, 6)
+    assert mailbox.wait(timeout=0)
+    setpoint, dropped = mailbox.take()
+    assert setpoint[:2] == (5, 6)
+    assert dropped == 2
+    assert not mailbox.wait(timeout=0)
+    assert mailbox.take() == (None, 0)
+
+class FakePortHandler:
+    opened = []
+
+    def __init__(self, port_name):
+        self.port_name = port_name
+        self.closed = False
+        FakePortHandler.opened.append(self)
+
+    def openPort(self):
+        return True
+
+    def setBaudRate(self, baudrate):
+        return True
+
+    def closePort(self):
+        self.closed = True
+
+class FlakyActuator(ServoActuator):
+    def __init__(self, failures):
+        super().__init__(max_rate=1000.0)
+        self.failures = failures
+        self.written = []
+        self.attempts = []
+
+    def _write(self, pan, tilt):
+        self.attempts.append(time.perf_counter())
+        if self.failures:
+            self.failures -= 1
+            return False
+        self.written.append((pan, tilt))
+        return True
+
+class UnpluggedActuator(ServoActuator):
+    def _write(self, pan, tilt):
+        raise OSError("device disconnected")
+
+@pytest.fixture
+def fake_bus(monkeypatch):
+    FakePortHandler.opened = []
+    monkeypatch.setattr(scservo_sdk, 'PortHandler', FakePortHandler)
+    monkeypatch.setattr(scservo_sdk, 'sms_sts', lambda port_handler: object())
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+def test_failed_write_is_retried_without_a_new_setpoint(fake_bus):
+    actuator = FlakyActuator(failures=2)
+    assert actuator.start()
+    try:
+        pan, tilt = Config.PAN_START, Config.TILT_START
+        actuator.post(pan, tilt)
+        assert wait_for(lambda: actuator.written)
+        assert actuator.written == [(pan, tilt)]
+        assert actuator.stats()['failed_writes'] == 2
+    finally:
+        actuator.stop()
+
+def test_newer_setpoint_replaces_a_failed_one(fake_bus):
+    actuator = FlakyActuator(failures=1)
+    actuator.min_interval = 0.05
+    assert actuator.start()
+    try:
+        actuator.post(Config.PAN_START, Config.TILT_START)
+        assert wait_for(lambda: actuator.failed_writes == 1)
+        actuator.post(Config.PAN_START + 10, Config.TILT_START)
+        assert wait_for(lambda: actuator.written)
+        assert actuator.written == [(Config.PAN_START + 10, Config.TILT_START)]
+    finally:
+        actuator.stop()
+
+def test_retries_back_off_stop_after_the_cap_and_log_once(fake_bus, caplog):
+    actuator = FlakyActuator(failures=100)
+    assert actuator.start()
+    try:
+        actuator.post(Config.PAN_START, Config.TILT_START)
+        assert wait_for(lambda: actuator.failed_writes == Config.SERVO_MAX_RETRIES + 1)
+        time.sleep(0.2)
+        assert actuator.failed_writes == Config.SERVO_MAX_RETRIES + 1
+    finally:
+        actuator.stop()
+
+    gaps = [later - earlier for earlier, later in zip(actuator.attempts, actuator.attempts[1:])]
+    assert all(later > earlier for earlier, later in zip(gaps, gaps[1:]))
+    assert len([record for record in caplog.records if "Servo write failed" in record.message]) == 1
+
+def test_port_error_stops_the_actuator_and_closes_the_port(fake_bus):
+    actuator = UnpluggedActuator(max_rate=1000.0)
+    assert actuator.start()
+    actuator.post(Config.PAN_START, Config.TILT_START)
+    assert wait_for(lambda: not actuator.running)
+    assert wait_for(lambda: FakePortHandler.opened[0].closed)
+    assert actuator.failed_writes == 1
+
+    # the port is opened afresh by the next start, as move_servo does
+    assert actuator.start()
+    assert len(FakePortHandler.opened) == 2 and not FakePortHandler.opened[1].closed
+    actuator.stop()
+    assert FakePortHandler.opened[1].closed
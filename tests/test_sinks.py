@@ -0,0 +1,58 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.sinks import FrameSink, SharedMemoryFrameReader, SharedMemorySink, _ThreadedSink
+
+class RecordingSink(_ThreadedSink):
+    def __init__(self):
+        self.frames = []
+        self.started = threading.Event()
+        self.proceed = threading.Event()
+        super().__init__("recording-sink")
+
+    def _consume(self, frame):
+        self.started.set()
+        self.proceed.wait(timeout=5)
+        self.frames.append(int(frame[0, 0, 0]))
+
+def frame(value):
+    return np.full((4, 6, 3), value, dtype=np.uint8)
+
+def test_sinks_must_implement_their_abstract_methods():
+    with pytest.raises(TypeError):
+        FrameSink()
+
+    class Incomplete(_ThreadedSink):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete("incomplete")
+
+def test_close_drains_the_frame_still_queued():
+    sink = RecordingSink()
+    sink.write(frame(1))
+    assert sink.started.wait(timeout=5)
+    sink.write(frame(2))  # queued while the worker is busy with frame 1
+    sink.proceed.set()
+    sink.close()
+
+    assert sink.frames == [1, 2]
+    assert sink.stats() == {'frames_written': 2, 'frames_dropped': 0}
+
+def test_shared_memory_reader_sees_newest_frame():
+    sink = SharedMemorySink(f"test-sink-{threading.get_ident()}", slots=3)
+    try:
+        sink.write(frame(1))
+        reader = SharedMemoryFrameReader(sink.name)
+        try:
+            for value in (2, 3, 4, 5):
+                sink.write(frame(value))
+            sequence, latest = reader.read()
+            assert sequence == 5
+            assert np.array_equal(latest, frame(5))
+        finally:
+            reader.close()
+    finally:
+        sink.close()
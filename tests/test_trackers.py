@@ -0,0 +1,69 @@
+import sys
+
+import numpy as np
+import pytest
+
+from app.trackers import SortTracker, create_tracker, iou_matrix
+
+def detections(*rows):
+    return np.array(rows, dtype=np.float32).reshape(-1, 5)
+
+@pytest.fixture
+def sort():
+    return SortTracker(max_age=3, n_init=2, iou_threshold=0.3, high_score=0.6)
+
+def test_sort_backend_works_without_deep_sort_realtime(monkeypatch):
+    monkeypatch.setitem(sys.modules, "deep_sort_realtime", None)  # makes importing it fail
+    assert isinstance(create_tracker("sort", camera="cam0"), SortTracker)
+    with pytest.raises(ValueError):
+        create_tracker("kcf")
+
+def test_iou_matrix():
+    iou = iou_matrix(np.array([[0, 0, 10, 10]], dtype=float), np.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]], dtype=float))
+    assert np.allclose(iou, [[1.0, 50 / 150, 0.0]])
+
+def test_track_is_confirmed_after_n_init_matches_and_keeps_its_id():
+    sort = SortTracker(max_age=3, n_init=2, iou_threshold=0.3, high_score=0.6, camera="cam1")
+    tracks = sort.update_tracks(detections([100, 100, 50, 60, 0.9]))
+    assert [track.track_id for track in tracks] == ["cam1-1"]
+    assert tracks[0].is_tentative()
+
+    tracks = sort.update_tracks(detections([104, 101, 50, 60, 0.9]))
+    assert [track.track_id for track in tracks] == ["cam1-1"]
+    assert tracks[0].is_confirmed()
+    assert tracks[0].others is not None
+    assert np.allclose(tracks[0].to_ltwh(orig=True), [104, 101, 50, 60])
+
+def test_low_confidence_detections_extend_tracks_but_never_start_them(sort):
+    assert sort.update_tracks(detections([100, 100, 50, 60, 0.3])) == []
+
+    sort.update_tracks(detections([100, 100, 50, 60, 0.9]))
+    sort.update_tracks(detections([102, 100, 50, 60, 0.9]))
+    tracks = sort.update_tracks(detections([104, 100, 50, 60, 0.3], [400, 300, 50, 60, 0.3]))
+    assert len(tracks) == 1
+    assert tracks[0].time_since_update == 0
+    assert tracks[0].det_conf == pytest.approx(0.3)
+
+def test_unmatched_tracks_are_deleted_after_max_age():
+    sort = SortTracker(max_age=2, n_init=2, iou_threshold=0.3, high_score=0.6)
+    sort.update_tracks(detections([100, 100, 50, 60, 0.9]))
+    sort.update_tracks(detections([100, 100, 50, 60, 0.9]))
+    empty = detections()
+    for _ in range(2):
+        assert len(sort.update_tracks(empty)) == 1
+        assert sort.del_tracks_ids == []
+    assert sort.update_tracks(empty) == []
+    assert sort.del_tracks_ids == ["1"]
+
+def test_tentative_track_is_deleted_on_first_miss(sort):
+    sort.update_tracks(detections([100, 100, 50, 60, 0.9]))
+    assert sort.update_tracks(detections()) == []
+    assert sort.del_tracks_ids == ["1"]
+
+def test_moving_face_is_followed_by_velocity_prediction(sort):
+    for step in range(12):
+        sort.update_tracks(detections([100 + 20 * step, 100, 50, 60, 0.9]))
+    track = sort.tracker.tracks[0]
+    sort.tracker.predict()
+    assert track.to_ltwh()[0] == pytest.approx(340, abs=5)
+    assert track.time_since_update == 1 and track.others is None
@@ -0,0 +1,42 @@
+import numpy as np
+
+from app.vector import TrackEmbedding
+
+def vectors(seed, count, dimension=8):
+    return np.random.default_rng(seed).standard_normal((count, dimension))
+
+def test_running_mean_matches_batch_mean_of_normalized_vectors():
+    embedding = TrackEmbedding(dimension=8)
+    batch = vectors(0, 5)
+    assert embedding.update(batch[:2]) == 2
+    assert embedding.update(batch[2:]) == 3
+
+    normalized = batch / np.linalg.norm(batch, axis=1, keepdims=True)
+    expected = normalized.mean(axis=0)
+    assert embedding.count == 5
+    assert np.allclose(embedding.vector, expected / np.linalg.norm(expected), atol=1e-6)
+
+def test_rows_with_nan_are_skipped():
+    embedding = TrackEmbedding(dimension=8)
+    batch = vectors(1, 3)
+    batch[1, 4] = np.nan
+    assert embedding.update(batch) == 2
+    assert embedding.update(np.full((1, 8), np.nan)) == 0
+    assert embedding.count == 2
+
+def test_identity_is_queried_again_only_after_drift():
+    embedding = TrackEmbedding(dimension=8, drift_threshold=0.05)
+    assert not embedding.needs_query
+
+    base = vectors(2, 1)
+    embedding.update(base)
+    assert embedding.needs_query and embedding.drift == 1.0
+    queried = embedding.mark_queried()
+    assert embedding.queries == 1 and not embedding.needs_query
+
+    embedding.update(base + 0.01 * vectors(3, 1))
+    assert embedding.drift < 0.05 and not embedding.needs_query
+
+    embedding.update(np.repeat(vectors(4, 1), 6, axis=0))
+    assert embedding.drift > 0.05 and embedding.needs_query
+    assert not np.allclose(embedding.mark_queried(), queried)